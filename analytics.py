@@ -0,0 +1,352 @@
+import threading
+from typing import Dict, Any, List, Sequence
+
+import numpy as np
+
+from report_filter import ReportFilter
+
+# The Reports tab's rollups, computed from donations held as NumPy columns:
+# amount (float64), category and donor as dictionary-encoded int32 codes,
+# date as int64 seconds since the epoch and a derived month code. Totals,
+# per-category, per-donor and monthly rollups are single np.bincount passes.
+# refresh() appends donations added since the last call and falls back to a
+# full reload when the running per-category, per-donor or monthly totals no
+# longer match the SQL rollup tables (rows were deleted or changed). Every
+# rollup takes an optional ReportFilter, applied as a boolean mask over the
+# columns.
+
+# SQLite's running sums and NumPy's pairwise sums round differently, more so
+# as totals grow
+AMOUNT_TOLERANCE = 0.005
+RELATIVE_TOLERANCE = 1e-9
+
+
+def _parse_dates(values: Sequence[str]) -> np.ndarray:
+    try:
+        return np.array(values, dtype='datetime64[s]')
+    except ValueError:
+        # Some row isn't ISO formatted; parse one at a time, unreadable dates count as 1970-01-01
+        parsed = np.zeros(len(values), dtype='datetime64[s]')
+        for i, value in enumerate(values):
+            try:
+                parsed[i] = np.datetime64(str(value).strip().replace(' ', 'T')[:19], 's')
+            except ValueError:
+                pass
+        return parsed
+
+
+class DonationAnalytics:
+    """Column store of every donation with vectorized report rollups."""
+
+    CHUNK = 100_000
+
+    def __init__(self, db=None):
+        self.db = db
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.size = 0
+        self._ids = np.empty(0, dtype=np.int64)
+        self._amount = np.empty(0, dtype=np.float64)
+        self._category = np.empty(0, dtype=np.int32)
+        self._donor = np.empty(0, dtype=np.int32)
+        self._date = np.empty(0, dtype=np.int64)
+        self._month = np.empty(0, dtype=np.int32)
+        self.categories: List[str] = []
+        self.donors: List[str] = []
+        self._category_codes: Dict[str, int] = {}
+        self._donor_codes: Dict[str, int] = {}
+        self._category_counts = np.zeros(0, dtype=np.int64)
+        self._category_sums = np.zeros(0, dtype=np.float64)
+        self._donor_counts = np.zeros(0, dtype=np.int64)
+        self._donor_sums = np.zeros(0, dtype=np.float64)
+        self._donor_last = np.zeros(0, dtype=np.int64)
+        self._monthly_totals: Dict[tuple, list] = {}  # (month code, category code) -> [count, total]
+        self._max_id = 0
+        self._version = None
+
+    @classmethod
+    def from_columns(cls, amounts, categories, donors, dates,
+                     category_names: List[str], donor_names: List[str]) -> 'DonationAnalytics':
+        """Build a detached engine from encoded columns, e.g. for benchmarks."""
+        analytics = cls()
+        analytics.categories = list(category_names)
+        analytics.donors = list(donor_names)
+        analytics._category_codes = {name: code for code, name in enumerate(analytics.categories)}
+        analytics._donor_codes = {name: code for code, name in enumerate(analytics.donors)}
+        analytics.append_columns(np.arange(1, len(amounts) + 1), amounts, categories, donors, dates)
+        return analytics
+
+    # Columns trimmed to the rows in use
+    @property
+    def amount(self) -> np.ndarray:
+        return self._amount[:self.size]
+
+    @property
+    def category(self) -> np.ndarray:
+        return self._category[:self.size]
+
+    @property
+    def donor(self) -> np.ndarray:
+        return self._donor[:self.size]
+
+    @property
+    def date(self) -> np.ndarray:
+        return self._date[:self.size]
+
+    @property
+    def month(self) -> np.ndarray:
+        return self._month[:self.size]
+
+    @staticmethod
+    def _encode(values, codes: Dict[str, int], names: List[str]) -> np.ndarray:
+        encoded = np.empty(len(values), dtype=np.int32)
+        for i, value in enumerate(values):
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(names)
+                names.append(value)
+            encoded[i] = code
+        return encoded
+
+    def _reserve(self, extra: int):
+        needed = self.size + extra
+        if needed <= len(self._amount):
+            return
+        # Grow geometrically so appending n rows costs O(n) overall
+        capacity = max(needed, 2 * len(self._amount), 1024)
+        for name in ('_ids', '_amount', '_category', '_donor', '_date', '_month'):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def append_columns(self, ids, amounts, categories, donors, dates):
+        """Append already-encoded columns (``dates`` as datetime64[s])."""
+        with self._lock:
+            count = len(amounts)
+            if not count:
+                return
+            self._reserve(count)
+            end = self.size + count
+            self._ids[self.size:end] = ids
+            self._amount[self.size:end] = amounts
+            self._category[self.size:end] = categories
+            self._donor[self.size:end] = donors
+            self._date[self.size:end] = dates.astype(np.int64)
+            self._month[self.size:end] = dates.astype('datetime64[M]').astype(np.int64)
+            self.size = end
+            self._max_id = max(self._max_id, int(np.max(ids)))
+
+            width = len(self.categories)
+            self._category_counts = np.pad(self._category_counts, (0, width - len(self._category_counts)))
+            self._category_sums = np.pad(self._category_sums, (0, width - len(self._category_sums)))
+            self._category_counts += np.bincount(categories, minlength=width)
+            self._category_sums += np.bincount(categories, weights=amounts, minlength=width)
+
+            width = len(self.donors)
+            grow = width - len(self._donor_counts)
+            self._donor_counts = np.pad(self._donor_counts, (0, grow))
+            self._donor_sums = np.pad(self._donor_sums, (0, grow))
+            self._donor_last = np.pad(self._donor_last, (0, grow), constant_values=np.iinfo(np.int64).min)
+            self._donor_counts += np.bincount(donors, minlength=width)
+            self._donor_sums += np.bincount(donors, weights=amounts, minlength=width)
+            np.maximum.at(self._donor_last, donors, self._date[end - count:end])
+
+            # Dense (month, category) keys as in monthly(): one bincount pass
+            months = self._month[end - count:end]
+            width = len(self.categories)
+            first = int(months.min())
+            keys = (months - first).astype(np.int64) * width + categories
+            counts = np.bincount(keys)
+            sums = np.bincount(keys, weights=amounts)
+            for key in np.flatnonzero(counts).tolist():
+                offset, code = divmod(key, width)
+                totals = self._monthly_totals.setdefault((first + offset, code), [0, 0.0])
+                totals[0] += int(counts[key])
+                totals[1] += float(sums[key])
+
+    def append(self, rows: Sequence[tuple]):
+        """Append ``(id, donor_name, amount, category, date)`` rows."""
+        if not rows:
+            return
+        with self._lock:
+            ids, donors, amounts, categories, dates = zip(*rows)
+            self.append_columns(
+                np.fromiter(ids, dtype=np.int64, count=len(rows)),
+                np.fromiter(amounts, dtype=np.float64, count=len(rows)),
+                self._encode(categories, self._category_codes, self.categories),
+                self._encode(donors, self._donor_codes, self.donors),
+                _parse_dates(dates),
+            )
+
+    def _read_since(self, conn, last_id: int):
+        cursor = conn.execute("""
+            SELECT id, donor_name, amount, category, date
+            FROM donations
+            WHERE id > ?
+            ORDER BY id
+        """, (last_id,))
+        while True:
+            rows = cursor.fetchmany(self.CHUNK)
+            if not rows:
+                break
+            self.append(rows)
+
+    def load(self):
+        """Read every donation from the database."""
+        with self._lock:
+            self._reset()
+            version = self.db.data_version
+            with self.db.connection() as conn:
+                self._read_since(conn, 0)
+            self._version = version
+
+    def refresh(self):
+        """Bring the columns up to date with the database; cheap when nothing changed."""
+        with self._lock:
+            if self._version is None:
+                self.load()
+                return
+            # data_version lives in the database, so writes made by other
+            # processes (importer, recurring, a second app) move it too
+            version = self.db.data_version
+            if version == self._version:
+                return
+            with self.db.connection() as conn:
+                self._read_since(conn, self._max_id)
+                categories = conn.execute(
+                    "SELECT category, donation_count, total_amount FROM category_totals").fetchall()
+                donors = conn.execute(
+                    "SELECT donor_name, donation_count, total_amount, last_donation_date FROM donor_totals").fetchall()
+                monthly = conn.execute(
+                    "SELECT month, category, donation_count, total_amount FROM monthly_category_totals").fetchall()
+            if not (self._matches_categories(categories) and self._matches_donors(donors)
+                    and self._matches_monthly(monthly)):
+                self.load()
+                return
+            self._version = version
+
+    @staticmethod
+    def _matches(actual: Dict[Any, tuple], expected: Dict[Any, tuple]) -> bool:
+        """Compare ``key -> (count, total)`` maps; amounts within rounding tolerance."""
+        if len(actual) != len(expected):
+            return False
+        for key, (count, total) in expected.items():
+            have = actual.get(key)
+            tolerance = max(AMOUNT_TOLERANCE, abs(total) * RELATIVE_TOLERANCE)
+            if have is None or have[0] != count or abs(have[1] - total) > tolerance:
+                return False
+        return True
+
+    # Each check is O(groups). Together they catch deletes and restores and
+    # edits to amount, category, donor or month; the donor's last date also
+    # catches date edits that move their most recent donation.
+    def _matches_categories(self, expected) -> bool:
+        actual = {self.categories[code]: (int(self._category_counts[code]), float(self._category_sums[code]))
+                  for code in np.flatnonzero(self._category_counts)}
+        return self._matches(actual, {category: (count, total) for category, count, total in expected})
+
+    def _matches_donors(self, expected) -> bool:
+        present = np.flatnonzero(self._donor_counts)
+        actual = {self.donors[code]: (int(self._donor_counts[code]), float(self._donor_sums[code]))
+                  for code in present}
+        if not self._matches(actual, {name: (count, total) for name, count, total, _ in expected}):
+            return False
+        last = dict(zip((self.donors[code] for code in present), self._donor_last[present].tolist()))
+        expected_last = _parse_dates([row[3] for row in expected]).astype(np.int64).tolist()
+        return all(last[row[0]] == date for row, date in zip(expected, expected_last))
+
+    def _matches_monthly(self, expected) -> bool:
+        actual = {(month, code): tuple(totals) for (month, code), totals in self._monthly_totals.items() if totals[0]}
+        try:
+            expected = {(int(np.datetime64(month, 'M').astype(np.int64)), self._category_codes[category]): (count, total)
+                        for month, category, count, total in expected}
+        except (KeyError, ValueError):
+            return False
+        return self._matches(actual, expected)
+
+    def _columns(self, report_filter: ReportFilter = None):
+        """``(amount, category, donor, date, month)`` for the rows the filter keeps."""
+        columns = (self.amount, self.category, self.donor, self.date, self.month)
+        if report_filter is None or report_filter.is_empty:
+            return columns
+        keep = np.ones(self.size, dtype=bool)
+        lower, upper = report_filter.date_bounds()
+        if lower:
+            keep &= self.date >= np.datetime64(lower, 's').astype(np.int64)
+        if upper:
+            keep &= self.date < np.datetime64(upper, 's').astype(np.int64)
+        for value, codes, column in ((report_filter.category, self._category_codes, self.category),
+                                     (report_filter.donor, self._donor_codes, self.donor)):
+            if value:
+                code = codes.get(value)
+                keep &= False if code is None else column == code
+        return tuple(column[keep] for column in columns)
+
+    def totals(self, report_filter: ReportFilter = None) -> Dict[str, Any]:
+        with self._lock:
+            amount = self._columns(report_filter)[0]
+            return {'count': int(len(amount)), 'total': float(amount.sum())}
+
+    def by_category(self, report_filter: ReportFilter = None) -> List[Dict[str, Any]]:
+        """Count and total per category, by category name."""
+        with self._lock:
+            amount, category = self._columns(report_filter)[:2]
+            width = len(self.categories)
+            counts = np.bincount(category, minlength=width)
+            totals = np.bincount(category, weights=amount, minlength=width)
+            return sorted(
+                ({'category': self.categories[code], 'count': int(counts[code]), 'total': float(totals[code])}
+                 for code in np.flatnonzero(counts)),
+                key=lambda row: row['category']
+            )
+
+    def by_donor(self, limit: int = None, report_filter: ReportFilter = None) -> List[Dict[str, Any]]:
+        """Count, total, average and last donation date per donor, biggest total first."""
+        with self._lock:
+            amount, _, donor, date, _ = self._columns(report_filter)
+            width = len(self.donors)
+            counts = np.bincount(donor, minlength=width)
+            totals = np.bincount(donor, weights=amount, minlength=width)
+            last = np.full(width, np.iinfo(np.int64).min, dtype=np.int64)
+            np.maximum.at(last, donor, date)
+
+            present = np.flatnonzero(counts)
+            if limit is not None and limit < len(present):
+                # Only sort the top of the list
+                present = present[np.argpartition(-totals[present], limit - 1)[:limit]]
+            order = present[np.lexsort((present, -totals[present]))]
+            last_dates = last[order].astype('datetime64[s]').astype(str)
+            return [{
+                'donor_name': self.donors[code],
+                'count': int(counts[code]),
+                'total': float(totals[code]),
+                'average': float(totals[code] / counts[code]),
+                'last_date': last_date.replace('T', ' '),
+            } for code, last_date in zip(order, last_dates)]
+
+    def monthly(self, report_filter: ReportFilter = None) -> List[Dict[str, Any]]:
+        """Count and total per (month, category), newest month first."""
+        with self._lock:
+            amount, category, _, _, month = self._columns(report_filter)
+            if not len(amount):
+                return []
+            width = len(self.categories)
+            first = int(month.min())
+            keys = (month - first).astype(np.int64) * width + category
+            counts = np.bincount(keys)
+            totals = np.bincount(keys, weights=amount)
+            rows = []
+            for key in np.flatnonzero(counts):
+                offset, code = divmod(int(key), width)
+                rows.append({
+                    'month': str(np.datetime64(first + offset, 'M')),
+                    'category': self.categories[code],
+                    'count': int(counts[key]),
+                    'total': float(totals[key]),
+                })
+            rows.sort(key=lambda row: (row['month'], row['category']))
+            rows.sort(key=lambda row: row['month'], reverse=True)
+            return rows
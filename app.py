@@ -1,15 +1,51 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import sqlite3
 from datetime import datetime
 from chatbot import ChatBot
+from chat_worker import ChatWorker
+from database import DonationDatabase
+from donation_list import DonationListView, DonationPager
+from exporter import FORMATS as EXPORT_FORMATS, ExportCancelled, default_filename, export_donations
+from notifications import NotificationDispatcher
+from recurring import INTERVALS as RECURRING_INTERVALS, RecurringScheduler, next_occurrence
+from report_filter import ALL_CATEGORIES, DATE_RANGES, ReportFilter
+from report_view import ReportView
 import os
-import pandas as pd
+import queue
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import threading
 from style import apply_modern_style, create_custom_font, style_text_widget
-from PIL import Image, ImageTk
+
+# Startup shows the splash only while the main window is being built. The
+# chatbot (which imports and configures the model SDK) and the NumPy-backed
+# reports engine are built on background threads and waited for the first
+# time they are used.
+
+SPLASH_IMAGE = 'img.png'
+SPLASH_SIZE = (800, 600)
+
+
+def splash_image_path(path: str = SPLASH_IMAGE, size=SPLASH_SIZE) -> str:
+    """A copy of ``path`` resized to ``size``, made once and reused until the source changes."""
+    base, _ = os.path.splitext(path)
+    cached = f"{base}.{size[0]}x{size[1]}.png"
+    if not os.path.exists(cached) or os.path.getmtime(cached) < os.path.getmtime(path):
+        # Only a changed image pays for PIL and the LANCZOS resize
+        from PIL import Image
+        with Image.open(path) as img:
+            img.resize(size, Image.Resampling.LANCZOS).save(cached)
+    return cached
+
 
 class DonationTracker:
+    UNDO_DEPTH = 10
+    DONOR_PAGE = 50  # donors shown per "Load More" in the Analytics tab
+    
     def __init__(self):
+        self._started = time.perf_counter()
+        self.startup_seconds = None
         self.root = tk.Tk()
         self.root.title("AI Donation Tracker")
         self.root.geometry("800x600")
@@ -20,11 +56,13 @@ class DonationTracker:
         self.splash.geometry("800x600")
         self.splash.overrideredirect(True)  # Remove window decorations
         
-        # Load and display splash image
-        img = Image.open("img.png")
-        img = img.resize((800, 600), Image.Resampling.LANCZOS)
-        self.splash_img = ImageTk.PhotoImage(img)
-        splash_label = tk.Label(self.splash, image=self.splash_img)
+        # Load and display splash image (Tk reads the cached PNG itself)
+        try:
+            self.splash_img = tk.PhotoImage(file=splash_image_path())
+            splash_label = tk.Label(self.splash, image=self.splash_img)
+        except Exception as e:
+            print(f"Error loading splash image: {str(e)}")
+            splash_label = tk.Label(self.splash, text="AI Donation Tracker", font=('Inter', 24))
         splash_label.pack(fill='both', expand=True)
         
         # Center splash screen
@@ -38,24 +76,26 @@ class DonationTracker:
         # Hide main window initially
         self.root.withdraw()
         
-        # Schedule splash screen removal and app initialization
-        self.root.after(5000, self._remove_splash)
+        # Build the app as soon as the splash has been drawn
+        self.splash.update()
+        self.root.after(1, self._initialize_app)
     
     def _remove_splash(self):
         self.splash.destroy()
         self.root.deiconify()
-        self.loading_label = ttk.Label(self.root, text="Initializing application...")
-        self.loading_label.pack(expand=True)
-        self.root.after(100, self._initialize_app)
+        self.startup_seconds = time.perf_counter() - self._started
     
     def _initialize_app(self):
-        # Initialize database in background
-        import threading
-        db_thread = threading.Thread(target=self.init_database)
-        db_thread.start()
+        # Creates or upgrades the schema once per process (see
+        # DonationDatabase.__new__); everything below can rely on the tables
+        self.db = DonationDatabase()
         
-        # Initialize chatbot
-        self.chatbot = ChatBot()
+        # The chatbot (shares the same pooled database) and the reports
+        # engine are built off the main thread; see the chatbot property
+        self._background = ThreadPoolExecutor(max_workers=2, thread_name_prefix='startup')
+        self._chatbot_future = self._background.submit(ChatBot, self.db)
+        self._analytics_future = self._background.submit(self._load_analytics)
+        self._report_requests = {}  # ReportView -> its latest pending refresh
         
         # Apply modern styling
         apply_modern_style(self.root)
@@ -69,9 +109,6 @@ class DonationTracker:
         self.chat_frame = ttk.Frame(self.main_container, style='Modern.TFrame')
         self.reports_frame = ttk.Frame(self.main_container, style='Modern.TFrame')
         
-        # Remove loading label
-        self.loading_label.destroy()
-        
         # Setup UI
         self.main_container.pack(expand=True, fill='both', padx=20, pady=10)
         self.main_container.add(self.donation_frame, text='Donations')
@@ -82,69 +119,31 @@ class DonationTracker:
         self.setup_donation_ui()
         self.setup_chat_ui()
         self.setup_reports_ui()
+        
+        # Create recurring donations as they come due, off the main thread
+        self._recurring_runs = queue.Queue()
+        self.recurring = RecurringScheduler(self.db, on_run=self._recurring_runs.put)
+        self.recurring.start()
+        self.root.after(1000, self._poll_recurring)
+        
+        # Deliver queued email notifications in the background
+        self.notifier = NotificationDispatcher(self.db)
+        self.notifier.start()
+        
+        self._remove_splash()
     
-    def init_database(self):
-        # Create database and tables if they don't exist
-        with sqlite3.connect('donations.db') as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS donations (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    donor_name TEXT NOT NULL,
-                    amount REAL NOT NULL,
-                    category TEXT NOT NULL,
-                    date TEXT NOT NULL,
-                    notes TEXT,
-                    is_recurring BOOLEAN DEFAULT 0,
-                    recurring_interval TEXT,
-                    next_donation_date TEXT
-                )
-            ''')
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS donor_profiles (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    email TEXT,
-                    phone TEXT,
-                    address TEXT,
-                    preferred_category TEXT,
-                    total_donations REAL DEFAULT 0,
-                    last_donation_date TEXT,
-                    notification_preferences TEXT
-                )
-            ''')
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS donation_goals (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    category TEXT NOT NULL,
-                    target_amount REAL NOT NULL,
-                    current_amount REAL DEFAULT 0,
-                    start_date TEXT NOT NULL,
-                    end_date TEXT,
-                    status TEXT DEFAULT 'active'
-                )
-            ''')
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS chat_history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_message TEXT NOT NULL,
-                    bot_response TEXT NOT NULL,
-                    timestamp TEXT NOT NULL
-                )
-            ''')
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS email_notifications (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    donor_id INTEGER,
-                    type TEXT NOT NULL,
-                    message TEXT NOT NULL,
-                    status TEXT DEFAULT 'pending',
-                    created_at TEXT NOT NULL,
-                    sent_at TEXT,
-                    FOREIGN KEY (donor_id) REFERENCES donor_profiles(id)
-                )
-            ''')
-            conn.commit()
+    @property
+    def chatbot(self) -> ChatBot:
+        # Only chat requests need it, and they run on the chat worker thread
+        return self._chatbot_future.result()
+    
+    def _load_analytics(self):
+        # Column store behind the Reports tab; importing it pulls in NumPy
+        from analytics import DonationAnalytics
+        
+        analytics = DonationAnalytics(self.db)
+        analytics.refresh()
+        return analytics
     
     def setup_donation_ui(self):
         # Create canvas for scrollable content
@@ -215,7 +214,7 @@ class DonationTracker:
         
         # Interval
         ttk.Label(self.recurring_frame, text="Interval:").grid(row=0, column=0, padx=5, pady=3, sticky='e')
-        self.recurring_interval = ttk.Combobox(self.recurring_frame, values=['Weekly', 'Monthly', 'Quarterly', 'Yearly'], style='Modern.TCombobox')
+        self.recurring_interval = ttk.Combobox(self.recurring_frame, values=list(RECURRING_INTERVALS), style='Modern.TCombobox')
         self.recurring_interval.grid(row=0, column=1, padx=5, pady=3, sticky='ew')
         
         # Notes
@@ -242,8 +241,8 @@ class DonationTracker:
             canvas.itemconfig(canvas.find_withtag('all')[0], width=event.width-40)
         canvas.bind('<Configure>', on_canvas_configure)
         
-        # Recent donations list
-        list_frame = ttk.LabelFrame(self.donation_frame, text="Recent Donations", padding=15, style='Modern.TLabelframe')
+        # Donations list, newest first; scrolls through every donation a page at a time
+        list_frame = ttk.LabelFrame(self.donation_frame, text="Donations", padding=15, style='Modern.TLabelframe')
         list_frame.pack(fill='both', expand=True, padx=20, pady=10)
         
         # Treeview for donations
@@ -255,9 +254,9 @@ class DonationTracker:
         self.donation_tree.heading('Date', text='Date')
         self.donation_tree.heading('Notes', text='Notes')
         
-        # Add scrollbar
+        # Add scrollbar; the list view loads pages as it nears either end
         scrollbar = ttk.Scrollbar(list_frame, orient='vertical', command=self.donation_tree.yview)
-        self.donation_tree.configure(yscrollcommand=scrollbar.set)
+        self.donation_list = DonationListView(self.donation_tree, scrollbar, DonationPager(self.db))
         
         # Pack treeview and scrollbar
         self.donation_tree.pack(side='left', fill='both', expand=True)
@@ -267,10 +266,20 @@ class DonationTracker:
         delete_btn = ttk.Button(list_frame, text="Delete Selected", command=self.delete_donation, style='Modern.TButton')
         delete_btn.pack(pady=10)
         
+        # Undo the last few deletes; each entry holds the deleted rows
+        self._undo_deletes = deque(maxlen=self.UNDO_DEPTH)
+        self.undo_btn = ttk.Button(list_frame, text="Undo Delete", command=self.undo_delete, style='Modern.TButton', state='disabled')
+        self.undo_btn.pack()
+        
         # Add right-click menu
         self.context_menu = tk.Menu(self.root, tearoff=0)
         self.context_menu.add_command(label="Delete", command=self.delete_donation)
+        self.context_menu.add_command(label="Undo Delete", command=self.undo_delete)
         self.donation_tree.bind('<Button-3>', self.show_context_menu)
+        self.donation_tree.bind('<Delete>', lambda e: self.delete_donation())
+        self.donation_tree.bind('<Control-z>', lambda e: self.undo_delete())
+        
+        self.update_donation_list()
     
     def setup_chat_ui(self):
         # Chat interface
@@ -288,11 +297,23 @@ class DonationTracker:
         self.message_entry = ttk.Entry(entry_frame, style='Modern.TEntry')
         self.message_entry.pack(side='left', fill='x', expand=True, padx=(0, 10))
         
+        self.cancel_btn = ttk.Button(entry_frame, text="Cancel", command=self.cancel_messages, style='Modern.TButton', state='disabled')
+        self.cancel_btn.pack(side='right', padx=(10, 0))
+        
         send_btn = ttk.Button(entry_frame, text="Send", command=self.send_message, style='Modern.TButton')
         send_btn.pack(side='right')
         
+        # Pending-request indicator
+        self.chat_status = ttk.Label(chat_container, text="")
+        self.chat_status.pack(fill='x', pady=(5, 0))
+        
         # Bind Enter key to send message
         self.message_entry.bind('<Return>', lambda e: self.send_message())
+        
+        # Chat requests run on a background thread; see send_message
+        self.chat_worker = ChatWorker(lambda message: self.chatbot.stream_response(message),
+                                      on_response=self._record_chat, stream=True)
+        self._chat_polling = False
     
     def setup_reports_ui(self):
         # Reports interface
@@ -305,13 +326,13 @@ class DonationTracker:
         
         # Date range
         ttk.Label(filters_frame, text="Date Range:").grid(row=0, column=0, padx=5, pady=3)
-        self.date_range = ttk.Combobox(filters_frame, values=['Last 7 Days', 'Last 30 Days', 'Last 90 Days', 'This Year', 'All Time'], style='Modern.TCombobox')
+        self.date_range = ttk.Combobox(filters_frame, values=list(DATE_RANGES), state='readonly', style='Modern.TCombobox')
         self.date_range.grid(row=0, column=1, padx=5, pady=3)
         self.date_range.set('All Time')
         
         # Category filter
         ttk.Label(filters_frame, text="Category:").grid(row=0, column=2, padx=5, pady=3)
-        self.category_filter = ttk.Combobox(filters_frame, values=['All Categories', 'General', 'Project', 'Emergency', 'Other'], style='Modern.TCombobox')
+        self.category_filter = ttk.Combobox(filters_frame, values=[ALL_CATEGORIES] + self.db.get_categories(), style='Modern.TCombobox')
         self.category_filter.grid(row=0, column=3, padx=5, pady=3)
         self.category_filter.set('All Categories')
         
@@ -325,10 +346,24 @@ class DonationTracker:
         button_frame.pack(fill='x', padx=5, pady=5)
         
         ttk.Button(button_frame, text="Generate Report", command=self.generate_report, style='Modern.TButton').pack(side='left', padx=5)
-        ttk.Button(button_frame, text="Export to Excel", command=self.export_to_excel, style='Modern.TButton').pack(side='left', padx=5)
+        self.export_btn = ttk.Button(button_frame, text="Export to Excel", command=self.export_to_excel, style='Modern.TButton')
+        self.export_btn.pack(side='left', padx=5)
+        self.export_format = ttk.Combobox(button_frame, values=list(EXPORT_FORMATS), width=7, state='readonly', style='Modern.TCombobox')
+        self.export_format.pack(side='left', padx=(0, 5))
+        self.export_format.set('xlsx')
         ttk.Button(button_frame, text="Donor Analytics", command=self.show_donor_analytics, style='Modern.TButton').pack(side='left', padx=5)
         ttk.Button(button_frame, text="Donation Trends", command=self.show_donation_trends, style='Modern.TButton').pack(side='left', padx=5)
         
+        # Export progress; exports run on a background thread
+        export_frame = ttk.Frame(controls_frame, style='Modern.TFrame')
+        export_frame.pack(fill='x', padx=5)
+        self.export_progress = ttk.Progressbar(export_frame, mode='determinate', maximum=1)
+        self.export_status = ttk.Label(export_frame, text="")
+        self.export_status.pack(side='left', padx=5)
+        self._export_thread = None
+        self._export_cancel = threading.Event()
+        self._export_updates = queue.Queue()
+        
         # Create notebook for different views
         self.report_notebook = ttk.Notebook(self.reports_frame, style='Modern.TNotebook')
         self.report_notebook.pack(fill='both', expand=True, padx=20, pady=10)
@@ -340,14 +375,112 @@ class DonationTracker:
         self.report_text = tk.Text(self.summary_frame, wrap=tk.WORD, state='disabled')
         style_text_widget(self.report_text)
         self.report_text.pack(fill='both', expand=True)
+        self.summary_view = ReportView(self.report_text)
         
         # Trends tab
         self.trends_frame = ttk.Frame(self.report_notebook)
         self.report_notebook.add(self.trends_frame, text='Trends')
         
-        # Analytics tab
+        self.trends_text = tk.Text(self.trends_frame, wrap=tk.WORD, state='disabled')
+        style_text_widget(self.trends_text)
+        self.trends_text.pack(fill='both', expand=True)
+        self.trends_view = ReportView(self.trends_text)
+        
+        # Analytics tab; donors are listed DONOR_PAGE at a time
         self.analytics_frame = ttk.Frame(self.report_notebook)
         self.report_notebook.add(self.analytics_frame, text='Analytics')
+        
+        self.load_more_btn = ttk.Button(self.analytics_frame, text="Load More", command=self.load_more_donors,
+                                        state='disabled', style='Modern.TButton')
+        self.load_more_btn.pack(side='bottom', pady=5)
+        self.analytics_text = tk.Text(self.analytics_frame, wrap=tk.WORD, state='disabled')
+        style_text_widget(self.analytics_text)
+        self.analytics_text.pack(fill='both', expand=True)
+        self.analytics_view = ReportView(self.analytics_text)
+        self._donor_limit = self.DONOR_PAGE
+        
+        # Goals tab
+        self.goals_frame = ttk.Frame(self.report_notebook)
+        self.report_notebook.add(self.goals_frame, text='Goals')
+        self.setup_goals_ui()
+        self.report_notebook.bind('<<NotebookTabChanged>>', self._on_report_tab_changed)
+    
+    def setup_goals_ui(self):
+        # New goal form
+        goal_form = ttk.LabelFrame(self.goals_frame, text="New Goal", padding=10)
+        goal_form.pack(fill='x', padx=5, pady=5)
+        
+        ttk.Label(goal_form, text="Category:").grid(row=0, column=0, padx=5, pady=3)
+        self.goal_category = ttk.Combobox(goal_form, values=self.db.get_categories(), style='Modern.TCombobox')
+        self.goal_category.grid(row=0, column=1, padx=5, pady=3)
+        
+        ttk.Label(goal_form, text="Target:").grid(row=0, column=2, padx=5, pady=3)
+        self.goal_target = ttk.Entry(goal_form, width=12, style='Modern.TEntry')
+        self.goal_target.grid(row=0, column=3, padx=5, pady=3)
+        
+        ttk.Label(goal_form, text="From:").grid(row=0, column=4, padx=5, pady=3)
+        self.goal_start = ttk.Entry(goal_form, width=12, style='Modern.TEntry')
+        self.goal_start.grid(row=0, column=5, padx=5, pady=3)
+        self.goal_start.insert(0, datetime.now().strftime('%Y-%m-%d'))
+        
+        ttk.Label(goal_form, text="To:").grid(row=0, column=6, padx=5, pady=3)
+        self.goal_end = ttk.Entry(goal_form, width=12, style='Modern.TEntry')
+        self.goal_end.grid(row=0, column=7, padx=5, pady=3)
+        
+        ttk.Button(goal_form, text="Add Goal", command=self.add_goal, style='Modern.TButton').grid(row=0, column=8, padx=5, pady=3)
+        ttk.Button(goal_form, text="Reconcile", command=self.reconcile_goals, style='Modern.TButton').grid(row=0, column=9, padx=5, pady=3)
+        
+        # Progress of every active goal, read straight from donation_goals
+        self.goals_tree = ttk.Treeview(self.goals_frame, columns=('Category', 'Raised', 'Target', 'Progress', 'From', 'To'),
+                                       show='headings', style='Modern.Treeview')
+        for column in ('Category', 'Raised', 'Target', 'Progress', 'From', 'To'):
+            self.goals_tree.heading(column, text=column)
+        self.goals_tree.pack(fill='both', expand=True, padx=5, pady=5)
+        self.refresh_goals()
+    
+    def _on_report_tab_changed(self, event):
+        if self.report_notebook.select() == str(self.goals_frame):
+            self.refresh_goals()
+    
+    def refresh_goals(self):
+        self.goals_tree.delete(*self.goals_tree.get_children())
+        for goal in self.db.get_goal_progress():
+            self.goals_tree.insert('', 'end', iid=str(goal['id']), values=(
+                goal['category'],
+                f"${goal['current_amount']:.2f}",
+                f"${goal['target_amount']:.2f}",
+                f"{goal['progress'] * 100:.0f}%",
+                goal['start_date'],
+                goal['end_date'] or 'open',
+            ))
+    
+    def add_goal(self):
+        try:
+            category = self.goal_category.get().strip()
+            target = float(self.goal_target.get())
+            start = self.goal_start.get().strip()
+            end = self.goal_end.get().strip() or None
+            for value in filter(None, (start, end)):
+                datetime.strptime(value, '%Y-%m-%d')
+            if not category or not start:
+                messagebox.showerror("Error", "Please enter a category, target and start date")
+                return
+            self.db.add_goal(category, target, start, end)
+            self.goal_target.delete(0, 'end')
+            self.goal_end.delete(0, 'end')
+            self.refresh_goals()
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid goal: {str(e)}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to add goal: {str(e)}")
+    
+    def reconcile_goals(self):
+        try:
+            changed = self.db.reconcile_goals()
+            self.refresh_goals()
+            messagebox.showinfo("Goals", f"Reconciled goal progress ({changed} goal(s) corrected)")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to reconcile goals: {str(e)}")
     
     def toggle_recurring_options(self):
         if self.is_recurring.get():
@@ -383,44 +516,29 @@ class DonationTracker:
                 messagebox.showerror("Error", "Please select a recurring interval")
                 return
             
-            # Calculate next donation date for recurring donations
+            # Calculate next donation date for recurring donations; the
+            # recurring scheduler creates it once it is due
             next_donation_date = None
             if is_recurring:
-                next_date = datetime.now()
-                if recurring_interval == 'Weekly':
-                    next_date = next_date.replace(day=next_date.day + 7)
-                elif recurring_interval == 'Monthly':
-                    if next_date.month == 12:
-                        next_date = next_date.replace(year=next_date.year + 1, month=1)
-                    else:
-                        next_date = next_date.replace(month=next_date.month + 1)
-                elif recurring_interval == 'Quarterly':
-                    if next_date.month > 9:
-                        next_date = next_date.replace(year=next_date.year + 1, month=(next_date.month + 3) % 12)
-                    else:
-                        next_date = next_date.replace(month=next_date.month + 3)
-                elif recurring_interval == 'Yearly':
-                    next_date = next_date.replace(year=next_date.year + 1)
+                next_date = next_occurrence(datetime.strptime(date, '%Y-%m-%d %H:%M:%S'), recurring_interval)
                 next_donation_date = next_date.strftime('%Y-%m-%d %H:%M:%S')
             
             # Save to database
-            with sqlite3.connect('donations.db') as conn:
+            with self.db.connection() as conn:
                 cursor = conn.cursor()
                 
-                # Update or create donor profile
-                cursor.execute('''
-                    INSERT OR REPLACE INTO donor_profiles (name, email, phone, address, preferred_category, last_donation_date)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (donor, email, phone, address, category, date))
-                
-                # Get donor_id for the notification
-                donor_id = cursor.lastrowid
-                
-                # Insert donation with next_donation_date
+                # Insert donation with next_donation_date; the insert trigger
+                # links it to the donor's profile, creating one if needed
                 cursor.execute('''
                     INSERT INTO donations (donor_name, amount, category, date, notes, is_recurring, recurring_interval, next_donation_date)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?)
                 ''', (donor, amount, category, date, notes, is_recurring, recurring_interval, next_donation_date))
+                donation_id = cursor.lastrowid
+                
+                # Fill in the contact details given, keeping stored ones left blank
+                cursor.execute(self.db.DONOR_UPSERT,
+                               (donor, email or None, phone or None, address or None, category))
+                donor_id = cursor.execute("SELECT donor_id FROM donations WHERE id = ?", (donation_id,)).fetchone()[0]
                 
                 # Create notification for large donations
                 if amount >= 1000:  # Threshold for significant donations
@@ -429,7 +547,8 @@ class DonationTracker:
                         VALUES (?, ?, ?, ?)
                     ''', (donor_id, 'large_donation', f'Large donation received: ${amount:.2f} from {donor}', date))
                 
-                conn.commit()
+            if amount >= 1000:
+                self.notifier.wake()
             
             # Clear form
             self.donor_name.delete(0, 'end')
@@ -443,8 +562,8 @@ class DonationTracker:
             self.recurring_interval.set('')
             self.toggle_recurring_options()
             
-            # Update donation list
-            self.update_donation_list()
+            # Add the new row to the list without reloading it
+            self.donation_list.insert_donation((donation_id, donor, amount, category, date, notes))
             
             messagebox.showinfo("Success", "Donation recorded successfully!")
             
@@ -454,21 +573,8 @@ class DonationTracker:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
     
     def update_donation_list(self):
-        # Clear current items
-        for item in self.donation_tree.get_children():
-            self.donation_tree.delete(item)
-        
-        # Fetch and display recent donations
-        with sqlite3.connect('donations.db') as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT donor_name, amount, category, date, notes
-                FROM donations
-                ORDER BY date DESC
-                LIMIT 50
-            ''')
-            for row in cursor.fetchall():
-                self.donation_tree.insert('', 'end', values=row)
+        # Back to the newest page; pages load in the background
+        self.donation_list.reload()
     
     def send_message(self):
         message = self.message_entry.get().strip()
@@ -478,274 +584,289 @@ class DonationTracker:
         # Clear message entry
         self.message_entry.delete(0, 'end')
         
-        # Add user message to chat history
+        # Add user message and a placeholder for the answer; the worker
+        # thread fills it in so the window stays responsive
+        request_id = self.chat_worker.submit(message)
         self.chat_history.configure(state='normal')
         self.chat_history.insert('end', f"You: {message}\n")
-        
-        # Get bot response
-        response = self.chatbot.get_response(message)
-        
-        # Add bot response to chat history
-        self.chat_history.insert('end', f"Assistant: {response}\n\n")
+        self.chat_history.insert('end', "Assistant: thinking...\n\n", f"pending-{request_id}")
         self.chat_history.configure(state='disabled')
         self.chat_history.see('end')
+        self._update_chat_status()
         
-        # Save chat history to database
-        with sqlite3.connect('donations.db') as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
+        if not self._chat_polling:
+            self._chat_polling = True
+            self.root.after(100, self._poll_chat_responses)
+    
+    def _record_chat(self, message, response):
+        # Runs on the worker thread
+        with self.db.connection() as conn:
+            conn.execute('''
                 INSERT INTO chat_history (user_message, bot_response, timestamp)
                 VALUES (?, ?, ?)
             ''', (message, response, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
-            conn.commit()
+    
+    def _poll_chat_responses(self):
+        for result in self.chat_worker.poll():
+            tag = f"pending-{result['id']}"
+            mark = f"answer-{result['id']}"
+            self.chat_history.configure(state='normal')
+            
+            if result['status'] == 'partial':
+                if mark not in self.chat_history.mark_names():
+                    # First chunk: turn the placeholder into an empty answer
+                    # and keep a mark where the next chunk goes
+                    start = self._clear_placeholder(tag)
+                    self.chat_history.insert(start, "Assistant: \n\n")
+                    self.chat_history.mark_set(mark, f"{start} + {len('Assistant: ')} chars")
+                    self.chat_history.mark_gravity(mark, 'right')
+                self.chat_history.insert(mark, result['response'])
+            elif mark in self.chat_history.mark_names():
+                # Streamed answer is already on screen
+                if result['status'] == 'cancelled':
+                    self.chat_history.insert(mark, " (cancelled)")
+                elif result['status'] == 'error':
+                    self.chat_history.insert(mark, f" (error: {result['response']})")
+                self.chat_history.mark_unset(mark)
+            else:
+                if result['status'] == 'done':
+                    text = f"Assistant: {result['response']}\n\n"
+                elif result['status'] == 'cancelled':
+                    text = "Assistant: (cancelled)\n\n"
+                else:
+                    text = f"Assistant: Sorry, something went wrong: {result['response']}\n\n"
+                self.chat_history.insert(self._clear_placeholder(tag), text)
+            
+            self.chat_history.configure(state='disabled')
+            self.chat_history.see('end')
+        
+        self._update_chat_status()
+        if self.chat_worker.pending:
+            self.root.after(50, self._poll_chat_responses)
+        else:
+            self._chat_polling = False
+    
+    def _clear_placeholder(self, tag):
+        # Remove a "thinking..." placeholder and return where it was, so
+        # answers stay next to their questions
+        ranges = self.chat_history.tag_ranges(tag)
+        self.chat_history.tag_delete(tag)
+        if not ranges:
+            return self.chat_history.index('end-1c')
+        start = self.chat_history.index(ranges[0])
+        self.chat_history.delete(ranges[0], ranges[1])
+        return start
+    
+    def _update_chat_status(self):
+        pending = self.chat_worker.pending
+        self.chat_status.configure(text=f"Waiting for {pending} response(s)..." if pending else "")
+        self.cancel_btn.configure(state='normal' if pending else 'disabled')
+    
+    def cancel_messages(self):
+        self.chat_worker.cancel_all()
+    
+    def _with_report_data(self, view, render):
+        """Call ``render(analytics)`` once the reports engine is up to date.
+        
+        Loading and refreshing it read the database, so both run on the
+        background pool and are polled with after(); ``view`` shows a loading
+        line until the first load has finished.
+        """
+        if not self._analytics_future.done():
+            view.show(["Loading donations..."])
+        future = self._background.submit(self._report_data)
+        self._report_requests[view] = future
+        self._wait_for_report(view, future, render)
+    
+    def _report_data(self):
+        # Loaded once, then only donations added since the last report are read
+        analytics = self._analytics_future.result()
+        analytics.refresh()
+        return analytics
+    
+    def _wait_for_report(self, view, future, render):
+        if self._report_requests.get(view) is not future:
+            return  # a newer request for the same view took over
+        if not future.done():
+            self.root.after(50, self._wait_for_report, view, future, render)
+            return
+        del self._report_requests[view]
+        try:
+            analytics = future.result()
+        except Exception as e:
+            view.show([])
+            messagebox.showerror("Error", f"Failed to load donations for the report: {str(e)}")
+            return
+        render(analytics)
+    
+    def _report_filter(self) -> ReportFilter:
+        """The Filters box as a ReportFilter, shared by every report and the export."""
+        return ReportFilter.from_selection(self.date_range.get(), self.category_filter.get(), self.donor_filter.get())
     
     def generate_report(self):
+        self._with_report_data(self.summary_view, self._render_summary)
+    
+    def _render_summary(self, analytics):
         try:
-            with sqlite3.connect('donations.db') as conn:
-                cursor = conn.cursor()
-                
-                # Get total donations
-                cursor.execute("SELECT COUNT(*), SUM(amount) FROM donations")
-                count, total = cursor.fetchone()
-                
-                # Get category breakdown
-                cursor.execute('''
-                    SELECT category, COUNT(*), SUM(amount)
-                    FROM donations
-                    GROUP BY category
-                ''')
-                categories = cursor.fetchall()
-                
-                # Generate report text
-                report = f"Donation Summary Report\n"
-                report += f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
-                report += f"Total Donations: {count if count else 0}\n"
-                total_amount = float(total) if total else 0.00
-                report += f"Total Amount: ${total_amount:.2f}\n\n"
-                report += "Category Breakdown:\n"
-                
-                for category, cat_count, cat_total in categories:
-                    cat_total = float(cat_total) if cat_total else 0.00
-                    report += f"{category}:\n"
-                    report += f"  Count: {cat_count}\n"
-                    report += f"  Total: ${cat_total:.2f}\n"
-                
-                # Update report text widget
-                self.report_text.configure(state='normal')
-                self.report_text.delete('1.0', 'end')
-                self.report_text.insert('1.0', report)
-                self.report_text.configure(state='disabled')
+            report_filter = self._report_filter()
+            totals = analytics.totals(report_filter)
+            
+            # Generate report text
+            lines = [
+                "Donation Summary Report",
+                f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+                f"Showing: {report_filter.describe()}",
+                "",
+                f"Total Donations: {totals['count']}",
+                f"Total Amount: ${totals['total']:.2f}",
+                "",
+                "Category Breakdown:",
+            ]
+            for row in analytics.by_category(report_filter):
+                lines.append(f"{row['category']}:")
+                lines.append(f"  Count: {row['count']}")
+                lines.append(f"  Total: ${row['total']:.2f}")
+            
+            self.summary_view.show(lines)
                 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to generate report: {str(e)}")
     
     def show_donor_analytics(self):
+        self._donor_limit = self.DONOR_PAGE
+        self._with_report_data(self.analytics_view, self._render_donor_analytics)
+    
+    def load_more_donors(self):
+        self._donor_limit += self.DONOR_PAGE
+        self._with_report_data(self.analytics_view, self._render_donor_analytics)
+    
+    def _render_donor_analytics(self, analytics):
         try:
-            with sqlite3.connect('donations.db') as conn:
-                cursor = conn.cursor()
-                
-                # Get donor statistics
-                cursor.execute('''
-                    SELECT 
-                        donor_name,
-                        COUNT(*) as donation_count,
-                        SUM(amount) as total_amount,
-                        AVG(amount) as avg_amount,
-                        MAX(date) as last_donation
-                    FROM donations
-                    GROUP BY donor_name
-                    ORDER BY total_amount DESC
-                ''')
-                donor_stats = cursor.fetchall()
-                
-                # Generate analytics report
-                report = "Donor Analytics Report\n\n"
-                report += "Top Donors:\n"
-                
-                for donor, count, total, avg, last_date in donor_stats:
-                    report += f"\nDonor: {donor}\n"
-                    report += f"Total Donations: {count}\n"
-                    report += f"Total Amount: ${total:.2f}\n"
-                    report += f"Average Donation: ${avg:.2f}\n"
-                    report += f"Last Donation: {last_date}\n"
-                
-                # Show in analytics tab
-                analytics_text = tk.Text(self.analytics_frame, wrap=tk.WORD)
-                style_text_widget(analytics_text)
-                analytics_text.pack(fill='both', expand=True)
-                analytics_text.insert('1.0', report)
-                analytics_text.configure(state='disabled')
+            # One extra row tells whether there is more to load
+            report_filter = self._report_filter()
+            donors = analytics.by_donor(limit=self._donor_limit + 1, report_filter=report_filter)
+            more = len(donors) > self._donor_limit
+            
+            # Generate analytics report
+            lines = ["Donor Analytics Report", f"Showing: {report_filter.describe()}", "", "Top Donors:"]
+            for row in donors[:self._donor_limit]:
+                lines.append("")
+                lines.append(f"Donor: {row['donor_name']}")
+                lines.append(f"Total Donations: {row['count']}")
+                lines.append(f"Total Amount: ${row['total']:.2f}")
+                lines.append(f"Average Donation: ${row['average']:.2f}")
+                lines.append(f"Last Donation: {row['last_date']}")
+            
+            # Only the lines that changed are rewritten, so "Load More" just appends
+            self.analytics_view.show(lines)
+            self.load_more_btn.configure(state='normal' if more else 'disabled')
                 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to generate donor analytics: {str(e)}")
     
     def show_donation_trends(self):
+        self._with_report_data(self.trends_view, self._render_donation_trends)
+    
+    def _render_donation_trends(self, analytics):
         try:
-            with sqlite3.connect('donations.db') as conn:
-                cursor = conn.cursor()
-                
-                # Get monthly trends
-                cursor.execute('''
-                    SELECT 
-                        strftime('%Y-%m', date) as month,
-                        COUNT(*) as donation_count,
-                        SUM(amount) as total_amount,
-                        category
-                    FROM donations
-                    GROUP BY month, category
-                    ORDER BY month DESC
-                ''')
-                trends = cursor.fetchall()
-                
-                # Generate trends report
-                report = "Donation Trends Report\n\n"
-                report += "Monthly Breakdown:\n"
-                
-                current_month = None
-                for month, count, total, category in trends:
-                    if month != current_month:
-                        current_month = month
-                        report += f"\n{month}:\n"
-                    report += f"  {category}: ${total:.2f} ({count} donations)\n"
-                
-                # Show in trends tab
-                trends_text = tk.Text(self.trends_frame, wrap=tk.WORD)
-                style_text_widget(trends_text)
-                trends_text.pack(fill='both', expand=True)
-                trends_text.insert('1.0', report)
-                trends_text.configure(state='disabled')
+            # Generate trends report
+            report_filter = self._report_filter()
+            lines = ["Donation Trends Report", f"Showing: {report_filter.describe()}", "", "Monthly Breakdown:"]
+            current_month = None
+            for row in analytics.monthly(report_filter):
+                if row['month'] != current_month:
+                    current_month = row['month']
+                    lines.append("")
+                    lines.append(f"{current_month}:")
+                lines.append(f"  {row['category']}: ${row['total']:.2f} ({row['count']} donations)")
+            
+            self.trends_view.show(lines)
                 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to generate donation trends: {str(e)}")
     
     def export_to_excel(self):
+        # The same button cancels a running export
+        if self._export_thread and self._export_thread.is_alive():
+            self._export_cancel.set()
+            self.export_status.configure(text="Cancelling export...")
+            return
+        
         try:
-            with sqlite3.connect('donations.db') as conn:
-                # Create a pandas DataFrame from the donations table
-                df = pd.read_sql_query('''
-                    SELECT donor_name as 'Donor Name',
-                           amount as 'Amount',
-                           category as 'Category',
-                           date as 'Date',
-                           notes as 'Notes'
-                    FROM donations
-                    ORDER BY date DESC
-                ''', conn)
-                
-                # Convert date column to datetime
-                df['Date'] = pd.to_datetime(df['Date'])
-                
-                # Calculate summary statistics
-                total_donations = df['Amount'].sum()
-                total_count = len(df)
-                category_summary = df.groupby('Category').agg({
-                    'Amount': ['count', 'sum']
-                }).round(2)
-                category_summary.columns = ['Count', 'Total Amount']
-                
-                # Create visualizations
-                import matplotlib.pyplot as plt
-                import io
-                
-                # 1. Category Distribution Pie Chart
-                plt.figure(figsize=(10, 6))
-                plt.pie(category_summary['Total Amount'], labels=category_summary.index, autopct='%1.1f%%')
-                plt.title('Donation Distribution by Category')
-                category_pie = io.BytesIO()
-                plt.savefig(category_pie)
-                plt.close()
-                
-                # 2. Monthly Trends Line Graph
-                monthly_data = df.groupby(df['Date'].dt.to_period('M')).agg({
-                    'Amount': 'sum'
-                }).reset_index()
-                monthly_data['Date'] = monthly_data['Date'].astype(str)
-                
-                plt.figure(figsize=(12, 6))
-                plt.plot(monthly_data['Date'], monthly_data['Amount'], marker='o')
-                plt.title('Monthly Donation Trends')
-                plt.xticks(rotation=45)
-                plt.tight_layout()
-                trends_line = io.BytesIO()
-                plt.savefig(trends_line)
-                plt.close()
-                
-                # 3. Top Donors Bar Chart
-                top_donors = df.groupby('Donor Name')['Amount'].sum().nlargest(10)
-                
-                plt.figure(figsize=(12, 6))
-                plt.bar(top_donors.index, top_donors.values)
-                plt.title('Top 10 Donors')
-                plt.xticks(rotation=45)
-                plt.tight_layout()
-                donors_bar = io.BytesIO()
-                plt.savefig(donors_bar)
-                plt.close()
-                
-                # Get current timestamp for filename
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                filename = f'donation_report_{timestamp}.xlsx'
-                
-                # Create Excel writer object
-                with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-                    # Write main donation data
-                    df.to_excel(writer, sheet_name='Donations', index=False)
-                    
-                    # Write summary sheet
-                    summary_df = pd.DataFrame({
-                        'Metric': ['Total Donations', 'Total Amount'],
-                        'Value': [total_count, f'${total_donations:.2f}']
-                    })
-                    summary_df.to_excel(writer, sheet_name='Summary', index=False)
-                    
-                    # Write category breakdown
-                    category_summary.to_excel(writer, sheet_name='Category Breakdown')
-                    
-                    # Add visualizations to the workbook
-                    workbook = writer.book
-                    
-                    # Add graphs worksheet
-                    graphs_sheet = workbook.create_sheet('Graphs')
-                    
-                    # Insert the charts
-                    from openpyxl.drawing.image import Image
-                    
-                    # Category Distribution Pie Chart
-                    img_pie = Image(category_pie)
-                    graphs_sheet.add_image(img_pie, 'A1')
-                    
-                    # Monthly Trends Line Graph
-                    img_line = Image(trends_line)
-                    graphs_sheet.add_image(img_line, 'A20')
-                    
-                    # Top Donors Bar Chart
-                    img_bar = Image(donors_bar)
-                    graphs_sheet.add_image(img_bar, 'A40')
-                    
-                    # Auto-adjust column widths
-                    for sheet_name in writer.sheets:
-                        worksheet = writer.sheets[sheet_name]
-                        if sheet_name != 'Graphs':  # Skip graphs sheet
-                            for column in worksheet.columns:
-                                max_length = 0
-                                column = [cell for cell in column]
-                                for cell in column:
-                                    try:
-                                        if len(str(cell.value)) > max_length:
-                                            max_length = len(str(cell.value))
-                                    except:
-                                        pass
-                                adjusted_width = (max_length + 2)
-                                worksheet.column_dimensions[column[0].column_letter].width = adjusted_width
-                
-                messagebox.showinfo("Success", f"Report exported successfully as '{filename}'")
-                
+            report_filter = self._report_filter()
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        fmt = self.export_format.get() or 'xlsx'
+        self._export_cancel.clear()
+        self._export_thread = threading.Thread(
+            target=self._run_export, args=(default_filename(fmt), fmt, report_filter), name='export'
+        )
+        self.export_btn.configure(text="Cancel Export")
+        self.export_progress.configure(value=0)
+        self.export_progress.pack(side='left', fill='x', expand=True, padx=5, before=self.export_status)
+        self.export_status.configure(text="Starting export...")
+        self._export_thread.start()
+        self.root.after(100, self._poll_export)
+    
+    def _run_export(self, filename, fmt, report_filter=None):
+        # Runs on the export thread; Tk is only touched from _poll_export
+        try:
+            result = export_donations(
+                filename, self.db, fmt=fmt,
+                progress=lambda written, total: self._export_updates.put(('progress', (written, total))),
+                cancelled=self._export_cancel.is_set,
+                report_filter=report_filter
+            )
+            self._export_updates.put(('done', result))
+        except ExportCancelled:
+            self._export_updates.put(('cancelled', None))
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to export report: {str(e)}")
+            self._export_updates.put(('error', e))
+    
+    def _poll_export(self):
+        finished = False
+        while True:
+            try:
+                kind, payload = self._export_updates.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'progress':
+                written, total = payload
+                self.export_progress.configure(maximum=max(total, 1), value=written)
+                self.export_status.configure(text=f"Exported {written:,} of {total:,} donations")
+                continue
+            finished = True
+            self.export_progress.pack_forget()
+            self.export_btn.configure(text="Export to Excel")
+            if kind == 'done':
+                self.export_status.configure(text=f"Exported {payload['rows']:,} donations")
+                messagebox.showinfo("Success", f"Report exported successfully as '{payload['path']}'")
+            elif kind == 'cancelled':
+                self.export_status.configure(text="Export cancelled")
+            else:
+                self.export_status.configure(text="")
+                messagebox.showerror("Error", f"Failed to export report: {str(payload)}")
+        if not finished:
+            self.root.after(100, self._poll_export)
     
     def run(self):
         # Start the application
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            if hasattr(self, 'chat_worker'):
+                self.chat_worker.shutdown()
+            if hasattr(self, '_export_cancel'):
+                self._export_cancel.set()
+            if hasattr(self, 'donation_list'):
+                self.donation_list.pager.shutdown()
+            if hasattr(self, 'recurring'):
+                self.recurring.stop(timeout=5)
+            if hasattr(self, 'notifier'):
+                self.notifier.stop(timeout=5)
+            if hasattr(self, '_background'):
+                self._background.shutdown(wait=False, cancel_futures=True)
 
     def delete_donation(self):
         selected_items = self.donation_tree.selection()
@@ -757,24 +878,40 @@ class DonationTracker:
             return
             
         try:
-            with sqlite3.connect('donations.db') as conn:
-                cursor = conn.cursor()
-                for item in selected_items:
-                    # Get the date from the selected item
-                    values = self.donation_tree.item(item)['values']
-                    date = values[3]  # Date is the fourth column
-                    
-                    # Delete from database
-                    cursor.execute('DELETE FROM donations WHERE date = ?', (date,))
-                    
-                    # Remove from treeview
-                    self.donation_tree.delete(item)
-                    
-                conn.commit()
-            messagebox.showinfo("Success", "Selected donation(s) deleted successfully!")
+            # Tree items are keyed by donation id; one transaction for the lot
+            deleted = self.db.delete_donations(selected_items)
+            self.donation_list.remove(selected_items)
+            if deleted:
+                self._undo_deletes.append(deleted)
+                self.undo_btn.configure(state='normal')
+            messagebox.showinfo("Success", f"Deleted {len(deleted)} donation(s). Use Undo Delete to restore them.")
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to delete donation(s): {str(e)}")
+    
+    def _poll_recurring(self):
+        created = 0
+        while not self._recurring_runs.empty():
+            created += self._recurring_runs.get_nowait()['created']
+        if created:
+            self.update_donation_list()
+        self.root.after(1000, self._poll_recurring)
+    
+    def undo_delete(self):
+        if not self._undo_deletes:
+            return
+        # Only dropped from the buffer once restored, so a failed undo can be retried
+        rows = self._undo_deletes[-1]
+        try:
+            self.db.restore_donations(rows)
+            self._undo_deletes.pop()
+            self.donation_list.insert_rows([
+                (row['id'], row['donor_name'], row['amount'], row['category'], row['date'], row['notes'])
+                for row in rows
+            ])
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to restore donation(s): {str(e)}")
+        self.undo_btn.configure(state='normal' if self._undo_deletes else 'disabled')
             
     def show_context_menu(self, event):
         # Show context menu on right-click
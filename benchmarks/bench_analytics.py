@@ -0,0 +1,63 @@
+"""Reports engine rollups over a synthetic donation column store.
+
+Usage: python benchmarks/bench_analytics.py [--rows 10000000] [--donors 100000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analytics import DonationAnalytics
+
+CATEGORIES = ['General', 'Project', 'Emergency', 'Scholarships', 'Building', 'Outreach']
+
+
+def synthetic(rows, donors):
+    rng = np.random.default_rng(7)
+    start = np.datetime64('2015-01-01T00:00:00', 's').astype(np.int64)
+    seconds = rng.integers(0, 10 * 365 * 86400, rows) + start
+    return DonationAnalytics.from_columns(
+        np.round(rng.uniform(1, 5000, rows), 2),
+        rng.integers(0, len(CATEGORIES), rows, dtype=np.int32),
+        rng.integers(0, donors, rows, dtype=np.int32),
+        seconds.astype('datetime64[s]'),
+        CATEGORIES,
+        [f"Donor {i}" for i in range(donors)],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--donors', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=3, help='report the best of this many runs')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    analytics = synthetic(args.rows, args.donors)
+    print(f"built {analytics.size:,} rows in {time.perf_counter() - started:.2f}s")
+
+    rollups = [
+        ('totals', analytics.totals),
+        ('by_category', analytics.by_category),
+        ('by_donor(limit=10)', lambda: analytics.by_donor(limit=10)),
+        ('monthly', analytics.monthly),
+    ]
+    overall = 0.0
+    for name, rollup in rollups:
+        best = float('inf')
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            rollup()
+            best = min(best, time.perf_counter() - started)
+        overall += best
+        print(f"{name:20s} {best * 1000:8.1f} ms")
+    print(f"{'full report':20s} {overall * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
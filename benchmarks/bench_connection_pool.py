@@ -0,0 +1,107 @@
+"""Queries per second with a fresh connection per call vs. the DonationDatabase pool.
+
+Usage: python benchmarks/bench_connection_pool.py [--rows 1000000] [--seconds 5]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DonationDatabase
+
+CATEGORIES = ['General', 'Project', 'Emergency', 'Other']
+
+QUERIES = [
+    ("SELECT SUM(amount) FROM donations WHERE category = ?", ('Emergency',)),
+    ("SELECT * FROM donations ORDER BY id DESC LIMIT 5", ()),
+    ("SELECT name FROM categories ORDER BY name", ()),
+]
+
+
+def build_database(path, rows):
+    start = datetime(2020, 1, 1)
+    with sqlite3.connect(path) as conn:
+        conn.execute('''
+            CREATE TABLE donations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                donor_name TEXT NOT NULL,
+                amount REAL NOT NULL,
+                category TEXT NOT NULL,
+                date TEXT NOT NULL,
+                notes TEXT,
+                is_recurring BOOLEAN DEFAULT 0,
+                recurring_interval TEXT,
+                next_donation_date TEXT
+            )
+        ''')
+        conn.execute("CREATE TABLE categories (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE NOT NULL)")
+        conn.executemany("INSERT INTO categories (name) VALUES (?)", [(c,) for c in CATEGORIES])
+        rng = random.Random(42)
+        conn.executemany(
+            "INSERT INTO donations (donor_name, amount, category, date) VALUES (?, ?, ?, ?)",
+            ((f"Donor {rng.randrange(50000)}",
+              round(rng.uniform(1, 5000), 2),
+              rng.choice(CATEGORIES),
+              (start + timedelta(minutes=i)).strftime('%Y-%m-%d %H:%M:%S'))
+             for i in range(rows))
+        )
+
+
+def run_for(seconds, fn):
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sql, params = QUERIES[count % len(QUERIES)]
+        fn(sql, params)
+        count += 1
+    return count / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        print(f"Building {args.rows:,} donation rows...")
+        build_database(path, args.rows)
+
+        def unpooled(sql, params):
+            with sqlite3.connect(path) as conn:
+                conn.execute(sql, params).fetchall()
+
+        db = DonationDatabase(path)
+
+        def pooled(sql, params):
+            with db.connection() as conn:
+                conn.execute(sql, params).fetchall()
+
+        # Warm the OS page cache so neither side pays the first read
+        pooled(*QUERIES[0])
+
+        before = run_for(args.seconds, unpooled)
+        after = run_for(args.seconds, pooled)
+
+        # The schema bootstrap ran in the first constructor; later ones only look up the instance
+        started = time.perf_counter()
+        for _ in range(10000):
+            DonationDatabase(path)
+        construct = (time.perf_counter() - started) / 10000
+        db.close()
+
+    print(f"connect-per-query: {before:10.1f} queries/s")
+    print(f"pooled + PRAGMAs:  {after:10.1f} queries/s")
+    print(f"speedup:           {after / before:10.2f}x")
+    print(f"DonationDatabase(): {construct * 1e6:9.2f} us per call after the first")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Page latency for the Donations list: keyset on (date, id) vs. LIMIT/OFFSET.
+
+Usage: python benchmarks/bench_donation_pages.py [--rows 1000000] [--page-size 200]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DonationDatabase
+from bench_export import donation_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--page-size', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DonationDatabase(os.path.join(tmp, 'bench.db'))
+        print(f"Building {args.rows:,} donation rows...")
+        db.add_donations_bulk(donation_rows(args.rows), chunk_size=20000)
+
+        # Walk the whole table the way scrolling to the bottom does
+        pages = 0
+        slowest = 0.0
+        started = time.perf_counter()
+        page = db.get_donations_page(limit=args.page_size)
+        while page:
+            pages += 1
+            before = time.perf_counter()
+            page = db.get_donations_page(after=(page[-1][4], page[-1][0]), limit=args.page_size)
+            slowest = max(slowest, time.perf_counter() - before)
+        seconds = time.perf_counter() - started
+        print(f"keyset: {pages:,} pages in {seconds:.2f}s, "
+              f"avg {seconds / pages * 1000:.2f} ms, slowest {slowest * 1000:.2f} ms")
+
+        # OFFSET has to step over every earlier row, so deep pages get slower
+        with db.connection() as conn:
+            for depth in (0.0, 0.5, 0.99):
+                offset = int(args.rows * depth)
+                before = time.perf_counter()
+                conn.execute("""
+                    SELECT id, donor_name, amount, category, date, notes FROM donations
+                    ORDER BY date DESC, id DESC LIMIT ? OFFSET ?
+                """, (args.page_size, offset)).fetchall()
+                print(f"offset {offset:>9,}: {(time.perf_counter() - before) * 1000:8.2f} ms")
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
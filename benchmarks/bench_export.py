@@ -0,0 +1,67 @@
+"""Time and peak Python memory of the streaming export for each format.
+
+Usage: python benchmarks/bench_export.py [--rows 1000000] [--formats xlsx csv] [--memory]
+
+tracemalloc slows the export several times over, so peak memory is only
+measured (in a second, untimed run) with --memory.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DonationDatabase
+from exporter import FORMATS, export_donations
+
+CATEGORIES = ['General', 'Project', 'Emergency', 'Other']
+
+
+def donation_rows(count):
+    rng = random.Random(42)
+    start = datetime(2020, 1, 1)
+    for i in range(count):
+        yield {
+            'donor_name': f"Donor {rng.randrange(50000)}",
+            'amount': round(rng.uniform(1, 5000), 2),
+            'category': rng.choice(CATEGORIES),
+            'date': start + timedelta(minutes=i),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--formats', nargs='+', default=['xlsx', 'csv'], choices=FORMATS)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--memory', action='store_true', help='also measure peak traced memory')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DonationDatabase(os.path.join(tmp, 'bench.db'))
+        print(f"Building {args.rows:,} donation rows...")
+        db.add_donations_bulk(donation_rows(args.rows), chunk_size=20000)
+
+        for fmt in args.formats:
+            path = os.path.join(tmp, f'report.{fmt}')
+            started = time.perf_counter()
+            export_donations(path, db, batch_size=args.batch_size)
+            seconds = time.perf_counter() - started
+            line = (f"{fmt:8s} {seconds:8.2f}s  {args.rows / seconds:10,.0f} rows/s  "
+                    f"file {os.path.getsize(path) / 2**20:7.1f} MiB")
+            if args.memory:
+                tracemalloc.start()
+                export_donations(path, db, batch_size=args.batch_size)
+                line += f"  peak {tracemalloc.get_traced_memory()[1] / 2**20:7.1f} MiB"
+                tracemalloc.stop()
+            print(line)
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Latency and throughput of the local inference engine under concurrent chat load.
+
+Runs --clients threads, each asking --requests questions back to back, for
+every combination of batch size and quantization asked for. Needs torch and
+transformers and a model directory (e.g. one written by model_trainer.py).
+
+Usage: python benchmarks/bench_inference.py [--model-dir ./trained_model] [--clients 8] [--batch-sizes 1 8] [--quantize both]
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from local_inference import BatchingEngine, LocalModel
+
+QUESTIONS = [
+    "What is the total amount of donations?",
+    "How do I make an Emergency donation?",
+    "Who are the top donors this month?",
+    "Show me donations in the Education category",
+    "How can I export a report?",
+]
+
+
+def run_load(engine, clients, requests):
+    latencies = []
+    lock = threading.Lock()
+
+    def client(index):
+        for i in range(requests):
+            question = QUESTIONS[(index + i) % len(QUESTIONS)]
+            started = time.perf_counter()
+            engine.generate(f"User: {question}\nAssistant:")
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=client, args=(index,)) for index in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model-dir', default='./trained_model')
+    parser.add_argument('--clients', type=int, default=8, help='concurrent chat users')
+    parser.add_argument('--requests', type=int, default=4, help='questions per client')
+    parser.add_argument('--max-new-tokens', type=int, default=48)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8])
+    parser.add_argument('--quantize', choices=['no', 'yes', 'both'], default='both')
+    parser.add_argument('--threads', type=int, help='torch intra-op threads')
+    args = parser.parse_args()
+
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+
+    modes = {'no': [False], 'yes': [True], 'both': [False, True]}[args.quantize]
+    print(f"{'int8':<6}{'batch':>6}{'p50 s':>9}{'p95 s':>9}{'max s':>9}{'req/s':>9}{'tok/s':>9}")
+    for quantize in modes:
+        model = LocalModel(args.model_dir, quantize, args.max_new_tokens)
+        model.generate_batch(["User: hello\nAssistant:"])  # warm up
+        for batch_size in args.batch_sizes:
+            tokens = []
+
+            def generate_batch(prompts):
+                texts = model.generate_batch(prompts)
+                tokens.extend(len(model.tokenizer(text)['input_ids']) for text in texts)
+                return texts
+
+            engine = BatchingEngine(generate_batch, max_batch_size=batch_size,
+                                    max_pending=args.clients * args.requests)
+            latencies, elapsed = run_load(engine, args.clients, args.requests)
+            engine.stop()
+            latencies.sort()
+            print(f"{'yes' if quantize else 'no':<6}{batch_size:>6}"
+                  f"{statistics.median(latencies):>9.2f}"
+                  f"{latencies[int(0.95 * (len(latencies) - 1))]:>9.2f}"
+                  f"{latencies[-1]:>9.2f}"
+                  f"{len(latencies) / elapsed:>9.1f}"
+                  f"{sum(tokens) / elapsed:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Recurring engine with many active schedules: cost of finding and materializing due ones.
+
+Usage: python benchmarks/bench_recurring.py [--schedules 100000] [--donations 1000000] [--due 0.05]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DonationDatabase
+from recurring import DATE_FORMAT, DUE_QUERY, INTERVALS, process_due
+from bench_export import donation_rows
+
+NOW = datetime(2025, 1, 1)
+
+
+def schedule_rows(count, due_fraction):
+    rng = random.Random(7)
+    for i in range(count):
+        start = NOW - timedelta(days=rng.randrange(1, 365))
+        # Due schedules missed their last date by up to a week
+        if rng.random() < due_fraction:
+            next_date = NOW - timedelta(hours=rng.randrange(1, 24 * 7))
+        else:
+            next_date = NOW + timedelta(hours=rng.randrange(1, 24 * 90))
+        yield {
+            'donor_name': f"Donor {i}",
+            'amount': 25,
+            'category': 'General',
+            'date': start,
+            'is_recurring': 'yes',
+            'recurring_interval': rng.choice(INTERVALS),
+            'next_donation_date': next_date.strftime(DATE_FORMAT),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--schedules', type=int, default=100_000)
+    parser.add_argument('--donations', type=int, default=1_000_000, help='one-off donations alongside')
+    parser.add_argument('--due', type=float, default=0.05, help='fraction of schedules that are due')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DonationDatabase(os.path.join(tmp, 'bench.db'))
+        print(f"Building {args.donations:,} donations and {args.schedules:,} schedules...")
+        db.add_donations_bulk(donation_rows(args.donations), chunk_size=20000)
+        db.add_donations_bulk(schedule_rows(args.schedules, args.due), chunk_size=20000)
+
+        with db.connection() as conn:
+            started = time.perf_counter()
+            due = len(conn.execute(DUE_QUERY, (NOW.strftime(DATE_FORMAT), args.schedules)).fetchall())
+            indexed = time.perf_counter() - started
+
+            started = time.perf_counter()
+            conn.execute("""
+                SELECT id FROM donations NOT INDEXED
+                WHERE is_recurring = 1 AND next_donation_date IS NOT NULL AND next_donation_date <= ?
+                ORDER BY next_donation_date
+            """, (NOW.strftime(DATE_FORMAT),)).fetchall()
+            scanned = time.perf_counter() - started
+        print(f"find {due:,} due schedules: index {indexed * 1000:8.1f} ms, table scan {scanned * 1000:8.1f} ms")
+
+        result = process_due(db, now=NOW)
+        print(f"materialize: {result['created']:,} donations from {result['schedules']:,} schedules "
+              f"in {result['seconds']:.2f}s ({result['created'] / result['seconds']:,.0f} donations/s)")
+
+        result = process_due(db, now=NOW)
+        print(f"idle re-run: {result['seconds'] * 1000:.2f} ms")
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
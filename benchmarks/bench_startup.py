@@ -0,0 +1,93 @@
+"""App startup: module import cost (python -X importtime) and time-to-interactive.
+
+Time-to-interactive is from interpreter start until the main window is
+shown (DonationTracker.startup_seconds); it needs a display and is skipped
+without one. Runs in a scratch directory so the real donations.db is untouched.
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--top 10]
+"""
+import argparse
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+INTERACTIVE = """
+import os, time
+started = time.perf_counter()
+import tkinter
+try:
+    import app
+    imported = time.perf_counter() - started
+    tracker = app.DonationTracker()
+except tkinter.TclError as e:
+    print('skip', e)
+    os._exit(0)
+while tracker.startup_seconds is None:
+    tracker.root.update()
+print('ok', imported, time.perf_counter() - started)
+os._exit(0)
+"""
+
+
+def import_times(cwd):
+    """``{module: cumulative microseconds}`` for app and the modules it imports directly."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                            cwd=cwd, env={**os.environ, 'PYTHONPATH': ROOT},
+                            capture_output=True, text=True, check=True)
+    children = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        # A module is listed after everything it imported, one level deeper
+        depth, module, micros = len(match.group(3)), match.group(4), int(match.group(2))
+        if depth == 1:
+            if module == 'app':
+                return {'app': micros, **children}
+            children = {}
+        elif depth == 3:
+            children[module] = micros
+    raise RuntimeError('app was not imported')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='report the best of this many runs')
+    parser.add_argument('--top', type=int, default=10, help='direct imports to list')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copy(os.path.join(ROOT, 'img.png'), tmp)
+
+        best = {}
+        for _ in range(args.runs):
+            for module, micros in import_times(tmp).items():
+                best[module] = min(best.get(module, micros), micros)
+        print(f"import app: {best['app'] / 1000:8.1f} ms (best of {args.runs})")
+        for module, micros in sorted(best.items(), key=lambda item: -item[1])[1:args.top + 1]:
+            print(f"  {module:30s} {micros / 1000:8.1f} ms")
+
+        for run in range(args.runs):
+            result = subprocess.run([sys.executable, '-c', INTERACTIVE], cwd=tmp,
+                                    env={**os.environ, 'PYTHONPATH': ROOT}, capture_output=True, text=True)
+            fields = (result.stdout.strip().splitlines() or ['error'])[-1].split(' ', 1)
+            if fields[0] == 'skip':
+                print(f"time-to-interactive: skipped ({fields[1]})")
+                break
+            if fields[0] != 'ok':
+                print(f"time-to-interactive: failed\n{result.stderr}")
+                break
+            imported, interactive = map(float, fields[1].split())
+            label = 'cold splash cache' if run == 0 else 'warm'
+            print(f"time-to-interactive: {interactive * 1000:8.1f} ms "
+                  f"(imports {imported * 1000:.1f} ms, {label})")
+
+
+if __name__ == '__main__':
+    main()
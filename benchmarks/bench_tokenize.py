@@ -0,0 +1,135 @@
+"""Training input pipeline on CPU: tokens/s for per-item vs. cached batch tokenization, and padding waste.
+
+Needs torch and transformers (and the tokenizer/model download on first run).
+
+Usage: python benchmarks/bench_tokenize.py [--examples 20000] [--model microsoft/DialoGPT-small]
+                                           [--batch-size 16] [--train-steps 0]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from token_cache import TokenCache, pad_batch
+
+CATEGORIES = ['General', 'Project', 'Emergency', 'Other']
+QUESTIONS = ['What is the total?', 'Show me recent donations', 'How do I add a donor?',
+             'Which category raised the most this year and how does it compare to last year?']
+
+
+def synthetic_examples(count):
+    rng = random.Random(5)
+    examples = []
+    for i in range(count):
+        if i % 2:
+            question = rng.choice(QUESTIONS)
+            answer = ' '.join(rng.choice(['donations', 'total', 'category', 'donor', 'amount', 'report'])
+                              for _ in range(rng.randrange(5, 120)))
+            examples.append({'input': f"User: {question}\nAssistant:", 'output': answer})
+        else:
+            donor, category = f"Donor {rng.randrange(5000)}", rng.choice(CATEGORIES)
+            examples.append({
+                'input': f"User: How do I make a donation like {donor}?\nAssistant:",
+                'output': f"You can make a donation similar to {donor}'s {category} donation by following these steps:\n"
+                          f"1. Go to the Donations tab\n2. Fill out the form with your details\n"
+                          f"3. Select the {category} category\n4. Enter your desired amount\n5. Add any notes\n"
+                          f"6. Click 'Submit Donation'"
+            })
+    return examples
+
+
+def per_item(tokenizer, examples, max_length):
+    # What DonationDataset.__getitem__ used to do on every access
+    for example in examples:
+        tokenizer(example['input'], max_length=max_length, padding='max_length', truncation=True, return_tensors='pt')
+        tokenizer(example['output'], max_length=max_length, padding='max_length', truncation=True, return_tensors='pt')
+
+
+def batches(cache, batch_size, grouped, rng):
+    order = np.arange(len(cache))
+    rng.shuffle(order)
+    if grouped:
+        # Roughly what Trainer's group_by_length does: sort within large shuffled chunks
+        chunk = batch_size * 50
+        order = np.concatenate([part[np.argsort(-cache.lengths[part], kind='stable')]
+                                for part in np.array_split(order, max(1, len(order) // chunk))])
+    for start in range(0, len(order), batch_size):
+        yield [{'input_ids': cache[i][0], 'prompt_length': cache[i][1]} for i in order[start:start + batch_size]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--examples', type=int, default=20_000)
+    parser.add_argument('--model', default='microsoft/DialoGPT-small')
+    parser.add_argument('--max-length', type=int, default=512)
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--train-steps', type=int, default=0,
+                        help='also time this many forward/backward steps per padding mode')
+    args = parser.parse_args()
+
+    from transformers import AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    examples = synthetic_examples(args.examples)
+    sample = examples[:min(len(examples), 2000)]
+
+    started = time.perf_counter()
+    per_item(tokenizer, sample, args.max_length)
+    legacy = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as tmp:
+        started = time.perf_counter()
+        cache = TokenCache.build(examples, tokenizer, args.max_length, cache_dir=tmp)
+        cold = time.perf_counter() - started
+        started = time.perf_counter()
+        TokenCache.build(examples, tokenizer, args.max_length, cache_dir=tmp)
+        warm = time.perf_counter() - started
+
+        real = cache.token_count
+        print(f"{len(cache):,} examples, {real:,} tokens, mean length {real / len(cache):.1f}")
+        print(f"per-item, padded to {args.max_length}: {len(sample) / legacy:10,.0f} examples/s "
+              f"(repeated every epoch)")
+        print(f"batched into cache:      {len(cache) / cold:10,.0f} examples/s  {real / cold:12,.0f} tokens/s")
+        print(f"cache hit (hash + mmap): {warm * 1000:10.1f} ms")
+
+        pad_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+        fixed_tokens = len(cache) * args.max_length
+        modes = {}
+        for name, grouped in (('dynamic', False), ('dynamic + grouped', True)):
+            padded = sum(pad_batch(batch, pad_id)['input_ids'].size
+                         for batch in batches(cache, args.batch_size, grouped, np.random.default_rng(0)))
+            modes[name] = grouped
+            print(f"{name:18s} padding: {padded:12,} tokens processed, {real / padded:6.1%} real")
+        print(f"{'fixed ' + str(args.max_length):18s} padding: {fixed_tokens:12,} tokens processed, "
+              f"{real / fixed_tokens:6.1%} real")
+
+        if args.train_steps:
+            import torch
+            from transformers import AutoModelForCausalLM
+
+            model = AutoModelForCausalLM.from_pretrained(args.model)
+            optimizer = torch.optim.AdamW(model.parameters(), lr=1e-5)
+            for name, grouped in [('fixed', None)] + list(modes.items()):
+                steps, tokens, started = 0, 0, time.perf_counter()
+                for batch in batches(cache, args.batch_size, bool(grouped), np.random.default_rng(1)):
+                    padded = pad_batch(batch, pad_id, pad_to_multiple_of=args.max_length if grouped is None else 8)
+                    loss = model(**{key: torch.from_numpy(value) for key, value in padded.items()}).loss
+                    loss.backward()
+                    optimizer.step()
+                    optimizer.zero_grad()
+                    tokens += int(padded['attention_mask'].sum())
+                    steps += 1
+                    if steps == args.train_steps:
+                        break
+                elapsed = time.perf_counter() - started
+                print(f"train {name:18s}: {tokens / elapsed:10,.0f} real tokens/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Wall-clock per training epoch on CPU for each train_model profile.
+
+Needs torch, transformers and peft (and the model download on first run).
+
+Usage: python benchmarks/bench_training.py [--chats 2000] [--epochs 1] [--profiles default cpu]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DonationDatabase
+from model_trainer import TRAINING_PROFILES, EpochTimer, train_model
+from training_corpus import TrainingCorpus
+
+WORDS = ['donation', 'total', 'category', 'donor', 'amount', 'report', 'monthly', 'goal', 'emergency', 'project']
+
+
+def build_database(path, chats):
+    rng = random.Random(3)
+    db = DonationDatabase(path)
+    with db.connection() as conn:
+        conn.executemany(
+            "INSERT INTO chat_history (user_message, bot_response, timestamp) VALUES (?, ?, '2025-01-01 00:00:00')",
+            ((f"question {i}: " + ' '.join(rng.choices(WORDS, k=rng.randrange(3, 20))),
+              ' '.join(rng.choices(WORDS, k=rng.randrange(10, 150))))
+             for i in range(chats))
+        )
+    return db
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--chats', type=int, default=2000, help='synthetic chat_history rows')
+    parser.add_argument('--epochs', type=float, default=1)
+    parser.add_argument('--model', default='microsoft/DialoGPT-small')
+    parser.add_argument('--profiles', nargs='+', choices=sorted(TRAINING_PROFILES), default=['default', 'cpu'])
+    parser.add_argument('--threads', type=int, help='torch intra-op threads')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = build_database(os.path.join(tmp, 'bench.db'), args.chats)
+        corpus = TrainingCorpus(os.path.join(tmp, 'corpus'))
+        # Checkpoints, logs and token caches stay in the scratch directory
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        results = []
+        try:
+            for profile in args.profiles:
+                timer = EpochTimer()
+                started = time.perf_counter()
+                train_model(args.model, os.path.join(tmp, f'model-{profile}'), profile, callbacks=[timer],
+                            db=db, corpus=corpus, epochs=args.epochs, threads=args.threads)
+                results.append((profile, timer.epochs, time.perf_counter() - started))
+        finally:
+            os.chdir(cwd)
+            db.close()
+
+    print(f"{len(corpus):,} examples")
+    for profile, epochs, total in results:
+        per_epoch = ', '.join(f'{seconds:.1f}s' for seconds in epochs)
+        print(f"{profile:8s} per epoch: {per_epoch:30s} total incl. load/save: {total:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+import itertools
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, List
+
+
+class ChatWorker:
+    """Runs chat requests on a background thread so the Tk main loop never blocks.
+
+    Messages are queued and answered in the order they were sent (ChatBot
+    keeps conversation state, so one worker thread by default). The UI
+    collects finished requests by calling poll() from ``root.after``.
+
+    With ``stream=True`` ``respond`` returns an iterable of text chunks
+    (e.g. ChatBot.stream_response); each chunk is reported as a 'partial'
+    result and cancelling stops reading the stream.
+    """
+
+    def __init__(self, respond: Callable[[str], Any],
+                 on_response: Callable[[str, str], None] = None, max_workers: int = 1,
+                 stream: bool = False):
+        self._respond = respond
+        self._on_response = on_response
+        self._stream = stream
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='chat-worker')
+        self._results = queue.Queue()
+        self._futures = {}
+        self._cancelled = set()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Number of requests submitted but not yet returned by poll()."""
+        with self._lock:
+            return len(self._futures)
+
+    def submit(self, message: str) -> int:
+        """Queue a message and return the id its result will carry."""
+        request_id = next(self._ids)
+        with self._lock:
+            self._futures[request_id] = self._executor.submit(self._run, request_id, message)
+        return request_id
+
+    def _run(self, request_id: int, message: str):
+        try:
+            if self._stream:
+                response = self._read_stream(request_id, message)
+            else:
+                response = self._respond(message)
+            status = 'done'
+        except Exception as e:
+            response = str(e)
+            status = 'error'
+        with self._lock:
+            if request_id in self._cancelled:
+                status = 'cancelled'
+        if status == 'done' and self._on_response:
+            try:
+                self._on_response(message, response)
+            except Exception as e:
+                print(f"Error handling chat response: {str(e)}")
+        self._results.put({'id': request_id, 'message': message, 'response': response, 'status': status})
+
+    def _read_stream(self, request_id: int, message: str) -> str:
+        chunks = []
+        stream = self._respond(message)
+        try:
+            for chunk in stream:
+                with self._lock:
+                    if request_id in self._cancelled:
+                        break
+                chunks.append(chunk)
+                self._results.put({'id': request_id, 'message': message, 'response': chunk, 'status': 'partial'})
+        finally:
+            if hasattr(stream, 'close'):
+                stream.close()
+        return "".join(chunks).strip()
+
+    def cancel(self, request_id: int) -> bool:
+        """Cancel a queued request, or discard the answer of one already running."""
+        with self._lock:
+            future = self._futures.get(request_id)
+            if future is None or request_id in self._cancelled:
+                return False
+            self._cancelled.add(request_id)
+            if future.cancel():
+                # Never started, so _run won't report it
+                self._results.put({'id': request_id, 'message': None, 'response': None, 'status': 'cancelled'})
+        return True
+
+    def cancel_all(self) -> int:
+        with self._lock:
+            request_ids = list(self._futures)
+        return sum(self.cancel(request_id) for request_id in request_ids)
+
+    def poll(self) -> List[Dict[str, Any]]:
+        """Return every result that finished since the last call, without blocking."""
+        results = []
+        while True:
+            try:
+                result = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if result['status'] != 'partial':
+                with self._lock:
+                    self._futures.pop(result['id'], None)
+                    self._cancelled.discard(result['id'])
+            results.append(result)
+        return results
+
+    def shutdown(self):
+        self.cancel_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
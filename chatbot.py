@@ -1,34 +1,44 @@
-import google.generativeai as genai
-import sqlite3
 import json
-import os
+import time
 from database import DonationDatabase
-from typing import Dict, Any
-from datetime import datetime
-from dotenv import load_dotenv
+from intent_router import IntentRouter
+from llm_backends import LLMBackend, ResponseCache, create_backend
+from typing import Dict, Any, Iterator
 
 class ChatBot:
-    def __init__(self):
+    def __init__(self, db: DonationDatabase = None, backend: LLMBackend = None,
+                 response_cache: ResponseCache = None, router: IntentRouter = None):
         # Initialize database connection
-        self.db = DonationDatabase()
+        self.db = db or DonationDatabase()
         
-        # Load environment variables
-        load_dotenv()
+        # Model backend: Gemini unless CHATBOT_BACKEND says otherwise
+        # (see llm_backends.py; 'scripted' runs fully offline)
+        self.backend = backend or create_backend()
         
-        # Initialize Gemini model with API key from environment variable
-        api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY environment variable is not set")
-            
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel("gemini-2.0-flash")
+        # Identical questions in the same conversation state are answered from cache
+        self.response_cache = response_cache or ResponseCache(db=self.db)
+        
+        # Totals, recent donations and donor lookups skip the model entirely
+        self.router = router or IntentRouter(self.db)
         
         # Initialize conversation context
         self.conversation_context = []
         self.context_window = 5
+        
+        # Database context is rebuilt only after a write (from any process)
+        # bumps db.data_version
+        self._context_cache = None
+        self._context_cache_version = None
+        self.context_cache_stats = {'hits': 0, 'misses': 0}
     
     def _get_database_context(self) -> str:
         """Get current database context for the model"""
+        version = self.db.data_version
+        if self._context_cache is not None and self._context_cache_version == version:
+            self.context_cache_stats['hits'] += 1
+            return self._context_cache
+        self.context_cache_stats['misses'] += 1
+        
         try:
             total_donations = self.db.get_total_donations()
             recent_donations = self.db.get_recent_donations(5)
@@ -40,6 +50,8 @@ class ChatBot:
             for donation in recent_donations:
                 context += f"- {donation['donor_name']}: ${donation['amount']} ({donation['category']})\n"
             
+            self._context_cache = context
+            self._context_cache_version = version
             return context
         except Exception as e:
             return f"Error getting database context: {str(e)}"
@@ -58,6 +70,45 @@ class ChatBot:
         
         return f"{system_prompt}\n{db_context}\n\nConversation history:\n{conversation_context}\n\nUser: {user_input}"
     
+    def _response_cache_key(self, user_input: str) -> str:
+        # The database context is represented by its version rather than its
+        # text; data_version is stored in the database, so it is safe to persist
+        version = self.db.data_version
+        conversation_context = "\n".join([f"{msg['role']}: {msg['content']}"
+                                        for msg in self.conversation_context[-self.context_window:]])
+        return ResponseCache.make_key(f"{conversation_context}\nUser: {user_input}",
+                                      version, self.backend.name)
+    
+    def _generate(self, user_input: str, prompt: str) -> str:
+        key = self._response_cache_key(user_input)
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            return cached
+        started = time.perf_counter()
+        response_text = self.backend.generate(prompt)
+        self.router.record_llm_latency(time.perf_counter() - started)
+        self._cache_response(key, response_text)
+        return response_text
+    
+    def _stream(self, user_input: str, prompt: str) -> Iterator[str]:
+        key = self._response_cache_key(user_input)
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+        chunks = []
+        started = time.perf_counter()
+        for chunk in self.backend.stream(prompt):
+            chunks.append(chunk)
+            yield chunk
+        self.router.record_llm_latency(time.perf_counter() - started)
+        self._cache_response(key, "".join(chunks))
+    
+    def _cache_response(self, key: str, response_text: str):
+        # Responses that run database commands must reach the model again
+        if response_text and "[DB_COMMAND]" not in response_text:
+            self.response_cache.put(key, response_text)
+    
     def _execute_db_command(self, command: Dict[str, Any]) -> str:
         """Execute database commands"""
         try:
@@ -74,7 +125,7 @@ class ChatBot:
                 )
                 return "Donation added successfully" if success else "Failed to add donation"
             elif action == "update_donation":
-                with sqlite3.connect('donations.db') as conn:
+                with self.db.connection() as conn:
                     cursor = conn.cursor()
                     update_fields = []
                     params = []
@@ -104,6 +155,20 @@ class ChatBot:
                     for donation in donations:
                         response += f"- {donation['donor_name']} donated ${donation['amount']:.2f} for {donation['category']}\n"
                 return response
+            elif action == "get_total":
+                category = command.get("category")
+                total = self.db.get_total_donations(category)
+                if category:
+                    return f"Total donations for {category}: ${total:.2f}"
+                return f"Total donations: ${total:.2f}"
+            elif action == "get_top_donors":
+                donors = self.db.get_top_donors(command.get("limit", 5))
+                if not donors:
+                    return "There are currently no donations in the system."
+                response = "Top donors:\n"
+                for donor in donors:
+                    response += f"- {donor['name']}: ${donor['total_amount']:.2f} ({donor['donation_count']} donations)\n"
+                return response
             elif action == "get_donor_statistics":
                 stats = self.db.get_donor_statistics()
                 response = f"Total number of donors: {stats['total_donors']}\n"
@@ -115,30 +180,19 @@ class ChatBot:
                 return response
             elif action == "get_donor_info":
                 donor_name = command.get("donor_name")
-                with sqlite3.connect('donations.db') as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("""
-                        SELECT dp.*, SUM(d.amount) as total_donated
-                        FROM donor_profiles dp
-                        LEFT JOIN donations d ON dp.name = d.donor_name
-                        WHERE dp.name = ?
-                        GROUP BY dp.id
-                    """, (donor_name,))
-                    donor = cursor.fetchone()
-                    if donor:
-                        return f"Donor found: {donor[1]}, Total donations: ${donor[6]:.2f}"
+                donor = self.db.get_donor(donor_name)
+                if donor is None:
                     return "Donor not found"
+                if donor['donation_count']:
+                    return (f"Donor found: {donor_name}, Total donations: ${donor['total_donations']:.2f} "
+                            f"({donor['donation_count']} donations, most recent on {donor['last_donation_date']})")
+                return f"Donor found: {donor_name}, Total donations: $0.00"
             elif action == "add_donor":
-                with sqlite3.connect('donations.db') as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("""
-                        INSERT INTO donor_profiles (name, email, phone, address)
-                        VALUES (?, ?, ?, ?)
-                    """, (command["donor_name"], command.get("email"), command.get("phone"), command.get("address")))
-                    conn.commit()
-                    return "Donor added successfully"
+                self.db.upsert_donor(command["donor_name"], command.get("email"), command.get("phone"),
+                                     command.get("address"))
+                return "Donor added successfully"
             elif action == "update_donor":
-                with sqlite3.connect('donations.db') as conn:
+                with self.db.connection() as conn:
                     cursor = conn.cursor()
                     update_fields = []
                     params = []
@@ -153,12 +207,19 @@ class ChatBot:
                         return "Donor updated successfully" if cursor.rowcount > 0 else "Donor not found"
                     return "No fields to update"
             elif action == "remove_donor":
-                with sqlite3.connect('donations.db') as conn:
+                with self.db.connection() as conn:
                     cursor = conn.cursor()
-                    cursor.execute("DELETE FROM donor_profiles WHERE name = ?", (command["donor_name"],))
+                    # Donations reference the profile by id, so only donors without any can go
+                    cursor.execute("""
+                        DELETE FROM donor_profiles
+                        WHERE name = ? AND NOT EXISTS (SELECT 1 FROM donations WHERE donor_id = donor_profiles.id)
+                    """, (command["donor_name"],))
                     if cursor.rowcount > 0:
                         conn.commit()
                         return "Donor removed successfully"
+                    cursor.execute("SELECT 1 FROM donor_profiles WHERE name = ?", (command["donor_name"],))
+                    if cursor.fetchone():
+                        return "Donor has donations and cannot be removed"
                     return "Donor not found"
             return "Unknown database command"
         except Exception as e:
@@ -176,16 +237,29 @@ class ChatBot:
         except Exception:
             return None
 
+    def _answer_directly(self, message: str) -> str:
+        """Answer simple lookups from the database without calling the model."""
+        started = time.perf_counter()
+        routed = self.router.route(message)
+        if routed is None:
+            return None
+        intent, command = routed
+        answer = self._execute_db_command(command).strip()
+        self.router.record_hit(intent, time.perf_counter() - started)
+        self._remember(message, answer)
+        return answer
+    
     def get_response(self, message: str) -> str:
         try:
+            answer = self._answer_directly(message)
+            if answer is not None:
+                return answer
+            
             # Format prompt with context
             prompt = self._format_prompt(message)
             
-            # Get response from Gemini
-            response = self.model.generate_content(prompt)
-            
-            # Extract response text and handle potential None
-            response_text = response.text if response and hasattr(response, 'text') else ""
+            # Get response from the model (or the response cache)
+            response_text = self._generate(message, prompt)
             
             if not response_text:
                 return "I apologize, but I couldn't generate a response. Please try again."
@@ -199,16 +273,84 @@ class ChatBot:
                     f"\n{db_result}\n"
                 )
             
-            # Update conversation context
-            self.conversation_context.append({"role": "user", "content": message})
-            self.conversation_context.append({"role": "assistant", "content": response_text})
-            
-            # Trim context if needed
-            if len(self.conversation_context) > self.context_window * 2:
-                self.conversation_context = self.conversation_context[-self.context_window * 2:]
+            self._remember(message, response_text)
             
             return response_text.strip()
             
         except Exception as e:
             print(f"Error in get_response: {str(e)}")
-            return "I apologize, but I'm having trouble processing that. Please try asking about donations, reports, or categories."
\ No newline at end of file
+            return "I apologize, but I'm having trouble processing that. Please try asking about donations, reports, or categories."
+    
+    def stream_response(self, message: str) -> Iterator[str]:
+        """Yield the response text chunk by chunk as the model produces it.
+        
+        [DB_COMMAND] blocks are held back until their closing tag arrives,
+        even when the tags are split across chunks, then executed and
+        replaced by their result.
+        """
+        open_tag, close_tag = "[DB_COMMAND]", "[/DB_COMMAND]"
+        pieces = []
+        buffer = ""
+        in_command = False
+        try:
+            answer = self._answer_directly(message)
+            if answer is not None:
+                yield answer
+                return
+            
+            prompt = self._format_prompt(message)
+            for chunk in self._stream(message, prompt):
+                buffer += chunk
+                waiting = False
+                while not waiting:
+                    if in_command:
+                        end = buffer.find(close_tag)
+                        if end < 0:
+                            break
+                        try:
+                            db_result = self._execute_db_command(json.loads(buffer[:end].strip()))
+                        except ValueError:
+                            db_result = "Could not read database command"
+                        text = f"\n{db_result}\n"
+                        buffer = buffer[end + len(close_tag):]
+                        in_command = False
+                    else:
+                        start = buffer.find(open_tag)
+                        if start >= 0:
+                            text = buffer[:start]
+                            buffer = buffer[start + len(open_tag):]
+                            in_command = True
+                        else:
+                            # Hold back a tail that could be the start of a split tag
+                            keep = next((n for n in range(len(open_tag) - 1, 0, -1)
+                                         if buffer.endswith(open_tag[:n])), 0)
+                            text = buffer[:len(buffer) - keep]
+                            buffer = buffer[len(buffer) - keep:]
+                            waiting = True
+                    if text:
+                        pieces.append(text)
+                        yield text
+            
+            # An unterminated command is passed through untouched, as get_response does
+            tail = (open_tag + buffer) if in_command else buffer
+            if tail:
+                pieces.append(tail)
+                yield tail
+            
+            if not "".join(pieces).strip():
+                yield "I apologize, but I couldn't generate a response. Please try again."
+                return
+            self._remember(message, "".join(pieces))
+            
+        except Exception as e:
+            print(f"Error in stream_response: {str(e)}")
+            yield "I apologize, but I'm having trouble processing that. Please try asking about donations, reports, or categories."
+    
+    def _remember(self, message: str, response_text: str):
+        """Add a finished exchange to the conversation context."""
+        self.conversation_context.append({"role": "user", "content": message})
+        self.conversation_context.append({"role": "assistant", "content": response_text})
+        
+        # Trim context if needed
+        if len(self.conversation_context) > self.context_window * 2:
+            self.conversation_context = self.conversation_context[-self.context_window * 2:]
\ No newline at end of file
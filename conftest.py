@@ -0,0 +1,45 @@
+import os
+import socket
+
+import pytest
+from dotenv import dotenv_values
+
+from database import DonationDatabase
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A fresh database in its own file; modules that need rows override it as ``db(db)``."""
+    database = DonationDatabase(str(tmp_path / 'donations.db'), pool_size=2, checkout_timeout=0.2)
+    yield database
+    database.close()
+
+
+# Tests marked ``network`` build ChatBot() with the configured backend and
+# talk to it for real. Gemini can't be reached offline and would hang the
+# run, so they are skipped unless CHATBOT_BACKEND picks a backend that
+# works here (e.g. 'scripted') or the Gemini API answers.
+GEMINI_HOST = ('generativelanguage.googleapis.com', 443)
+
+
+def _backend_reachable() -> bool:
+    backend = os.getenv('CHATBOT_BACKEND') or dotenv_values().get('CHATBOT_BACKEND') or 'gemini'
+    if backend.lower() != 'gemini':
+        return True
+    try:
+        socket.create_connection(GEMINI_HOST, timeout=3).close()
+        return True
+    except OSError:
+        return False
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'network: talks to the live chatbot backend')
+
+
+def pytest_collection_modifyitems(config, items):
+    network = [item for item in items if 'network' in item.keywords]
+    if network and not _backend_reachable():
+        skip = pytest.mark.skip(reason="Gemini API unreachable; set CHATBOT_BACKEND=scripted to run offline")
+        for item in network:
+            item.add_marker(skip)
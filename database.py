@@ -1,94 +1,344 @@
-import os
+import math
+import re
 import sqlite3
 import threading
-from queue import Queue
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from queue import Queue, Empty
 from typing import List, Dict, Any
 
+import goals
+import rollups
+from migrations import migrate
+
 class DonationDatabase:
-    _instance = None
+    _instances = {}
     _lock = threading.Lock()
-    _connection_pool = Queue(maxsize=5)
     
-    def __new__(cls):
-        if cls._instance is None:
+    # Applied to every pooled connection; override per instance via ``pragmas``
+    DEFAULT_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -20000,       # negative = KiB, so ~20 MB of page cache
+        'mmap_size': 268435456,     # 256 MB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    }
+    
+    def __new__(cls, db_path: str = 'donations.db', pool_size: int = 5,
+                pragmas: Dict[str, Any] = None, checkout_timeout: float = 10.0):
+        # One instance (and one pool) per database file
+        instance = cls._instances.get(db_path)
+        created = False
+        if instance is None:
             with cls._lock:
-                if cls._instance is None:
-                    cls._instance = super(DonationDatabase, cls).__new__(cls)
-                    cls._instance._initialize_pool()
-        return cls._instance
+                instance = cls._instances.get(db_path)
+                if instance is None:
+                    instance = super(DonationDatabase, cls).__new__(cls)
+                    instance.db_path = db_path
+                    instance.pool_size = pool_size
+                    instance.checkout_timeout = checkout_timeout
+                    instance.pragmas = {**cls.DEFAULT_PRAGMAS, **(pragmas or {})}
+                    instance._ready = threading.Event()
+                    instance._bootstrap_error = None
+                    instance._initialize_pool()
+                    cls._instances[db_path] = instance
+                    created = True
+        # Only the first constructor migrates (outside the class lock, so
+        # other databases aren't held up); the rest wait for it to finish
+        if created:
+            instance._bootstrap()
+        instance.wait_ready()
+        return instance
+    
+    def __init__(self, db_path: str = 'donations.db', pool_size: int = 5,
+                 pragmas: Dict[str, Any] = None, checkout_timeout: float = 10.0):
+        # Pool, settings and schema are set up once per database in __new__
+        pass
+    
+    def _create_connection(self) -> sqlite3.Connection:
+        """Open a new connection and apply the configured PRAGMAs."""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
     
     def _initialize_pool(self):
-        for _ in range(5):
-            conn = sqlite3.connect('donations.db', check_same_thread=False)
-            self._connection_pool.put(conn)
+        self._connection_pool = Queue(maxsize=self.pool_size)
+        for _ in range(self.pool_size):
+            self._connection_pool.put(self._create_connection())
     
-    def get_connection(self):
-        return self._connection_pool.get()
+    @staticmethod
+    def _is_healthy(conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+    
+    def get_connection(self, timeout: float = None) -> sqlite3.Connection:
+        """Check a connection out of the pool, replacing it if it has gone bad."""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        try:
+            conn = self._connection_pool.get(timeout=timeout)
+        except Empty:
+            raise TimeoutError(f"No database connection available after {timeout}s")
+        if not self._is_healthy(conn):
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+            try:
+                conn = self._create_connection()
+            except Exception:
+                self._connection_pool.put(conn)
+                raise
+        return conn
     
     def release_connection(self, conn):
+        # Never hand the next caller a half-finished transaction
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            pass  # closed or broken; replaced on next checkout
         self._connection_pool.put(conn)
     
-    def _initialize_database(self):
-        conn = self.get_connection()
+    @contextmanager
+    def connection(self, timeout: float = None):
+        """Borrow a pooled connection for the duration of a ``with`` block.
+        
+        Like ``with sqlite3.connect(...) as conn`` the transaction is committed
+        when the block exits cleanly and rolled back if it raises.
+        """
+        conn = self.get_connection(timeout)
         try:
-            cursor = conn.cursor()
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS donations (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    donor_name TEXT NOT NULL,
-                    amount REAL NOT NULL,
-                    category TEXT NOT NULL,
-                    notes TEXT,
-                    date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    is_recurring BOOLEAN DEFAULT 0,
-                    recurring_interval TEXT,
-                    next_donation_date TEXT
-                )
-            """)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS categories (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT UNIQUE NOT NULL
-                )
-            """)
-            default_categories = ['General', 'Project', 'Emergency', 'Other']
-            for category in default_categories:
-                cursor.execute(
-                    "INSERT OR IGNORE INTO categories (name) VALUES (?)",
-                    (category,)
-                )
-            conn.commit()
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
         finally:
             self.release_connection(conn)
     
-    def add_donation(self, donor_name: str, amount: float, category: str, notes: str = None) -> bool:
+    def close(self):
+        """Close every pooled connection and forget this instance."""
+        with self._lock:
+            self._instances.pop(self.db_path, None)
+        while True:
+            try:
+                self._connection_pool.get_nowait().close()
+            except Empty:
+                break
+    
+    @property
+    def data_version(self) -> int:
+        """Counter bumped on every write to donations, categories, donors or goals.
+        
+        It lives in the data_changes table and is kept by triggers (see
+        migrations.py), so writes from other processes count too and caches
+        keyed on it survive restarts.
+        """
+        with self.connection() as conn:
+            return conn.execute("SELECT version FROM data_changes WHERE id = 1").fetchone()[0]
+    
+    def mark_changed(self):
+        """Bump data_version for a write the triggers don't see."""
+        with self.connection() as conn:
+            conn.execute("UPDATE data_changes SET version = version + 1 WHERE id = 1")
+    
+    def _bootstrap(self):
+        # Creates a fresh database or upgrades an existing one in place, once
+        # per process; a failed attempt is forgotten so the next constructor retries
+        try:
+            with self.connection() as conn:
+                migrate(conn)
+        except Exception as e:
+            self._bootstrap_error = e
+            self.close()
+        finally:
+            self._ready.set()
+    
+    @property
+    def ready(self) -> bool:
+        """True once the schema bootstrap has finished successfully."""
+        return self._ready.is_set() and self._bootstrap_error is None
+    
+    def wait_ready(self, timeout: float = None):
+        """Block until the schema is in place; raises if the bootstrap failed."""
+        if not self._ready.wait(timeout):
+            raise TimeoutError(f"Database schema not ready after {timeout}s")
+        if self._bootstrap_error is not None:
+            raise RuntimeError(f"Could not prepare database {self.db_path}: "
+                               f"{str(self._bootstrap_error)}") from self._bootstrap_error
+    
+    def add_donation(self, donor_name: str, amount: float, category: str, notes: str = None,
+                     date: str = None, is_recurring: bool = False, recurring_interval: str = None,
+                     next_donation_date: str = None) -> bool:
         """Add a new donation to the database."""
+        date = date or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
-                    "INSERT INTO donations (donor_name, amount, category, notes) VALUES (?, ?, ?, ?)",
-                    (donor_name, amount, category, notes)
+                    """
+                    INSERT INTO donations (donor_name, amount, category, date, notes,
+                                           is_recurring, recurring_interval, next_donation_date)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (donor_name, amount, category, date, notes,
+                     is_recurring, recurring_interval, next_donation_date)
                 )
-                return True
+            return True
         except Exception as e:
             print(f"Error adding donation: {str(e)}")
             return False
     
+    # Slash dates are month first unless the caller says the file is day first;
+    # guessing per row would read one file's dates in two different orders
+    DATE_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d',
+                    '%m/%d/%Y %H:%M:%S', '%m/%d/%Y %H:%M', '%m/%d/%Y')
+    DAY_FIRST_DATE_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d',
+                              '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d/%m/%Y')
+    
+    def _validate_donation_row(self, row: Dict[str, Any], now: str, day_first: bool = False) -> tuple:
+        """Turn one input row into INSERT parameters, raising ValueError if it is unusable."""
+        donor_name = str(row.get('donor_name') or '').strip()
+        if not donor_name:
+            raise ValueError("missing donor name")
+        try:
+            amount = float(str(row.get('amount')).replace('$', '').replace(',', ''))
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid amount {row.get('amount')!r}")
+        if not math.isfinite(amount) or amount <= 0:
+            raise ValueError(f"amount must be positive, got {amount}")
+        category = str(row.get('category') or '').strip()
+        if not category:
+            raise ValueError("missing category")
+        
+        date = row.get('date')
+        if isinstance(date, datetime):
+            date = date.strftime('%Y-%m-%d %H:%M:%S')
+        elif date:
+            text = str(date).strip()
+            for fmt in (self.DAY_FIRST_DATE_FORMATS if day_first else self.DATE_FORMATS):
+                try:
+                    date = datetime.strptime(text, fmt).strftime('%Y-%m-%d %H:%M:%S')
+                    break
+                except ValueError:
+                    continue
+            else:
+                raise ValueError(f"unrecognised date {text!r}")
+        else:
+            date = now
+        
+        is_recurring = str(row.get('is_recurring') or '').strip().lower() in ('1', 'true', 'yes', 'y')
+        return (donor_name, amount, category, date, row.get('notes') or None,
+                is_recurring, row.get('recurring_interval') or None, row.get('next_donation_date') or None)
+    
+    # The insert triggers (see migrations.py) create the profile and keep its
+    # totals; this fills in contact details, keeping stored ones that aren't given
+    DONOR_UPSERT = """
+        INSERT INTO donor_profiles (name, email, phone, address, preferred_category)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(name) DO UPDATE SET
+            email = COALESCE(excluded.email, email),
+            phone = COALESCE(excluded.phone, phone),
+            address = COALESCE(excluded.address, address),
+            preferred_category = COALESCE(excluded.preferred_category, preferred_category)
+    """
+    
+    def add_donations_bulk(self, rows, chunk_size: int = 5000, upsert_donors: bool = False,
+                           progress=None, day_first: bool = False) -> Dict[str, Any]:
+        """Insert many donations with executemany, one transaction per chunk.
+        
+        ``rows`` is any iterable of dicts using the donations column names
+        (plus email/phone/address when ``upsert_donors`` is set). Invalid
+        rows are skipped and reported as ``(row_number, message)`` in
+        ``errors`` instead of aborting the import; a row's number is its
+        ``'_row'`` value if it has one (e.g. its spreadsheet row), otherwise
+        its position counting from 1. ``day_first`` reads slash dates as
+        dd/mm/yyyy. ``progress`` is called with the running totals after
+        each chunk.
+        """
+        result = {'inserted': 0, 'errors': [], 'seconds': 0.0}
+        started = time.perf_counter()
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        batch, profiles, row_numbers = [], [], []
+        
+        def insert(cursor, donations, donors):
+            cursor.executemany("""
+                INSERT INTO donations (donor_name, amount, category, date, notes,
+                                       is_recurring, recurring_interval, next_donation_date)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, donations)
+            cursor.executemany(
+                "INSERT OR IGNORE INTO categories (name) VALUES (?)",
+                {(params[2],) for params in donations}
+            )
+            if donors:
+                cursor.executemany(self.DONOR_UPSERT, donors)
+        
+        def flush():
+            try:
+                with self.connection() as conn:
+                    insert(conn.cursor(), batch, profiles)
+                result['inserted'] += len(batch)
+            except sqlite3.Error:
+                # Something validation didn't catch; find the offending rows
+                # one at a time so the rest of the chunk still goes in
+                for index, (params, row_number) in enumerate(zip(batch, row_numbers)):
+                    donors = [profiles[index]] if profiles else []
+                    try:
+                        with self.connection() as conn:
+                            insert(conn.cursor(), [params], donors)
+                        result['inserted'] += 1
+                    except sqlite3.Error as e:
+                        result['errors'].append((row_number, str(e)))
+            result['seconds'] = time.perf_counter() - started
+            batch.clear()
+            profiles.clear()
+            row_numbers.clear()
+            if progress:
+                progress(result)
+        
+        for position, row in enumerate(rows, start=1):
+            row_number = row.get('_row', position)
+            try:
+                params = self._validate_donation_row(row, now, day_first)
+            except ValueError as e:
+                result['errors'].append((row_number, str(e)))
+                continue
+            batch.append(params)
+            row_numbers.append(row_number)
+            if upsert_donors:
+                profiles.append((params[0], row.get('email') or None, row.get('phone') or None,
+                                 row.get('address') or None, params[2]))
+            if len(batch) >= chunk_size:
+                flush()
+        if batch:
+            flush()
+        
+        result['seconds'] = time.perf_counter() - started
+        return result
+    
     def get_total_donations(self, category: str = None) -> float:
         """Get total donations, optionally filtered by category."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connection() as conn:
                 cursor = conn.cursor()
                 if category:
                     cursor.execute(
-                        "SELECT SUM(amount) FROM donations WHERE category = ?",
+                        "SELECT total_amount FROM category_totals WHERE category = ?",
                         (category,)
                     )
                 else:
-                    cursor.execute("SELECT SUM(amount) FROM donations")
-                result = cursor.fetchone()[0]
-                return float(result) if result else 0.0
+                    cursor.execute("SELECT SUM(total_amount) FROM category_totals")
+                row = cursor.fetchone()
+                return float(row[0]) if row and row[0] else 0.0
         except Exception as e:
             print(f"Error getting total donations: {str(e)}")
             return 0.0
@@ -96,9 +346,9 @@ class DonationDatabase:
     def get_recent_donations(self, limit: int = 5) -> List[Dict[str, Any]]:
         """Get recent donations with specified limit."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self.connection() as conn:
                 cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row
                 cursor.execute(
                     "SELECT * FROM donations ORDER BY date DESC LIMIT ?",
                     (limit,)
@@ -108,19 +358,160 @@ class DonationDatabase:
             print(f"Error getting recent donations: {str(e)}")
             return []
     
+    def get_donations_page(self, after: tuple = None, before: tuple = None,
+                           limit: int = 200) -> List[tuple]:
+        """Keyset page of donations, newest first, ordered by ``(date, id)``.
+        
+        ``after`` is the ``(date, id)`` of the last row already shown and
+        returns the next older rows; ``before`` is the key of the first row
+        shown and returns the newer rows just above it. Rows are
+        ``(id, donor_name, amount, category, date, notes)``. Both directions
+        walk idx_donations_date (which carries the rowid), so a page costs the
+        same at row one million as at row one.
+        """
+        columns = "id, donor_name, amount, category, date, notes"
+        with self.connection() as conn:
+            if before is not None:
+                rows = conn.execute(f"""
+                    SELECT {columns} FROM donations
+                    WHERE (date, id) > (?, ?)
+                    ORDER BY date, id
+                    LIMIT ?
+                """, (*before, limit)).fetchall()
+                rows.reverse()
+                return rows
+            if after is not None:
+                return conn.execute(f"""
+                    SELECT {columns} FROM donations
+                    WHERE (date, id) < (?, ?)
+                    ORDER BY date DESC, id DESC
+                    LIMIT ?
+                """, (*after, limit)).fetchall()
+            return conn.execute(f"""
+                SELECT {columns} FROM donations
+                ORDER BY date DESC, id DESC
+                LIMIT ?
+            """, (limit,)).fetchall()
+    
+    def delete_donations(self, ids, chunk_size: int = 500) -> List[Dict[str, Any]]:
+        """Delete donations by id in one transaction and return the deleted rows.
+    
+        Ids go through ``DELETE ... WHERE id IN (...)`` in chunks of
+        ``chunk_size`` to stay under SQLite's bound-parameter limit. The
+        returned rows can be passed to restore_donations() to undo.
+        """
+        ids = list(dict.fromkeys(int(donation_id) for donation_id in ids))
+        deleted = []
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            for start in range(0, len(ids), chunk_size):
+                chunk = ids[start:start + chunk_size]
+                placeholders = ','.join('?' * len(chunk))
+                cursor.execute(f"SELECT * FROM donations WHERE id IN ({placeholders})", chunk)
+                deleted.extend(dict(row) for row in cursor.fetchall())
+                cursor.execute(f"DELETE FROM donations WHERE id IN ({placeholders})", chunk)
+        return deleted
+    
+    def restore_donations(self, rows: List[Dict[str, Any]]) -> int:
+        """Re-insert rows returned by delete_donations(), keeping their ids."""
+        if not rows:
+            return 0
+        columns = list(rows[0])
+        with self.connection() as conn:
+            conn.executemany(
+                f"INSERT INTO donations ({', '.join(columns)}) VALUES ({', '.join(':' + c for c in columns)})",
+                rows
+            )
+        return len(rows)
+    
     def get_category_breakdown(self) -> Dict[str, float]:
         """Get donation totals broken down by category."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
-                    "SELECT category, SUM(amount) FROM donations GROUP BY category"
+                    "SELECT category, total_amount FROM category_totals ORDER BY category"
                 )
                 return {category: float(amount) for category, amount in cursor.fetchall()}
         except Exception as e:
             print(f"Error getting category breakdown: {str(e)}")
             return {}
     
+    def rebuild_rollups(self):
+        """Recompute the rollup tables from the donations table."""
+        with self.connection() as conn:
+            rollups.rebuild(conn)
+            rollups.rebuild_donor_profiles(conn)
+        self.mark_changed()
+    
+    def check_rollups(self) -> List[str]:
+        """Return a description of every rollup row that disagrees with a full recompute."""
+        with self.connection() as conn:
+            return rollups.check(conn)
+    
+    def add_goal(self, category: str, target_amount: float, start_date: str,
+                 end_date: str = None) -> int:
+        """Create an active goal, counting the donations already in its window."""
+        if target_amount <= 0:
+            raise ValueError("Goal target must be positive")
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO donation_goals (category, target_amount, current_amount, start_date, end_date, status)
+                VALUES (?, ?, 0, ?, ?, 'active')
+            """, (category, target_amount, start_date, end_date))
+            goal_id = cursor.lastrowid
+            # Later donations are added by the goal triggers
+            cursor.execute(f"""
+                UPDATE donation_goals
+                SET current_amount = (
+                    SELECT COALESCE(SUM(donations.amount), 0) FROM donations
+                    WHERE {goals.in_window('donations')}
+                )
+                WHERE id = ?
+            """, (goal_id,))
+        return goal_id
+    
+    def set_goal_status(self, goal_id: int, status: str):
+        """Close ('completed', 'cancelled') or reopen ('active') a goal."""
+        with self.connection() as conn:
+            conn.execute("UPDATE donation_goals SET status = ? WHERE id = ?", (status, goal_id))
+            if status == 'active':
+                # Donations made while it was closed weren't counted
+                goals.reconcile(conn)
+    
+    def get_goal_progress(self, include_closed: bool = False) -> List[Dict[str, Any]]:
+        """Every goal with its progress; reads donation_goals only, never donations."""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row
+                cursor.execute(f"""
+                    SELECT id, category, target_amount, COALESCE(current_amount, 0) AS current_amount,
+                           start_date, end_date, status,
+                           MIN(COALESCE(current_amount, 0) / target_amount, 1.0) AS progress
+                    FROM donation_goals
+                    {'' if include_closed else "WHERE status = 'active'"}
+                    ORDER BY status = 'active' DESC, start_date DESC, id DESC
+                """)
+                return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"Error getting goal progress: {str(e)}")
+            return []
+    
+    def reconcile_goals(self) -> int:
+        """Recompute active goals from the donations table; returns how many were off."""
+        with self.connection() as conn:
+            changed = goals.reconcile(conn)
+        if changed:
+            self.mark_changed()
+        return changed
+    
+    def check_goals(self) -> List[str]:
+        with self.connection() as conn:
+            return goals.check(conn)
+    
     def process_nlp_query(self, query: str) -> Dict[str, Any]:
         """Process natural language queries about donations."""
         query = query.lower()
@@ -167,32 +558,89 @@ class DonationDatabase:
     def get_donor_names(self) -> List[str]:
         """Get a list of all unique donor names from the database."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("SELECT DISTINCT donor_name FROM donations ORDER BY donor_name")
+                cursor.execute("SELECT donor_name FROM donor_totals ORDER BY donor_name")
                 return [row[0] for row in cursor.fetchall()]
         except Exception as e:
             print(f"Error getting donor names: {str(e)}")
             return []
             
+    def find_donor_name(self, name: str) -> str:
+        """The stored spelling of a donor with donations, matched case-insensitively, or None."""
+        try:
+            with self.connection() as conn:
+                row = conn.execute(
+                    "SELECT donor_name FROM donor_totals WHERE lower(donor_name) = lower(?) LIMIT 1", (name,)
+                ).fetchone()
+                return row[0] if row else None
+        except Exception as e:
+            print(f"Error finding donor: {str(e)}")
+            return None
+    
+    def upsert_donor(self, name: str, email: str = None, phone: str = None, address: str = None,
+                     preferred_category: str = None) -> int:
+        """Create the donor's profile or update the details given, and return its id."""
+        with self.connection() as conn:
+            conn.execute(self.DONOR_UPSERT, (name, email, phone, address, preferred_category))
+            donor_id = conn.execute("SELECT id FROM donor_profiles WHERE name = ?", (name,)).fetchone()[0]
+        return donor_id
+    
+    def get_donor(self, name: str) -> Dict[str, Any]:
+        """Get a donor's profile with their donation count, or None if there is no such donor."""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row
+                # Counted over idx_donations_donor_id_date by integer id
+                cursor.execute("""
+                    SELECT p.*, (SELECT COUNT(*) FROM donations d WHERE d.donor_id = p.id) AS donation_count
+                    FROM donor_profiles p
+                    WHERE p.name = ?
+                """, (name,))
+                row = cursor.fetchone()
+                return dict(row) if row else None
+        except Exception as e:
+            print(f"Error getting donor: {str(e)}")
+            return None
+    
+    def get_top_donors(self, limit: int = 5) -> List[Dict[str, Any]]:
+        """Get the donors with the highest total donations."""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT donor_name, donation_count, total_amount
+                    FROM donor_totals
+                    ORDER BY total_amount DESC
+                    LIMIT ?
+                """, (limit,))
+                return [{
+                    'name': row[0],
+                    'donation_count': row[1],
+                    'total_amount': row[2]
+                } for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"Error getting top donors: {str(e)}")
+            return []
+    
     def get_donor_statistics(self) -> Dict[str, Any]:
         """Get comprehensive donor statistics."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connection() as conn:
                 cursor = conn.cursor()
                 # Get total number of unique donors
-                cursor.execute("SELECT COUNT(DISTINCT donor_name) FROM donations")
+                cursor.execute("SELECT COUNT(*) FROM donor_totals")
                 total_donors = cursor.fetchone()[0]
                 
                 # Get average donation amount
-                cursor.execute("SELECT AVG(amount) FROM donations")
+                cursor.execute("SELECT SUM(total_amount) / SUM(donation_count) FROM category_totals")
                 avg_donation = cursor.fetchone()[0] or 0.0
                 
                 # Get donor frequency
                 cursor.execute("""
-                    SELECT donor_name, COUNT(*) as donation_count, SUM(amount) as total_amount
-                    FROM donations
-                    GROUP BY donor_name
+                    SELECT donor_name, donation_count, total_amount
+                    FROM donor_totals
                     ORDER BY total_amount DESC
                     LIMIT 5
                 """)
@@ -255,15 +703,10 @@ class DonationDatabase:
             } if success else None
         }
     
-    def __init__(self):
-        self.db_path = 'donations.db'
-        if not os.path.exists(self.db_path):
-            self._initialize_database()
-
     def get_categories(self) -> List[str]:
         """Get all available donation categories."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT name FROM categories ORDER BY name")
                 return [row[0] for row in cursor.fetchall()]
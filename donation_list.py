@@ -0,0 +1,224 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+# The Donations tab shows a sliding window of a few keyset pages (see
+# DonationDatabase.get_donations_page) instead of the whole table. Scrolling
+# near either edge of the window loads the adjacent page and drops the one
+# furthest away, so memory and Treeview size stay bounded at any depth.
+
+
+def row_key(row: tuple) -> Tuple[str, int]:
+    """The ``(date, id)`` keyset position of a page row."""
+    return row[4], row[0]
+
+
+class DonationPager:
+    """Fetches keyset pages on a background thread and keeps the next ones ready.
+
+    ``request(direction, row)`` returns a Future for the page older ('after')
+    or newer ('before') than ``row``; ``prefetch`` starts the same fetch
+    early so the Future is usually finished by the time it is requested.
+    """
+
+    def __init__(self, db, page_size: int = 200):
+        self.db = db
+        self.page_size = page_size
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='donation-pager')
+        self._pending: Dict[tuple, Future] = {}
+        self._lock = threading.Lock()
+
+    def _fetch(self, direction: Optional[str], key) -> List[tuple]:
+        if direction == 'after':
+            return self.db.get_donations_page(after=key, limit=self.page_size)
+        if direction == 'before':
+            return self.db.get_donations_page(before=key, limit=self.page_size)
+        return self.db.get_donations_page(limit=self.page_size)
+
+    def request(self, direction: Optional[str] = None, row: tuple = None) -> Future:
+        key = row_key(row) if row is not None else None
+        with self._lock:
+            future = self._pending.pop((direction, key), None)
+            if future is None or future.cancelled():
+                future = self._executor.submit(self._fetch, direction, key)
+            return future
+
+    def prefetch(self, direction: str, row: tuple):
+        key = row_key(row)
+        with self._lock:
+            if (direction, key) not in self._pending:
+                # Only the pages next to the window are worth keeping
+                for stale in [k for k in self._pending if k[0] == direction]:
+                    self._pending.pop(stale).cancel()
+                self._pending[(direction, key)] = self._executor.submit(self._fetch, direction, key)
+
+    def invalidate(self):
+        """Forget prefetched pages, e.g. after rows were deleted."""
+        with self._lock:
+            for future in self._pending.values():
+                future.cancel()
+            self._pending.clear()
+
+    def shutdown(self):
+        self.invalidate()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class DonationListView:
+    """Drives a ttk.Treeview as a virtual list over every donation.
+
+    Items use the donation id as their iid. At most ``max_pages`` pages are
+    in the tree at once; ``format_row`` turns a page row into the values
+    shown in the columns.
+    """
+
+    EDGE = 0.1  # load more once the view is this close to the window's edge
+
+    def __init__(self, tree, scrollbar, pager: DonationPager, max_pages: int = 3,
+                 format_row: Callable[[tuple], tuple] = None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.pager = pager
+        self.max_pages = max_pages
+        self.format_row = format_row or (lambda row: row[1:])
+        self._rows: Dict[str, tuple] = {}
+        self._at_start = True
+        self._at_end = False
+        self._loading = None
+        self._generation = 0  # bumped by reload(); older loads are dropped
+        self.tree.configure(yscrollcommand=self._on_scroll)
+
+    @property
+    def capacity(self) -> int:
+        return self.pager.page_size * self.max_pages
+
+    def reload(self):
+        """Drop the window and show the newest page again."""
+        self._generation += 1
+        if self._loading is not None:
+            self._loading.cancel()
+            self._loading = None
+        self.pager.invalidate()
+        self.tree.delete(*self.tree.get_children())
+        self._rows.clear()
+        self._at_start = True
+        self._at_end = False
+        self._load(None)
+
+    def row(self, iid: str) -> Optional[tuple]:
+        return self._rows.get(iid)
+
+    def insert_donation(self, row: tuple):
+        """Show a just-recorded donation without redrawing the list."""
+        self.insert_rows([row])
+
+    def insert_rows(self, rows: List[tuple]):
+        """Insert rows that belong inside the loaded window, in (date, id) order.
+
+        Rows outside the window are skipped; they show up when the user
+        scrolls to them.
+        """
+        children = list(self.tree.get_children())
+        keys = [row_key(self._rows[iid]) for iid in children]
+        for row in sorted(rows, key=row_key, reverse=True):
+            iid = str(row[0])
+            key = row_key(row)
+            if iid in self._rows:
+                continue
+            if keys and not (self._at_start or key < keys[0]):
+                continue
+            if keys and not (self._at_end or key > keys[-1]):
+                continue
+            index = 0
+            while index < len(keys) and keys[index] > key:
+                index += 1
+            self._rows[iid] = row
+            self.tree.insert('', index, iid=iid, values=self.format_row(row))
+            children.insert(index, iid)
+            keys.insert(index, key)
+        self._trim('end')
+
+    def remove(self, iids):
+        for iid in iids:
+            if self.tree.exists(iid):
+                self.tree.delete(iid)
+            self._rows.pop(iid, None)
+        self.pager.invalidate()
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self._loading or not self._rows:
+            return
+        first, last = float(first), float(last)
+        children = self.tree.get_children()
+        if last >= 1 - self.EDGE and not self._at_end:
+            self._load('after', self._rows[children[-1]])
+        elif first <= self.EDGE and not self._at_start:
+            self._load('before', self._rows[children[0]])
+
+    def _load(self, direction, row=None):
+        self._loading = future = self.pager.request(direction, row)
+        self._wait(direction, future, self._generation)
+
+    def _wait(self, direction, future, generation):
+        if generation != self._generation:
+            return  # the list was reloaded while this page was loading
+        # Never block the Tk main loop on the database
+        if not future.done():
+            self.tree.after(20, self._wait, direction, future, generation)
+            return
+        self._loading = None
+        if future.cancelled():
+            return
+        try:
+            rows = future.result()
+        except Exception as e:
+            print(f"Error loading donations: {str(e)}")
+            return
+        self._apply(direction, rows)
+
+    def _apply(self, direction, rows):
+        children = self.tree.get_children()
+        top = self.tree.identify_row(1) or (children[0] if children else None)
+        if direction == 'before':
+            for position, row in enumerate(rows):
+                iid = str(row[0])
+                if iid not in self._rows:
+                    self._rows[iid] = row
+                    self.tree.insert('', position, iid=iid, values=self.format_row(row))
+            self._at_start = len(rows) < self.pager.page_size
+            self._trim('end')
+        else:
+            for row in rows:
+                iid = str(row[0])
+                if iid not in self._rows:
+                    self._rows[iid] = row
+                    self.tree.insert('', 'end', iid=iid, values=self.format_row(row))
+            self._at_end = len(rows) < self.pager.page_size
+            self._trim('start')
+
+        # Keep the row the user was looking at in place
+        if top and self.tree.exists(top):
+            children = self.tree.get_children()
+            self.tree.yview_moveto(self.tree.index(top) / max(len(children), 1))
+
+        children = self.tree.get_children()
+        if children:
+            if not self._at_end:
+                self.pager.prefetch('after', self._rows[children[-1]])
+            if not self._at_start:
+                self.pager.prefetch('before', self._rows[children[0]])
+
+    def _trim(self, side):
+        children = self.tree.get_children()
+        excess = len(children) - self.capacity
+        if excess <= 0:
+            return
+        dropped = children[:excess] if side == 'start' else children[-excess:]
+        self.tree.delete(*dropped)
+        for iid in dropped:
+            self._rows.pop(iid, None)
+        if side == 'start':
+            self._at_start = False
+        else:
+            self._at_end = False
@@ -0,0 +1,259 @@
+import csv
+import os
+from datetime import datetime
+from typing import Callable, Dict, Any
+
+from database import DonationDatabase
+from report_filter import ReportFilter
+
+# Exports read the donations table in cursor batches and write each batch
+# straight out, so memory stays flat however many rows there are. The
+# summary sheets come from the rollup tables (see rollups.py) rather than a
+# groupby over every row. A filtered export (see report_filter.py) can't use
+# the rollups, so its summaries are grouped over the same indexed range.
+
+DONATION_COLUMNS = ['Donor Name', 'Amount', 'Category', 'Date', 'Notes']
+DONATION_QUERY = """
+    SELECT donor_name, amount, category, date, notes
+    FROM donations
+    WHERE {where}
+    ORDER BY date DESC
+"""
+FORMATS = ('xlsx', 'csv', 'parquet')
+TOP_DONORS = 10
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def default_filename(fmt: str = 'xlsx') -> str:
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return f'donation_report_{timestamp}.{fmt}'
+
+
+def _read_aggregates(conn) -> Dict[str, Any]:
+    cursor = conn.cursor()
+    count, total = cursor.execute(
+        "SELECT COALESCE(SUM(donation_count), 0), COALESCE(SUM(total_amount), 0) FROM category_totals"
+    ).fetchone()
+    categories = cursor.execute(
+        "SELECT category, donation_count, ROUND(total_amount, 2) FROM category_totals ORDER BY category"
+    ).fetchall()
+    monthly = cursor.execute("""
+        SELECT month, SUM(donation_count), ROUND(SUM(total_amount), 2)
+        FROM monthly_category_totals
+        GROUP BY month
+        ORDER BY month
+    """).fetchall()
+    donors = cursor.execute(
+        "SELECT donor_name, ROUND(total_amount, 2) FROM donor_totals ORDER BY total_amount DESC LIMIT ?",
+        (TOP_DONORS,)
+    ).fetchall()
+    return {'count': count, 'total': total, 'categories': categories, 'monthly': monthly, 'donors': donors}
+
+
+def _read_filtered_aggregates(conn, report_filter: ReportFilter) -> Dict[str, Any]:
+    where, params = report_filter.where()
+    cursor = conn.cursor()
+    count, total = cursor.execute(
+        f"SELECT COUNT(*), COALESCE(SUM(amount), 0) FROM donations WHERE {where}", params
+    ).fetchone()
+    categories = cursor.execute(f"""
+        SELECT category, COUNT(*), ROUND(SUM(amount), 2)
+        FROM donations
+        WHERE {where}
+        GROUP BY category
+        ORDER BY category
+    """, params).fetchall()
+    monthly = cursor.execute(f"""
+        SELECT substr(date, 1, 7) AS month, COUNT(*), ROUND(SUM(amount), 2)
+        FROM donations
+        WHERE {where}
+        GROUP BY month
+        ORDER BY month
+    """, params).fetchall()
+    donors = cursor.execute(f"""
+        SELECT p.name, ROUND(top.total, 2)
+        FROM (
+            SELECT donor_id, SUM(amount) AS total
+            FROM donations
+            WHERE {where}
+            GROUP BY donor_id
+            ORDER BY total DESC
+            LIMIT ?
+        ) top
+        JOIN donor_profiles p ON p.id = top.donor_id
+        ORDER BY top.total DESC
+    """, params + [TOP_DONORS]).fetchall()
+    return {'count': count, 'total': total, 'categories': categories, 'monthly': monthly, 'donors': donors}
+
+
+def _parse_date(value):
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def _batches(cursor, batch_size, total, progress, cancelled):
+    written = 0
+    while True:
+        if cancelled and cancelled():
+            raise ExportCancelled()
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield rows
+        written += len(rows)
+        if progress:
+            progress(written, total)
+
+
+def _write_xlsx(path, aggregates, batches):
+    from openpyxl import Workbook
+    from openpyxl.chart import BarChart, LineChart, PieChart, Reference
+
+    # write_only keeps just the current row in memory; sheets must be
+    # written in order, so the Summary and chart sheets come after the data
+    workbook = Workbook(write_only=True)
+    donations = workbook.create_sheet('Donations')
+    for letter, width in zip('ABCDE', (24, 12, 16, 20, 40)):
+        donations.column_dimensions[letter].width = width
+    donations.append(DONATION_COLUMNS)
+    try:
+        for rows in batches:
+            for donor, amount, category, date, notes in rows:
+                donations.append([donor, amount, category, _parse_date(date), notes])
+    except BaseException:
+        # Finish the sheet's temporary file before giving up on the workbook
+        donations.close()
+        raise
+
+    summary = workbook.create_sheet('Summary')
+    summary.column_dimensions['A'].width = 18
+    summary.column_dimensions['B'].width = 16
+    summary.append(['Metric', 'Value'])
+    summary.append(['Total Donations', aggregates['count']])
+    summary.append(['Total Amount', f"${aggregates['total']:.2f}"])
+    if aggregates.get('filter'):
+        summary.append(['Showing', aggregates['filter']])
+
+    breakdown = workbook.create_sheet('Category Breakdown')
+    breakdown.column_dimensions['A'].width = 18
+    breakdown.column_dimensions['C'].width = 14
+    breakdown.append(['Category', 'Count', 'Total Amount'])
+    for row in aggregates['categories']:
+        breakdown.append(list(row))
+
+    monthly = workbook.create_sheet('Monthly Totals')
+    monthly.append(['Month', 'Count', 'Total Amount'])
+    for row in aggregates['monthly']:
+        monthly.append(list(row))
+
+    donors = workbook.create_sheet('Top Donors')
+    donors.column_dimensions['A'].width = 24
+    donors.append(['Donor Name', 'Total Amount'])
+    for row in aggregates['donors']:
+        donors.append(list(row))
+
+    # Native Excel charts over the aggregate sheets instead of rendered images
+    graphs = workbook.create_sheet('Graphs')
+    if aggregates['categories']:
+        pie = PieChart()
+        pie.title = 'Donation Distribution by Category'
+        pie.add_data(Reference(breakdown, min_col=3, min_row=1, max_row=len(aggregates['categories']) + 1),
+                     titles_from_data=True)
+        pie.set_categories(Reference(breakdown, min_col=1, min_row=2, max_row=len(aggregates['categories']) + 1))
+        graphs.add_chart(pie, 'A1')
+    if aggregates['monthly']:
+        line = LineChart()
+        line.title = 'Monthly Donation Trends'
+        line.add_data(Reference(monthly, min_col=3, min_row=1, max_row=len(aggregates['monthly']) + 1),
+                      titles_from_data=True)
+        line.set_categories(Reference(monthly, min_col=1, min_row=2, max_row=len(aggregates['monthly']) + 1))
+        graphs.add_chart(line, 'A20')
+    if aggregates['donors']:
+        bar = BarChart()
+        bar.title = f'Top {TOP_DONORS} Donors'
+        bar.add_data(Reference(donors, min_col=2, min_row=1, max_row=len(aggregates['donors']) + 1),
+                     titles_from_data=True)
+        bar.set_categories(Reference(donors, min_col=1, min_row=2, max_row=len(aggregates['donors']) + 1))
+        graphs.add_chart(bar, 'A40')
+
+    workbook.save(path)
+
+
+def _write_csv(path, aggregates, batches):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(DONATION_COLUMNS)
+        for rows in batches:
+            writer.writerows(rows)
+
+
+def _write_parquet(path, aggregates, batches):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ('Donor Name', pa.string()),
+        ('Amount', pa.float64()),
+        ('Category', pa.string()),
+        ('Date', pa.string()),
+        ('Notes', pa.string()),
+    ])
+    with pq.ParquetWriter(path, schema) as writer:
+        for rows in batches:
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays([pa.array(c) for c in columns], schema=schema))
+
+
+WRITERS = {
+    'xlsx': _write_xlsx,
+    'csv': _write_csv,
+    'parquet': _write_parquet,
+}
+
+
+def export_donations(path: str = None, db: DonationDatabase = None, fmt: str = None,
+                     batch_size: int = 5000, progress: Callable[[int, int], None] = None,
+                     cancelled: Callable[[], bool] = None,
+                     report_filter: ReportFilter = None) -> Dict[str, Any]:
+    """Stream every donation (or those ``report_filter`` keeps) to an Excel, CSV or Parquet file.
+
+    ``fmt`` defaults to the extension of ``path``. ``progress(rows_written,
+    total_rows)`` is called after each batch; if ``cancelled()`` returns True
+    the export stops, the partial file is removed and ExportCancelled is
+    raised. Returns the path, row count and the summary figures.
+    """
+    fmt = (fmt or (os.path.splitext(path)[1].lstrip('.') if path else 'xlsx')).lower()
+    if fmt not in WRITERS:
+        raise ValueError(f"Unsupported export format '{fmt}'. Choose one of: {', '.join(FORMATS)}")
+    path = path or default_filename(fmt)
+    db = db or DonationDatabase()
+
+    with db.connection() as conn:
+        # One read transaction so the data and the summary sheets agree even
+        # if donations are added while the export runs (WAL keeps writers going)
+        conn.execute("BEGIN")
+        if report_filter is None or report_filter.is_empty:
+            aggregates = _read_aggregates(conn)
+            cursor = conn.execute(DONATION_QUERY.format(where='1'))
+        else:
+            aggregates = _read_filtered_aggregates(conn, report_filter)
+            aggregates['filter'] = report_filter.describe()
+            where, params = report_filter.where()
+            cursor = conn.execute(DONATION_QUERY.format(where=where), params)
+        try:
+            WRITERS[fmt](path, aggregates,
+                         _batches(cursor, batch_size, aggregates['count'], progress, cancelled))
+        except BaseException:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        finally:
+            cursor.close()
+
+    return {'path': path, 'rows': aggregates['count'], 'total': aggregates['total'],
+            'categories': aggregates['categories']}
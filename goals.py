@@ -0,0 +1,69 @@
+import sqlite3
+import sys
+from typing import List
+
+# donation_goals.current_amount is kept current by triggers on donations
+# (see migrations.py): every insert, delete or update adjusts the active
+# goals whose category and date window match the donation, in the same
+# transaction. Windows are whole days, inclusive at both ends, and an open
+# end_date means the goal never closes. reconcile() and check() recompute
+# progress from the donations table in one grouped pass.
+
+
+def in_window(ref: str, goal: str = 'donation_goals') -> str:
+    """SQL condition: donation ``ref`` counts towards goal ``goal``."""
+    return f"""
+        {goal}.status = 'active'
+        AND {goal}.category = {ref}.category
+        AND substr({ref}.date, 1, 10) >= substr({goal}.start_date, 1, 10)
+        AND ({goal}.end_date IS NULL OR substr({ref}.date, 1, 10) <= substr({goal}.end_date, 1, 10))
+    """
+
+
+PROGRESS_QUERY = f"""
+    SELECT g.id AS goal_id, COALESCE(SUM(d.amount), 0) AS total
+    FROM donation_goals g
+    LEFT JOIN donations d ON {in_window('d', 'g')}
+    WHERE g.status = 'active'
+    GROUP BY g.id
+"""
+
+# Totals drift by float rounding as rows are added and removed
+AMOUNT_TOLERANCE = 0.005
+
+
+def reconcile(conn: sqlite3.Connection) -> int:
+    """Recompute current_amount for every active goal; returns how many changed."""
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        UPDATE donation_goals
+        SET current_amount = progress.total
+        FROM ({PROGRESS_QUERY}) AS progress
+        WHERE donation_goals.id = progress.goal_id
+          AND ABS(COALESCE(donation_goals.current_amount, 0) - progress.total) > {AMOUNT_TOLERANCE}
+    """)
+    return cursor.rowcount
+
+
+def check(conn: sqlite3.Connection) -> List[str]:
+    """Describe every active goal whose current_amount disagrees with a recompute."""
+    problems = []
+    expected = dict(conn.execute(PROGRESS_QUERY))
+    actual = dict(conn.execute("SELECT id, current_amount FROM donation_goals WHERE status = 'active'"))
+    for goal_id, want in expected.items():
+        have = actual.get(goal_id) or 0.0
+        if abs(have - want) > AMOUNT_TOLERANCE:
+            problems.append(f"donation_goals[{goal_id}]: have {have:.2f}, expected {want:.2f}")
+    return problems
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'check'
+    db_path = sys.argv[2] if len(sys.argv) > 2 else 'donations.db'
+    with sqlite3.connect(db_path) as conn:
+        if command == 'reconcile':
+            print(f"Reconciled {reconcile(conn)} goal(s)")
+        else:
+            problems = check(conn)
+            print('\n'.join(problems) if problems else 'Goal progress matches the donations table')
+            sys.exit(1 if problems else 0)
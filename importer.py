@@ -0,0 +1,132 @@
+import argparse
+import csv
+import os
+import re
+from typing import Dict, Any, Iterator
+
+from database import DonationDatabase
+
+# Header names seen in our own exports (see DonationTracker.export_to_excel)
+# and in typical spreadsheets, mapped to donations/donor_profiles columns
+COLUMN_ALIASES = {
+    'donor': 'donor_name',
+    'donor_name': 'donor_name',
+    'name': 'donor_name',
+    'amount': 'amount',
+    'category': 'category',
+    'date': 'date',
+    'donation_date': 'date',
+    'notes': 'notes',
+    'note': 'notes',
+    'is_recurring': 'is_recurring',
+    'recurring': 'is_recurring',
+    'recurring_interval': 'recurring_interval',
+    'interval': 'recurring_interval',
+    'next_donation_date': 'next_donation_date',
+    'email': 'email',
+    'phone': 'phone',
+    'address': 'address',
+}
+
+
+def _column_names(header) -> list:
+    names = []
+    for title in header:
+        key = re.sub(r'[^a-z0-9]+', '_', str(title or '').strip().lower()).strip('_')
+        names.append(COLUMN_ALIASES.get(key))
+    return names
+
+
+def read_csv(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        columns = _column_names(next(reader, []))
+        # Errors cite the file line a record starts on, like read_xlsx's
+        # worksheet rows; quoted fields can span several lines
+        line = reader.line_num + 1
+        for values in reader:
+            if any(value.strip() for value in values):
+                row = {column: value for column, value in zip(columns, values) if column}
+                row['_row'] = line
+                yield row
+            line = reader.line_num + 1
+
+
+def read_xlsx(path: str, sheet: str = None) -> Iterator[Dict[str, Any]]:
+    from openpyxl import load_workbook
+
+    # read_only streams rows instead of loading the whole workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        if sheet:
+            worksheet = workbook[sheet]
+        elif 'Donations' in workbook.sheetnames:
+            worksheet = workbook['Donations']
+        else:
+            worksheet = workbook.active
+        rows = worksheet.iter_rows(values_only=True)
+        columns = _column_names(next(rows, []))
+        # Errors cite the worksheet row (the header is row 1), so numbering
+        # happens before blank rows are skipped
+        for row_number, values in enumerate(rows, start=2):
+            if not any(value not in (None, '') for value in values):
+                continue
+            row = {column: value for column, value in zip(columns, values) if column}
+            row['_row'] = row_number
+            yield row
+    finally:
+        workbook.close()
+
+
+def read_rows(path: str, sheet: str = None) -> Iterator[Dict[str, Any]]:
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return read_csv(path)
+    if extension in ('.xlsx', '.xlsm'):
+        return read_xlsx(path, sheet)
+    raise ValueError(f"Unsupported file type '{extension}', expected .csv or .xlsx")
+
+
+def import_file(path: str, db: DonationDatabase = None, sheet: str = None, chunk_size: int = 5000,
+                upsert_donors: bool = True, progress=None, day_first: bool = False) -> Dict[str, Any]:
+    """Stream donations from a CSV/XLSX file into the database.
+
+    Slash dates are read as mm/dd/yyyy, or dd/mm/yyyy with ``day_first``.
+    """
+    db = db or DonationDatabase()
+    return db.add_donations_bulk(read_rows(path, sheet), chunk_size=chunk_size,
+                                 upsert_donors=upsert_donors, progress=progress, day_first=day_first)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import historical donations from CSV or XLSX files.')
+    parser.add_argument('files', nargs='+', help='.csv or .xlsx files (e.g. donation_report_*.xlsx)')
+    parser.add_argument('--db', default='donations.db', help='database file (default: donations.db)')
+    parser.add_argument('--sheet', help="worksheet to read (default: 'Donations' or the active sheet)")
+    parser.add_argument('--chunk-size', type=int, default=5000, help='rows per transaction')
+    parser.add_argument('--day-first', action='store_true', help='read slash dates as dd/mm/yyyy (default mm/dd/yyyy)')
+    parser.add_argument('--no-donors', action='store_true', help="don't create or update donor profiles")
+    parser.add_argument('--max-errors', type=int, default=20, help='validation errors to print per file')
+    args = parser.parse_args()
+
+    db = DonationDatabase(args.db)
+
+    def report(result):
+        rate = result['inserted'] / result['seconds'] if result['seconds'] else 0.0
+        print(f"  {result['inserted']:,} rows ({rate:,.0f} rows/s)", flush=True)
+
+    for path in args.files:
+        print(f"Importing {path}")
+        result = import_file(path, db, sheet=args.sheet, chunk_size=args.chunk_size,
+                             upsert_donors=not args.no_donors, progress=report, day_first=args.day_first)
+        rate = result['inserted'] / result['seconds'] if result['seconds'] else 0.0
+        print(f"  {result['inserted']:,} rows imported in {result['seconds']:.2f}s ({rate:,.0f} rows/s), "
+              f"{len(result['errors'])} rejected")
+        for row_number, message in result['errors'][:args.max_errors]:
+            print(f"    row {row_number}: {message}")
+        if len(result['errors']) > args.max_errors:
+            print(f"    ... {len(result['errors']) - args.max_errors} more")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+import re
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+# Fast path in front of the LLM: short, unambiguous questions about totals,
+# recent donations, top donors and single donors become database commands
+# that ChatBot._execute_db_command answers directly. Anything that looks
+# like a request to change data or a how-to question goes to the model.
+
+_NOT_A_LOOKUP = re.compile(
+    r"\b(add|record|log|create|make|update|change|edit|delete|remove|set|"
+    r"how (do|can|should|would) (i|we)|why|explain|help|and|but)\b"
+)
+_TOTAL = re.compile(
+    r"^(?:what(?:'s| is| are)|how much(?: in)?|show(?: me)?|tell me|get)?\s*(?:is |are )?(?:the |our |my )?"
+    r"(?:total|sum|overall)(?: amount)?(?: of)?(?: all)?(?: the)?\s*(?:donations?|donated|raised|amount)?(?: amount)?"
+    r"(?:\s+(?:for|in) (?:the )?(?P<category>[a-z]+)(?: category)?)?"
+    r"(?: so far| in total| overall)?$"
+)
+_HOW_MUCH = re.compile(
+    r"^how much (?:money )?(?:has been|have we|was|did we|is) (?:donated|raised|received)"
+    r"(?:\s+(?:for|in|to) (?:the )?(?P<category>[a-z]+)(?: category)?)?(?: so far| in total)?$"
+)
+_RECENT = re.compile(
+    r"^(?:show(?: me)?|list|what(?:'s| is| are)|get|give me)?\s*(?:the |my )?"
+    r"(?:recent|latest|last|newest)\s*(?P<limit>\d+)?\s*donations?$"
+)
+_TOP_DONORS = re.compile(
+    r"^(?:who(?:'s| is| are)|show(?: me)?|list|what(?:'s| is| are)|get)?\s*(?:the |our )?"
+    r"(?:top|biggest|largest|best)\s*(?P<limit>\d+)?\s*donors?$"
+)
+_DONOR = re.compile(
+    r"^(?:how much (?:has|did) (?P<name1>[a-z][a-z .'-]*?) (?:donated?|given?|give)"
+    r"|(?:show(?: me)?|get|look ?up|find)?\s*(?:donations?|info(?:rmation)?|details) (?:from|by|for|on|about) (?:donor )?(?P<name2>[a-z][a-z .'-]*?)"
+    r"|look ?up (?:donor )?(?P<name3>[a-z][a-z .'-]*?))$"
+)
+
+MAX_LIMIT = 20
+
+
+class IntentRouter:
+    """Compiled intent matcher with hit-rate and latency-saved metrics."""
+
+    def __init__(self, db):
+        self.db = db
+        self._lock = threading.Lock()
+        self._categories = None
+        self._categories_version = None
+        self.stats = {'routed': 0, 'passed': 0, 'intents': {}}
+        self._llm_calls = 0
+        self._llm_seconds = 0.0
+
+    @staticmethod
+    def _normalize(message: str) -> str:
+        text = re.sub(r"[?!.]+$", "", message.strip().lower())
+        return re.sub(r"\s+", " ", text).strip()
+
+    def _load_categories(self):
+        # Only a handful of categories, reread after writes; donors are looked
+        # up one at a time instead (see _match)
+        version = self.db.data_version
+        if self._categories_version != version:
+            self._categories = {name.lower(): name for name in self.db.get_categories()}
+            self._categories_version = version
+
+    def route(self, message: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Return ``(intent, db_command)`` for a confident match, else None."""
+        text = self._normalize(message)
+        match = None
+        if text and not _NOT_A_LOOKUP.search(text):
+            match = self._match(text)
+        if match is None:
+            with self._lock:
+                self.stats['passed'] += 1
+        return match
+
+    def _match(self, text: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        found = _TOTAL.match(text) or _HOW_MUCH.match(text)
+        if found:
+            category = found.group('category')
+            if not category:
+                return 'total', {'action': 'get_total'}
+            self._load_categories()
+            if category in self._categories:
+                return 'category_total', {'action': 'get_total', 'category': self._categories[category]}
+            return None
+
+        found = _RECENT.match(text)
+        if found:
+            limit = min(int(found.group('limit') or 5), MAX_LIMIT)
+            return 'recent', {'action': 'get_donations', 'limit': limit}
+
+        found = _TOP_DONORS.match(text)
+        if found:
+            limit = min(int(found.group('limit') or 5), MAX_LIMIT)
+            return 'top_donors', {'action': 'get_top_donors', 'limit': limit}
+
+        found = _DONOR.match(text)
+        if found:
+            name = (found.group('name1') or found.group('name2') or found.group('name3')).strip()
+            # Only answer for donors we actually know; anything else may be a
+            # question the model understands better. One indexed lookup, so
+            # the cost doesn't grow with the number of donors
+            donor = self.db.find_donor_name(name)
+            if donor:
+                return 'donor_lookup', {'action': 'get_donor_info', 'donor_name': donor}
+        return None
+
+    def record_hit(self, intent: str, seconds: float):
+        with self._lock:
+            self.stats['routed'] += 1
+            entry = self.stats['intents'].setdefault(intent, {'hits': 0, 'seconds': 0.0})
+            entry['hits'] += 1
+            entry['seconds'] += seconds
+
+    def record_llm_latency(self, seconds: float):
+        with self._lock:
+            self._llm_calls += 1
+            self._llm_seconds += seconds
+
+    def report(self) -> Dict[str, Any]:
+        """Hit rate overall and, per intent, hits and estimated time saved.
+
+        Time saved is the average measured model latency minus the fast-path
+        latency, so it is only known once the model has answered at least once.
+        """
+        with self._lock:
+            total = self.stats['routed'] + self.stats['passed']
+            llm_avg = self._llm_seconds / self._llm_calls if self._llm_calls else None
+            intents = {}
+            for intent, entry in self.stats['intents'].items():
+                fast_avg = entry['seconds'] / entry['hits']
+                intents[intent] = {
+                    'hits': entry['hits'],
+                    'avg_ms': round(fast_avg * 1000, 3),
+                    'saved_ms': round((llm_avg - fast_avg) * entry['hits'] * 1000, 1) if llm_avg is not None else None,
+                }
+            return {
+                'hit_rate': self.stats['routed'] / total if total else 0.0,
+                'routed': self.stats['routed'],
+                'passed_to_model': self.stats['passed'],
+                'avg_model_ms': round(llm_avg * 1000, 1) if llm_avg is not None else None,
+                'intents': intents,
+            }
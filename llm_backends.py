@@ -0,0 +1,234 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Iterator, List, Optional, Union
+
+# Backends only need to turn a prompt into text. Gemini and the local
+# HuggingFace model import their libraries lazily so the app, the tests and
+# the scripted backend work without them installed.
+
+
+class LLMBackend(ABC):
+    """Interface every chat backend implements."""
+
+    name = 'base'
+
+    @abstractmethod
+    def generate(self, prompt: str) -> str:
+        """Return the model's full response to ``prompt``."""
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Yield the response in pieces; backends without streaming yield it whole."""
+        yield self.generate(prompt)
+
+
+class GeminiBackend(LLMBackend):
+    name = 'gemini'
+
+    def __init__(self, api_key: str = None, model_name: str = "gemini-2.0-flash"):
+        import google.generativeai as genai
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        api_key = api_key or os.getenv('GEMINI_API_KEY')
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY environment variable is not set")
+
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+
+    def generate(self, prompt: str) -> str:
+        response = self.model.generate_content(prompt)
+        return response.text if response and hasattr(response, 'text') else ""
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        for chunk in self.model.generate_content(prompt, stream=True):
+            text = getattr(chunk, 'text', '')
+            if text:
+                yield text
+
+
+class LocalModelBackend(LLMBackend):
+    """Causal LM saved by model_trainer.train_model (``./trained_model``).
+
+    Generation runs through the process-wide batching engine in
+    local_inference.py, so every ChatBot shares one loaded copy of the model
+    and concurrent questions are answered in batches. Settings not passed
+    in come from LOCAL_MODEL_DIR, LOCAL_MODEL_QUANTIZE,
+    LOCAL_MODEL_MAX_NEW_TOKENS and LOCAL_MODEL_TIMEOUT.
+    """
+
+    name = 'local'
+
+    def __init__(self, model_dir: str = None, max_new_tokens: int = None, quantize: bool = None,
+                 timeout: float = None, engine=None):
+        self.timeout = timeout if timeout is not None else float(os.getenv('LOCAL_MODEL_TIMEOUT', '30'))
+        if engine is None:
+            from local_inference import get_engine
+
+            engine = get_engine(
+                model_dir or os.getenv('LOCAL_MODEL_DIR', './trained_model'),
+                quantize if quantize is not None else os.getenv('LOCAL_MODEL_QUANTIZE', '').lower() in ('1', 'true', 'yes'),
+                max_new_tokens or int(os.getenv('LOCAL_MODEL_MAX_NEW_TOKENS', '128'))
+            )
+        self.engine = engine
+
+    def generate(self, prompt: str) -> str:
+        # Training examples end with "User: ...\nAssistant:"
+        future = self.engine.submit(f"{prompt}\nAssistant:")
+        try:
+            return future.result(self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"The local model did not answer within {self.timeout:g} seconds")
+
+
+class ScriptedBackend(LLMBackend):
+    """Deterministic stand-in for offline runs and tests.
+
+    ``responses`` is a list replayed in order (the last one repeats), a dict
+    mapping a phrase in the user's message to a reply, or a callable taking
+    the prompt. Every prompt is kept in ``prompts``.
+    """
+
+    name = 'scripted'
+
+    def __init__(self, responses: Union[List[str], Dict[str, str], Callable[[str], str]] = None,
+                 default: str = "I can help you manage donations, view statistics, and generate reports.",
+                 chunk_size: int = None, delay: float = 0.0):
+        self.responses = responses if responses is not None else []
+        self.default = default
+        self.chunk_size = chunk_size
+        self.delay = delay
+        self.prompts = []
+
+    def generate(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        if self.delay:
+            time.sleep(self.delay)
+        if callable(self.responses):
+            return self.responses(prompt)
+        if isinstance(self.responses, dict):
+            question = prompt.rsplit('User: ', 1)[-1].lower()
+            for phrase, reply in self.responses.items():
+                if phrase.lower() in question:
+                    return reply
+            return self.default
+        if self.responses:
+            index = min(len(self.prompts), len(self.responses)) - 1
+            return self.responses[index]
+        return self.default
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        text = self.generate(prompt)
+        size = self.chunk_size or len(text) or 1
+        for i in range(0, len(text), size):
+            yield text[i:i + size]
+
+
+BACKENDS = {
+    'gemini': GeminiBackend,
+    'local': LocalModelBackend,
+    'scripted': ScriptedBackend,
+}
+
+
+def create_backend(name: str = None, **kwargs) -> LLMBackend:
+    """Build the backend named by ``name`` or the CHATBOT_BACKEND environment variable."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    name = (name or os.getenv('CHATBOT_BACKEND') or 'gemini').lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown chatbot backend '{name}'. Choose one of: {', '.join(BACKENDS)}")
+    return BACKENDS[name](**kwargs)
+
+
+class ResponseCache:
+    """LRU + TTL cache of model responses, optionally persisted to SQLite.
+
+    Keys combine the normalized prompt with the database data version, so a
+    donation or donor write, from this process or any other, makes every
+    earlier answer stale. Persisted
+    entries live in the ``llm_response_cache`` table (see migrations.py).
+    """
+
+    def __init__(self, max_size: int = 256, ttl: float = 3600.0, db=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.db = db
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    @staticmethod
+    def make_key(prompt: str, version: Any = None, backend: str = '') -> str:
+        normalized = re.sub(r'\s+', ' ', prompt).strip().lower()
+        return hashlib.sha256(f"{backend}|{version}|{normalized}".encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry[1] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry[0]
+            self._entries.pop(key, None)
+
+        entry = self._load(key)
+        with self._lock:
+            if entry and now - entry[1] <= self.ttl:
+                self._store(key, entry)
+                self.stats['hits'] += 1
+                return entry[0]
+            self.stats['misses'] += 1
+        return None
+
+    def put(self, key: str, response: str):
+        entry = (response, time.time())
+        with self._lock:
+            self._store(key, entry)
+        self._save(key, entry)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.db is not None:
+            with self.db.connection() as conn:
+                conn.execute("DELETE FROM llm_response_cache")
+
+    def _store(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _load(self, key):
+        if self.db is None:
+            return None
+        try:
+            with self.db.connection() as conn:
+                return conn.execute(
+                    "SELECT response, created_at FROM llm_response_cache WHERE key = ?", (key,)
+                ).fetchone()
+        except Exception as e:
+            print(f"Error reading response cache: {str(e)}")
+            return None
+
+    def _save(self, key, entry):
+        if self.db is None:
+            return
+        try:
+            with self.db.connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_response_cache (key, response, created_at) VALUES (?, ?, ?)",
+                    (key, entry[0], entry[1])
+                )
+                conn.execute("DELETE FROM llm_response_cache WHERE created_at < ?", (entry[1] - self.ttl,))
+        except Exception as e:
+            print(f"Error writing response cache: {str(e)}")
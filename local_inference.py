@@ -0,0 +1,197 @@
+import argparse
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Tuple
+
+# Serves the model model_trainer saves to ./trained_model. LocalModel loads
+# it once per process (optionally with int8 dynamic quantization for CPU)
+# and generates for a whole batch of prompts in one KV-cached generate()
+# call. BatchingEngine sits in front of it: concurrent requests queue up
+# and a single worker thread takes up to max_batch_size of them at a time,
+# so ten users asking at once cost one batched pass, not ten serial ones.
+# torch and transformers are imported only when a model is loaded.
+
+
+class BatchingEngine:
+    """Runs queued prompts through ``generate_batch(prompts) -> texts`` in batches.
+
+    The worker waits at most ``max_wait`` seconds for a batch to fill.
+    ``max_pending`` bounds the queue: beyond it submit() fails fast instead
+    of making every later request wait longer.
+    """
+
+    def __init__(self, generate_batch: Callable[[List[str]], List[str]], max_batch_size: int = 8,
+                 max_wait: float = 0.01, max_pending: int = 64):
+        self.generate_batch = generate_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: 'queue.Queue[Tuple[str, Future]]' = queue.Queue(maxsize=max_pending)
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'batches': 0, 'busy_seconds': 0.0}
+        self._thread = threading.Thread(target=self._loop, name='local-inference', daemon=True)
+        self._thread.start()
+
+    def submit(self, prompt: str) -> Future:
+        future = Future()
+        if self._stopping.is_set():
+            raise RuntimeError("Local model is shut down")
+        try:
+            self._queue.put_nowait((prompt, future))
+        except queue.Full:
+            raise RuntimeError("Local model is busy, please try again shortly")
+        return future
+
+    def generate(self, prompt: str, timeout: float = None) -> str:
+        return self.submit(prompt).result(timeout)
+
+    def _next_batch(self) -> List[Tuple[str, Future]]:
+        try:
+            batch = [self._queue.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        # Requests cancelled while queued are dropped
+        return [(prompt, future) for prompt, future in batch if future.set_running_or_notify_cancel()]
+
+    def _loop(self):
+        while not self._stopping.is_set():
+            batch = self._next_batch()
+            if not batch:
+                continue
+            started = time.perf_counter()
+            try:
+                texts = self.generate_batch([prompt for prompt, _ in batch])
+                for (_, future), text in zip(batch, texts):
+                    future.set_result(text)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            with self._lock:
+                self.stats['requests'] += len(batch)
+                self.stats['batches'] += 1
+                self.stats['busy_seconds'] += time.perf_counter() - started
+
+    def stop(self, timeout: float = None):
+        self._stopping.set()
+        self._thread.join(timeout)
+        while True:
+            try:
+                _, future = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            future.cancel()
+
+
+def quantize_int8(model):
+    """Dynamically quantize the model's linear layers to int8 for CPU inference."""
+    import torch
+    from transformers.pytorch_utils import Conv1D
+
+    # GPT-2 style models (DialoGPT) use Conv1D, a Linear with its weight
+    # transposed, which quantize_dynamic doesn't recognise
+    for parent in list(model.modules()):
+        for name, child in list(parent.named_children()):
+            if isinstance(child, Conv1D):
+                in_features, out_features = child.weight.shape
+                linear = torch.nn.Linear(in_features, out_features)
+                linear.weight.data = child.weight.data.t().contiguous()
+                linear.bias.data = child.bias.data
+                setattr(parent, name, linear)
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+class LocalModel:
+    """A causal LM and its tokenizer, ready for batched greedy generation."""
+
+    def __init__(self, model_dir: str = './trained_model', quantize: bool = False, max_new_tokens: int = 128):
+        import torch
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        # Batches are left-padded so every prompt ends where generation starts,
+        # and long prompts keep their end: that's where the user's question is
+        self.tokenizer.padding_side = 'left'
+        self.tokenizer.truncation_side = 'left'
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        self.model = AutoModelForCausalLM.from_pretrained(model_dir)
+        self.model.config.use_cache = True
+        self.model.eval()
+        if quantize:
+            self.model = quantize_int8(self.model)
+        self.max_new_tokens = max_new_tokens
+        self._torch = torch
+
+    def generate_batch(self, prompts: List[str], max_new_tokens: int = None) -> List[str]:
+        max_new_tokens = max_new_tokens or self.max_new_tokens
+        inputs = self.tokenizer(
+            prompts,
+            return_tensors='pt',
+            padding=True,
+            truncation=True,
+            max_length=self.tokenizer.model_max_length - max_new_tokens
+        )
+        with self._torch.inference_mode():
+            # Greedy decoding; use_cache keeps each step's keys and values so
+            # a new token only attends, it doesn't re-encode the prompt
+            output = self.model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                do_sample=False,
+                use_cache=True,
+                pad_token_id=self.tokenizer.pad_token_id
+            )
+        new_tokens = output[:, inputs['input_ids'].shape[1]:]
+        return [text.strip() for text in self.tokenizer.batch_decode(new_tokens, skip_special_tokens=True)]
+
+
+_engines: Dict[tuple, BatchingEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(model_dir: str = './trained_model', quantize: bool = False, max_new_tokens: int = 128,
+               max_batch_size: int = 8) -> BatchingEngine:
+    """The process-wide engine for these settings, loading the model the first time."""
+    key = (os.path.abspath(model_dir), quantize, max_new_tokens, max_batch_size)
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            model = LocalModel(model_dir, quantize, max_new_tokens)
+            engine = _engines[key] = BatchingEngine(model.generate_batch, max_batch_size=max_batch_size)
+        return engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Chat with the locally trained model.')
+    parser.add_argument('--model-dir', default='./trained_model')
+    parser.add_argument('--quantize', action='store_true', help='int8 dynamic quantization (CPU)')
+    parser.add_argument('--max-new-tokens', type=int, default=128)
+    args = parser.parse_args()
+
+    engine = get_engine(args.model_dir, args.quantize, args.max_new_tokens)
+    try:
+        while True:
+            message = input('You: ').strip()
+            if message.lower() in ('exit', 'quit'):
+                break
+            started = time.perf_counter()
+            response = engine.generate(f"User: {message}\nAssistant:")
+            print(f"Assistant: {response}  ({time.perf_counter() - started:.2f}s)")
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        engine.stop()
+
+
+if __name__ == '__main__':
+    main()
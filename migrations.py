@@ -0,0 +1,463 @@
+import sqlite3
+
+import goals
+import rollups
+
+# Schema versions are tracked with PRAGMA user_version. Each migration must be
+# safe to run against a database that already has some of its objects, because
+# databases created before versioning existed start at version 0.
+
+
+def _v1_base_schema(cursor):
+    """Single definition of every table the app, chatbot and trainer use."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS donations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            donor_name TEXT NOT NULL,
+            amount REAL NOT NULL,
+            category TEXT NOT NULL,
+            date TEXT NOT NULL,
+            notes TEXT,
+            is_recurring BOOLEAN DEFAULT 0,
+            recurring_interval TEXT,
+            next_donation_date TEXT
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS categories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL
+        )
+    ''')
+    cursor.executemany(
+        "INSERT OR IGNORE INTO categories (name) VALUES (?)",
+        [('General',), ('Project',), ('Emergency',), ('Other',)]
+    )
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS donor_profiles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT,
+            phone TEXT,
+            address TEXT,
+            preferred_category TEXT,
+            total_donations REAL DEFAULT 0,
+            last_donation_date TEXT,
+            notification_preferences TEXT
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS donation_goals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            category TEXT NOT NULL,
+            target_amount REAL NOT NULL,
+            current_amount REAL DEFAULT 0,
+            start_date TEXT NOT NULL,
+            end_date TEXT,
+            status TEXT DEFAULT 'active'
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS chat_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_message TEXT NOT NULL,
+            bot_response TEXT NOT NULL,
+            timestamp TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS email_notifications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            donor_id INTEGER,
+            type TEXT NOT NULL,
+            message TEXT NOT NULL,
+            status TEXT DEFAULT 'pending',
+            created_at TEXT NOT NULL,
+            sent_at TEXT,
+            FOREIGN KEY (donor_id) REFERENCES donor_profiles(id)
+        )
+    ''')
+
+
+def _v2_indexes(cursor):
+    """Indexes for the recent-list, report, delete and donor lookup queries."""
+    # ORDER BY date DESC LIMIT n, DELETE ... WHERE date = ?
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_donations_date ON donations(date)")
+    # GROUP BY category with SUM(amount) answered from the index alone
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_donations_category_amount ON donations(category, amount)")
+    # GROUP BY donor_name with COUNT/SUM/AVG(amount), MAX(date); donor_profiles join
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_donations_donor_amount_date ON donations(donor_name, amount, date)")
+
+    _dedupe_donor_profiles(cursor)
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_donor_profiles_name ON donor_profiles(name)")
+
+
+def _dedupe_donor_profiles(cursor):
+    # INSERT OR REPLACE without a unique key left one profile per donation.
+    # Keep the newest row per name, fill in any contact details only the
+    # older rows have, and point notifications at it.
+    cursor.execute('''
+        UPDATE donor_profiles
+        SET email = COALESCE(NULLIF(email, ''), (SELECT old.email FROM donor_profiles old
+                                     WHERE old.name = donor_profiles.name AND old.email <> ''
+                                     ORDER BY old.id DESC LIMIT 1)),
+            phone = COALESCE(NULLIF(phone, ''), (SELECT old.phone FROM donor_profiles old
+                                     WHERE old.name = donor_profiles.name AND old.phone <> ''
+                                     ORDER BY old.id DESC LIMIT 1)),
+            address = COALESCE(NULLIF(address, ''), (SELECT old.address FROM donor_profiles old
+                                         WHERE old.name = donor_profiles.name AND old.address <> ''
+                                         ORDER BY old.id DESC LIMIT 1))
+        WHERE id IN (SELECT MAX(id) FROM donor_profiles GROUP BY name HAVING COUNT(*) > 1)
+    ''')
+    cursor.execute('''
+        UPDATE email_notifications
+        SET donor_id = (
+            SELECT MAX(keep.id) FROM donor_profiles keep
+            WHERE keep.name = (SELECT name FROM donor_profiles WHERE id = email_notifications.donor_id)
+        )
+        WHERE donor_id IN (
+            SELECT id FROM donor_profiles
+            WHERE id NOT IN (SELECT MAX(id) FROM donor_profiles GROUP BY name)
+        )
+    ''')
+    cursor.execute('''
+        DELETE FROM donor_profiles
+        WHERE id NOT IN (SELECT MAX(id) FROM donor_profiles GROUP BY name)
+    ''')
+
+
+def _rollup_add(ref):
+    return f'''
+        INSERT INTO category_totals (category, donation_count, total_amount)
+        VALUES ({ref}.category, 1, {ref}.amount)
+        ON CONFLICT(category) DO UPDATE SET
+            donation_count = donation_count + 1,
+            total_amount = total_amount + excluded.total_amount;
+        INSERT INTO donor_totals (donor_name, donation_count, total_amount, last_donation_date)
+        VALUES ({ref}.donor_name, 1, {ref}.amount, {ref}.date)
+        ON CONFLICT(donor_name) DO UPDATE SET
+            donation_count = donation_count + 1,
+            total_amount = total_amount + excluded.total_amount,
+            last_donation_date = MAX(last_donation_date, excluded.last_donation_date);
+        INSERT INTO monthly_category_totals (month, category, donation_count, total_amount)
+        VALUES (substr({ref}.date, 1, 7), {ref}.category, 1, {ref}.amount)
+        ON CONFLICT(month, category) DO UPDATE SET
+            donation_count = donation_count + 1,
+            total_amount = total_amount + excluded.total_amount;
+    '''
+
+
+def _rollup_remove(ref):
+    # The trigger fires after the row is gone (or changed), so the MAX(date)
+    # fallback only sees the donor's remaining donations
+    return f'''
+        UPDATE category_totals
+        SET donation_count = donation_count - 1, total_amount = total_amount - {ref}.amount
+        WHERE category = {ref}.category;
+        DELETE FROM category_totals WHERE category = {ref}.category AND donation_count <= 0;
+        UPDATE donor_totals
+        SET donation_count = donation_count - 1,
+            total_amount = total_amount - {ref}.amount,
+            last_donation_date = CASE WHEN last_donation_date = {ref}.date
+                THEN (SELECT MAX(date) FROM donations WHERE donor_name = {ref}.donor_name)
+                ELSE last_donation_date END
+        WHERE donor_name = {ref}.donor_name;
+        DELETE FROM donor_totals WHERE donor_name = {ref}.donor_name AND donation_count <= 0;
+        UPDATE monthly_category_totals
+        SET donation_count = donation_count - 1, total_amount = total_amount - {ref}.amount
+        WHERE month = substr({ref}.date, 1, 7) AND category = {ref}.category;
+        DELETE FROM monthly_category_totals
+        WHERE month = substr({ref}.date, 1, 7) AND category = {ref}.category AND donation_count <= 0;
+    '''
+
+
+def _v3_rollups(cursor):
+    """Aggregate tables for totals, category, donor and monthly reports."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS category_totals (
+            category TEXT PRIMARY KEY,
+            donation_count INTEGER NOT NULL DEFAULT 0,
+            total_amount REAL NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS donor_totals (
+            donor_name TEXT PRIMARY KEY,
+            donation_count INTEGER NOT NULL DEFAULT 0,
+            total_amount REAL NOT NULL DEFAULT 0,
+            last_donation_date TEXT
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_donor_totals_total ON donor_totals(total_amount)")
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS monthly_category_totals (
+            month TEXT NOT NULL,
+            category TEXT NOT NULL,
+            donation_count INTEGER NOT NULL DEFAULT 0,
+            total_amount REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (month, category)
+        )
+    ''')
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_donations_rollup_insert
+        AFTER INSERT ON donations
+        BEGIN {_rollup_add('NEW')} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_donations_rollup_delete
+        AFTER DELETE ON donations
+        BEGIN {_rollup_remove('OLD')} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_donations_rollup_update
+        AFTER UPDATE OF donor_name, amount, category, date ON donations
+        BEGIN {_rollup_remove('OLD')} {_rollup_add('NEW')} END
+    """)
+    rollups.rebuild(cursor.connection)
+
+
+def _v4_response_cache(cursor):
+    """Persisted entries for llm_backends.ResponseCache."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS llm_response_cache (
+            key TEXT PRIMARY KEY,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_llm_response_cache_created ON llm_response_cache(created_at)")
+
+
+def _v5_recurring_schedules(cursor):
+    """Partial index over active recurring schedules, for recurring.process_due."""
+    # Only schedules are indexed, so finding due ones costs O(due) however
+    # many one-off donations there are
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_donations_next_due
+        ON donations(next_donation_date)
+        WHERE is_recurring = 1 AND next_donation_date IS NOT NULL
+    ''')
+
+
+def _add_column(cursor, table, column, declaration):
+    columns = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+    if column not in columns:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+
+def _v6_notification_outbox(cursor):
+    """Retry bookkeeping and the claim index for notifications.NotificationDispatcher."""
+    _add_column(cursor, 'email_notifications', 'attempts', 'INTEGER NOT NULL DEFAULT 0')
+    _add_column(cursor, 'email_notifications', 'next_attempt_at', 'TEXT')
+    _add_column(cursor, 'email_notifications', 'claimed_at', 'TEXT')
+    _add_column(cursor, 'email_notifications', 'last_error', 'TEXT')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_email_notifications_status_created
+        ON email_notifications(status, created_at)
+    ''')
+
+
+def _goal_adjust(ref, sign):
+    return f'''
+        UPDATE donation_goals
+        SET current_amount = COALESCE(current_amount, 0) {sign} {ref}.amount
+        WHERE {goals.in_window(ref)};
+    '''
+
+
+def _v7_goal_progress(cursor):
+    """Trigger-maintained donation_goals.current_amount (see goals.py)."""
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_donation_goals_active
+        ON donation_goals(category, start_date)
+        WHERE status = 'active'
+    ''')
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_donations_goal_insert
+        AFTER INSERT ON donations
+        BEGIN {_goal_adjust('NEW', '+')} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_donations_goal_delete
+        AFTER DELETE ON donations
+        BEGIN {_goal_adjust('OLD', '-')} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_donations_goal_update
+        AFTER UPDATE OF amount, category, date ON donations
+        BEGIN {_goal_adjust('OLD', '-')} {_goal_adjust('NEW', '+')} END
+    """)
+    goals.reconcile(cursor.connection)
+
+
+def _v8_category_date_index(cursor):
+    """(category, date) index for reports filtered by category and date range (see report_filter.py)."""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_donations_category_date ON donations(category, date)")
+
+
+def _donor_link(ref):
+    # donor_name stays the natural key: donor_id always points at the profile
+    # with that name, which is created on the donor's first donation
+    return f'''
+        INSERT INTO donor_profiles (name, total_donations) VALUES ({ref}.donor_name, 0)
+        ON CONFLICT(name) DO NOTHING;
+        UPDATE donations
+        SET donor_id = (SELECT id FROM donor_profiles WHERE name = {ref}.donor_name)
+        WHERE id = {ref}.id AND donor_id IS NOT (SELECT id FROM donor_profiles WHERE name = {ref}.donor_name);
+    '''
+
+
+def _donor_add(ref):
+    return f'''
+        UPDATE donor_profiles
+        SET total_donations = COALESCE(total_donations, 0) + {ref}.amount,
+            last_donation_date = MAX(COALESCE(last_donation_date, ''), {ref}.date)
+        WHERE name = {ref}.donor_name;
+    '''
+
+
+def _donor_remove(ref):
+    # Runs after the row is gone (or relinked), so the MAX(date) fallback
+    # only sees the donor's remaining donations
+    return f'''
+        UPDATE donor_profiles
+        SET total_donations = COALESCE(total_donations, 0) - {ref}.amount,
+            last_donation_date = CASE WHEN last_donation_date = {ref}.date
+                THEN (SELECT MAX(date) FROM donations WHERE donor_id = {ref}.donor_id)
+                ELSE last_donation_date END
+        WHERE id = {ref}.donor_id;
+    '''
+
+
+def _v9_donor_ids(cursor):
+    """donations.donor_id and trigger-maintained donor_profiles totals."""
+    # Names are unique since v2; repeat the cleanup in case duplicates got in
+    # some other way, since the backfill needs one profile per name
+    _dedupe_donor_profiles(cursor)
+    _add_column(cursor, 'donations', 'donor_id', 'INTEGER REFERENCES donor_profiles(id)')
+    cursor.execute('''
+        INSERT INTO donor_profiles (name, total_donations)
+        SELECT DISTINCT donor_name, 0 FROM donations WHERE true
+        ON CONFLICT(name) DO NOTHING
+    ''')
+    cursor.execute('''
+        UPDATE donations
+        SET donor_id = (SELECT id FROM donor_profiles WHERE name = donations.donor_name)
+    ''')
+    # donor_id = ? lookups with COUNT/SUM(amount) and MAX(date), optionally
+    # over a date range
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_donations_donor_id_date ON donations(donor_id, date, amount)")
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_donations_donor_insert
+        AFTER INSERT ON donations
+        BEGIN {_donor_link('NEW')} {_donor_add('NEW')} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_donations_donor_delete
+        AFTER DELETE ON donations
+        BEGIN {_donor_remove('OLD')} END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_donations_donor_update
+        AFTER UPDATE OF donor_name, amount, date ON donations
+        BEGIN {_donor_link('NEW')} {_donor_remove('OLD')} {_donor_add('NEW')} END
+    """)
+    rollups.rebuild_donor_profiles(cursor.connection)
+
+
+# Tables whose writes change what the chatbot, router and reports show, and
+# the columns an UPDATE must touch to count. donations.donor_id,
+# donor_profiles totals and donation_goals progress are left out because
+# only the donations triggers write them, and that write is counted already.
+CHANGE_TRACKED = {
+    'donations': 'donor_name, amount, category, date, notes, is_recurring, recurring_interval, next_donation_date',
+    'categories': None,
+    'donor_profiles': 'name, email, phone, address, preferred_category, notification_preferences',
+    'donation_goals': 'category, target_amount, start_date, end_date, status',
+}
+
+
+def _v10_data_changes(cursor):
+    """One-row change counter bumped by triggers, so every process sees every write."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS data_changes (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO data_changes (id, version) VALUES (1, 0)")
+    bump = "UPDATE data_changes SET version = version + 1 WHERE id = 1;"
+    for table, columns in CHANGE_TRACKED.items():
+        for event in ('INSERT', 'DELETE', 'UPDATE'):
+            of = f" OF {columns}" if event == 'UPDATE' and columns else ''
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_changed_{event.lower()}
+                AFTER {event}{of} ON {table}
+                BEGIN {bump} END
+            """)
+    # Replaying the migrations (recreate_db.py) may have swapped the data
+    # underneath anything keyed on the old count
+    cursor.execute(bump)
+
+
+def _v11_donor_name_lookup(cursor):
+    """Case-insensitive donor name index for DonationDatabase.find_donor_name."""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_donor_totals_name_lower ON donor_totals(lower(donor_name))")
+
+
+MIGRATIONS = [
+    (1, 'base schema', _v1_base_schema),
+    (2, 'secondary indexes and unique donor names', _v2_indexes),
+    (3, 'trigger-maintained rollup tables', _v3_rollups),
+    (4, 'LLM response cache', _v4_response_cache),
+    (5, 'recurring schedule index', _v5_recurring_schedules),
+    (6, 'notification outbox', _v6_notification_outbox),
+    (7, 'trigger-maintained goal progress', _v7_goal_progress),
+    (8, 'category and date index', _v8_category_date_index),
+    (9, 'donor ids on donations', _v9_donor_ids),
+    (10, 'cross-process data change counter', _v10_data_changes),
+    (11, 'case-insensitive donor name index', _v11_donor_name_lookup),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection, target: int = SCHEMA_VERSION) -> int:
+    """Upgrade the database in place to ``target`` and return the new version.
+
+    Every migration runs in its own transaction together with the version
+    bump, so an interrupted upgrade resumes from the last completed step.
+    """
+    if get_schema_version(conn) >= target:
+        return get_schema_version(conn)
+    if conn.in_transaction:
+        conn.commit()
+    for version, _description, apply in MIGRATIONS:
+        if version > target:
+            break
+        # Take the write lock before re-checking so concurrent processes
+        # don't both apply the same step
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if get_schema_version(conn) >= version:
+                conn.rollback()
+                continue
+            apply(conn.cursor())
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    conn.execute("PRAGMA optimize")
+    return get_schema_version(conn)
+
+
+if __name__ == '__main__':
+    with sqlite3.connect('donations.db') as conn:
+        before = get_schema_version(conn)
+        after = migrate(conn)
+    print(f'Schema version: {before} -> {after}')
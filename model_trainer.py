@@ -1,125 +1,243 @@
+import argparse
+import bisect
+import itertools
+import time
 import torch
-from torch.utils.data import Dataset, DataLoader
-from transformers import AutoModelForCausalLM, AutoTokenizer, Trainer, TrainingArguments
+from torch.utils.data import Dataset, random_split
+from transformers import (AutoModelForCausalLM, AutoTokenizer, EarlyStoppingCallback, Trainer,
+                          TrainerCallback, TrainingArguments)
 from database import DonationDatabase
-import sqlite3
-import pandas as pd
+from token_cache import CACHE_DIR, TokenCache, pad_batch, prune
+from training_corpus import TrainingCorpus
 
 class DonationDataset(Dataset):
-    def __init__(self, tokenizer, max_length=512):
+    def __init__(self, tokenizer, max_length=512, db=None, corpus=None, cache_dir=CACHE_DIR):
         self.tokenizer = tokenizer
         self.max_length = max_length
-        self.data = self._load_training_data()
-        
-    def _load_training_data(self):
-        # Load chat history and donation data from database
-        with sqlite3.connect('donations.db') as conn:
-            # Get chat history
-            chat_df = pd.read_sql_query(
-                'SELECT user_message, bot_response FROM chat_history',
-                conn
-            )
-            
-            # Get donation data for context
-            donations_df = pd.read_sql_query(
-                'SELECT donor_name, amount, category, notes FROM donations',
-                conn
-            )
-            
-        # Format data for training
-        training_pairs = []
-        
-        # Add chat history pairs
-        for _, row in chat_df.iterrows():
-            training_pairs.append({
-                'input': f"User: {row['user_message']}\nAssistant:",
-                'output': row['bot_response']
-            })
-            
-        # Add donation-specific examples
-        for _, row in donations_df.iterrows():
-            # Create contextual examples
-            training_pairs.append({
-                'input': f"User: How do I make a donation like {row['donor_name']}?\nAssistant:",
-                'output': f"You can make a donation similar to {row['donor_name']}'s {row['category']} donation by following these steps:\n1. Go to the Donations tab\n2. Fill out the form with your details\n3. Select the {row['category']} category\n4. Enter your desired amount\n5. Add any notes\n6. Click 'Submit Donation'"
-            })
-            
-        return training_pairs
+        self.corpus = corpus if corpus is not None else TrainingCorpus()
+        # Only chat history and donations added since the last run are read
+        self.corpus.update(db or DonationDatabase())
+        # One token cache per shard: full shards never change, so only the
+        # newest one is tokenized again after an update
+        self.caches = [TokenCache.build(self.corpus.read_shard(shard), tokenizer, max_length, cache_dir)
+                       for shard in self.corpus.shards]
+        # Caches of the newest shard from earlier runs are no longer used
+        prune(self.caches, cache_dir)
+        self._starts = list(itertools.accumulate((len(cache) for cache in self.caches), initial=0))
     
     def __len__(self):
-        return len(self.data)
+        return self._starts[-1]
     
     def __getitem__(self, idx):
-        item = self.data[idx]
-        # Tokenize input and output
-        inputs = self.tokenizer(
-            item['input'],
-            max_length=self.max_length,
-            padding='max_length',
-            truncation=True,
-            return_tensors='pt'
-        )
-        
-        with self.tokenizer.as_target_tokenizer():
-            labels = self.tokenizer(
-                item['output'],
-                max_length=self.max_length,
-                padding='max_length',
-                truncation=True,
-                return_tensors='pt'
-            )['input_ids']
-        
-        return {
-            'input_ids': inputs['input_ids'].squeeze(),
-            'attention_mask': inputs['attention_mask'].squeeze(),
-            'labels': labels.squeeze()
-        }
+        # Prompt + response token ids, unpadded; DynamicPaddingCollator pads per batch
+        shard = bisect.bisect_right(self._starts, idx) - 1
+        input_ids, prompt_length = self.caches[shard][idx - self._starts[shard]]
+        return {'input_ids': input_ids, 'prompt_length': prompt_length}
 
-def train_model(model_name='microsoft/DialoGPT-small', output_dir='./trained_model'):
+class DynamicPaddingCollator:
+    """Pads each batch only to its own longest example (see token_cache.pad_batch)."""
+    
+    def __init__(self, pad_token_id, pad_to_multiple_of=8):
+        self.pad_token_id = pad_token_id
+        self.pad_to_multiple_of = pad_to_multiple_of
+    
+    def __call__(self, features):
+        batch = pad_batch(features, self.pad_token_id, self.pad_to_multiple_of)
+        return {name: torch.from_numpy(array) for name, array in batch.items()}
+
+# Settings train_model starts from; any keyword argument overrides them.
+# 'cpu' trains LoRA adapters (a few hundred thousand parameters instead of
+# the whole model) with gradient checkpointing, bf16 where the hardware has
+# it and early stopping on a held-out split.
+TRAINING_PROFILES = {
+    'default': {
+        'epochs': 3,
+        'batch_size': 4,
+        'gradient_accumulation_steps': 4,
+        'learning_rate': 2e-5,
+        'lora': False,
+        'gradient_checkpointing': False,
+        'num_workers': 0,
+        'bf16': False,
+        'eval_fraction': 0.0,
+        'early_stopping_patience': None,
+        'threads': None,
+        'max_length': 512,
+    },
+    'cpu': {
+        'epochs': 3,
+        'batch_size': 8,
+        'gradient_accumulation_steps': 2,
+        'learning_rate': 2e-4,  # adapters train with a higher rate than full fine-tuning
+        'lora': True,
+        'lora_rank': 8,
+        'gradient_checkpointing': True,
+        'num_workers': 2,
+        'bf16': 'auto',
+        'eval_fraction': 0.1,
+        'early_stopping_patience': 2,
+        'threads': None,
+        'max_length': 256,
+    },
+}
+
+# GPT-2 style attention projections (DialoGPT); other models name them differently
+LORA_TARGET_MODULES = ['c_attn', 'c_proj']
+
+
+def bf16_supported():
+    """True when bf16 autocast runs natively: a bf16 GPU, or a CPU with AVX512-BF16 or AMX."""
+    if torch.cuda.is_available():
+        return torch.cuda.is_bf16_supported()
+    try:
+        with open('/proc/cpuinfo') as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return 'avx512_bf16' in flags or 'amx_bf16' in flags
+
+
+def _add_lora_adapters(model, rank):
+    try:
+        from peft import LoraConfig, get_peft_model
+    except ImportError:
+        raise ImportError("LoRA training needs the peft package: pip install peft")
+    config = LoraConfig(task_type='CAUSAL_LM', r=rank, lora_alpha=2 * rank, lora_dropout=0.05,
+                        target_modules=LORA_TARGET_MODULES, fan_in_fan_out=True)
+    return get_peft_model(model, config)
+
+
+class EpochTimer(TrainerCallback):
+    """Records the wall-clock seconds of every training epoch in ``epochs``."""
+    
+    def __init__(self):
+        self.epochs = []
+        self._started = None
+    
+    def on_epoch_begin(self, args, state, control, **kwargs):
+        self._started = time.perf_counter()
+    
+    def on_epoch_end(self, args, state, control, **kwargs):
+        self.epochs.append(time.perf_counter() - self._started)
+
+
+def train_model(model_name='microsoft/DialoGPT-small', output_dir='./trained_model', profile='default',
+                callbacks=None, db=None, corpus=None, **overrides):
+    settings = {**TRAINING_PROFILES[profile], **{k: v for k, v in overrides.items() if v is not None}}
+    if settings['bf16'] == 'auto':
+        settings['bf16'] = bf16_supported()
+    if settings['threads']:
+        torch.set_num_threads(settings['threads'])
+    
     # Initialize tokenizer and model
     tokenizer = AutoTokenizer.from_pretrained(model_name)
     model = AutoModelForCausalLM.from_pretrained(model_name)
     
-    # Prepare dataset
-    dataset = DonationDataset(tokenizer)
+    if settings['gradient_checkpointing']:
+        # Recompute activations in the backward pass instead of keeping them
+        model.config.use_cache = False
+        model.gradient_checkpointing_enable()
+    if settings['lora']:
+        model = _add_lora_adapters(model, settings.get('lora_rank', 8))
+        if settings['gradient_checkpointing']:
+            # The frozen embeddings would otherwise cut the graph at the first checkpoint
+            model.enable_input_require_grads()
+        model.print_trainable_parameters()
+    
+    # DialoGPT has no padding token; padded positions are masked out anyway
+    pad_token_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+    
+    # Prepare dataset, holding some back to stop on when it stops improving
+    dataset = DonationDataset(tokenizer, max_length=settings['max_length'], db=db, corpus=corpus)
+    eval_dataset = None
+    eval_size = int(len(dataset) * settings['eval_fraction'])
+    if eval_size:
+        dataset, eval_dataset = random_split(dataset, [len(dataset) - eval_size, eval_size],
+                                             generator=torch.Generator().manual_seed(42))
     
     # Define training arguments
     training_args = TrainingArguments(
         output_dir=output_dir,
-        num_train_epochs=3,
-        per_device_train_batch_size=4,
-        gradient_accumulation_steps=4,
-        learning_rate=2e-5,
+        num_train_epochs=settings['epochs'],
+        per_device_train_batch_size=settings['batch_size'],
+        per_device_eval_batch_size=settings['batch_size'],
+        gradient_accumulation_steps=settings['gradient_accumulation_steps'],
+        learning_rate=settings['learning_rate'],
         weight_decay=0.01,
+        evaluation_strategy='epoch' if eval_dataset else 'no',
         save_strategy='epoch',
+        save_total_limit=2,
+        load_best_model_at_end=eval_dataset is not None,
+        metric_for_best_model='eval_loss',
+        greater_is_better=False,
         logging_dir='./logs',
         logging_steps=10,
-        fp16=torch.cuda.is_available(),
-        remove_unused_columns=False
+        fp16=torch.cuda.is_available() and not settings['bf16'],
+        bf16=settings['bf16'],
+        use_cpu=not torch.cuda.is_available(),
+        dataloader_num_workers=settings['num_workers'],
+        remove_unused_columns=False,
+        # Batches examples of similar length together, so less padding
+        group_by_length=True
     )
     
+    callbacks = list(callbacks or [])
+    if eval_dataset is not None and settings['early_stopping_patience']:
+        callbacks.append(EarlyStoppingCallback(early_stopping_patience=settings['early_stopping_patience']))
+    
     # Initialize trainer
     trainer = Trainer(
         model=model,
         args=training_args,
         train_dataset=dataset,
+        eval_dataset=eval_dataset,
         tokenizer=tokenizer,
-        data_collator=lambda data: {'input_ids': torch.stack([f['input_ids'] for f in data]),
-                                  'attention_mask': torch.stack([f['attention_mask'] for f in data]),
-                                  'labels': torch.stack([f['labels'] for f in data])}
+        data_collator=DynamicPaddingCollator(pad_token_id),
+        callbacks=callbacks
     )
     
     # Train the model
     trainer.train()
     
-    # Save the trained model
-    trainer.save_model()
+    # Save the trained model; adapters are merged in so the output loads
+    # like any other checkpoint (see llm_backends.LocalModelBackend)
+    model = trainer.model
+    if settings['lora']:
+        model = model.merge_and_unload()
+    model.config.use_cache = True
+    model.save_pretrained(output_dir)
     tokenizer.save_pretrained(output_dir)
     
     return model, tokenizer
 
-if __name__ == '__main__':
+def main():
+    parser = argparse.ArgumentParser(description='Fine-tune the chat model on the training corpus.')
+    parser.add_argument('--model', default='microsoft/DialoGPT-small', help='base model name or path')
+    parser.add_argument('--output-dir', default='./trained_model')
+    parser.add_argument('--profile', choices=sorted(TRAINING_PROFILES), default='default',
+                        help="'cpu' trains LoRA adapters with checkpointing and early stopping")
+    parser.add_argument('--epochs', type=float)
+    parser.add_argument('--batch-size', type=int)
+    parser.add_argument('--gradient-accumulation-steps', type=int)
+    parser.add_argument('--learning-rate', type=float)
+    parser.add_argument('--max-length', type=int, help='tokens per example')
+    parser.add_argument('--lora', action=argparse.BooleanOptionalAction, help='train LoRA adapters only')
+    parser.add_argument('--lora-rank', type=int)
+    parser.add_argument('--gradient-checkpointing', action=argparse.BooleanOptionalAction)
+    parser.add_argument('--num-workers', type=int, help='DataLoader worker processes')
+    parser.add_argument('--bf16', action=argparse.BooleanOptionalAction, help='default: auto-detect in the cpu profile')
+    parser.add_argument('--eval-fraction', type=float, help='share of examples held out for early stopping')
+    parser.add_argument('--early-stopping-patience', type=int, help='epochs without improvement before stopping')
+    parser.add_argument('--threads', type=int, help='torch intra-op threads')
+    args = vars(parser.parse_args())
+    
     # Train the model
     print('Starting model training...')
-    model, tokenizer = train_model()
-    print('Training completed successfully!')
\ No newline at end of file
+    timer = EpochTimer()
+    train_model(args.pop('model'), args.pop('output_dir'), args.pop('profile'), callbacks=[timer], **args)
+    for epoch, seconds in enumerate(timer.epochs, 1):
+        print(f'Epoch {epoch}: {seconds:.1f}s')
+    print('Training completed successfully!')
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,290 @@
+import argparse
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Any, List
+
+from database import DonationDatabase
+
+# email_notifications is an outbox: the app inserts 'pending' rows in the
+# same transaction as the donation, and NotificationDispatcher delivers them
+# later on its own threads. Rows move pending -> sending -> sent, or back to
+# pending with a backoff delay when delivery fails, and to 'failed' once
+# they run out of attempts.
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class Transport(ABC):
+    """Interface every notification transport implements."""
+
+    name = 'base'
+
+    @abstractmethod
+    def send(self, notification: Dict[str, Any]):
+        """Deliver one notification or raise."""
+
+
+class FileTransport(Transport):
+    """Appends each notification to a JSON-lines file; for local runs and tests."""
+
+    name = 'file'
+
+    def __init__(self, path: str = 'notifications_outbox.jsonl'):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, notification: Dict[str, Any]):
+        line = json.dumps({**notification, 'delivered_at': datetime.now().strftime(DATE_FORMAT)})
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+
+class SMTPTransport(Transport):
+    """Sends each notification as an email.
+
+    The defaults point at a local debugging server, e.g.
+    ``python -m aiosmtpd -n -l localhost:1025``, which prints messages
+    instead of delivering them. ``recipient`` receives every notification;
+    without one it goes to the donor's address.
+    """
+
+    name = 'smtp'
+
+    def __init__(self, host: str = None, port: int = None, sender: str = None, recipient: str = None):
+        self.host = host or os.getenv('SMTP_HOST', 'localhost')
+        self.port = int(port or os.getenv('SMTP_PORT', 1025))
+        self.sender = sender or os.getenv('NOTIFICATION_SENDER', 'donations@localhost')
+        self.recipient = recipient or os.getenv('NOTIFICATION_RECIPIENT')
+
+    def send(self, notification: Dict[str, Any]):
+        import smtplib
+        from email.message import EmailMessage
+
+        recipient = self.recipient or notification.get('email')
+        if not recipient:
+            raise ValueError(f"No recipient for notification {notification['id']}")
+        message = EmailMessage()
+        message['From'] = self.sender
+        message['To'] = recipient
+        message['Subject'] = notification['type'].replace('_', ' ').capitalize()
+        message.set_content(notification['message'])
+        with smtplib.SMTP(self.host, self.port, timeout=10) as smtp:
+            smtp.send_message(message)
+
+
+TRANSPORTS = {
+    'file': FileTransport,
+    'smtp': SMTPTransport,
+}
+
+
+def create_transport(name: str = None, **kwargs) -> Transport:
+    """Build the transport named by ``name`` or the NOTIFICATION_TRANSPORT environment variable."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    name = (name or os.getenv('NOTIFICATION_TRANSPORT') or 'file').lower()
+    if name not in TRANSPORTS:
+        raise ValueError(f"Unknown notification transport '{name}'. Choose one of: {', '.join(TRANSPORTS)}")
+    return TRANSPORTS[name](**kwargs)
+
+
+class NotificationDispatcher:
+    """Claims pending notifications in batches and delivers them concurrently.
+
+    A claim marks rows 'sending' inside a BEGIN IMMEDIATE transaction, so
+    several dispatchers can share the outbox. Claims older than
+    ``lease_seconds`` (a dispatcher that died mid-batch) are returned to
+    pending. Failed deliveries are retried after ``base_delay * 2**(n-1)``
+    seconds, capped at ``max_delay``, up to ``max_attempts`` times.
+    """
+
+    def __init__(self, db: DonationDatabase, transport: Transport = None, batch_size: int = 50,
+                 max_workers: int = 4, max_attempts: int = 5, base_delay: float = 30.0,
+                 max_delay: float = 3600.0, lease_seconds: float = 300.0, poll_interval: float = 5.0):
+        self.db = db
+        self.transport = transport or create_transport()
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='notification-send')
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.stats = {'sent': 0, 'retried': 0, 'failed': 0, 'batches': 0, 'busy_seconds': 0.0}
+
+    def claim(self, now: datetime = None) -> List[Dict[str, Any]]:
+        """Mark up to batch_size due notifications 'sending' and return them."""
+        now = now or datetime.now()
+        now_text = now.strftime(DATE_FORMAT)
+        expired = (now - timedelta(seconds=self.lease_seconds)).strftime(DATE_FORMAT)
+        with self.db.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("""
+                UPDATE email_notifications SET status = 'pending', claimed_at = NULL
+                WHERE status = 'sending' AND claimed_at < ?
+            """, (expired,))
+            cursor = conn.execute("""
+                SELECT n.id, n.donor_id, n.type, n.message, n.created_at, n.attempts,
+                       p.name, p.email
+                FROM email_notifications n
+                LEFT JOIN donor_profiles p ON p.id = n.donor_id
+                WHERE n.status = 'pending' AND (n.next_attempt_at IS NULL OR n.next_attempt_at <= ?)
+                ORDER BY n.created_at
+                LIMIT ?
+            """, (now_text, self.batch_size))
+            columns = [column[0] for column in cursor.description]
+            claimed = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            conn.executemany(
+                "UPDATE email_notifications SET status = 'sending', claimed_at = ? WHERE id = ?",
+                [(now_text, notification['id']) for notification in claimed]
+            )
+        return claimed
+
+    def _deliver(self, notification):
+        try:
+            self.transport.send(notification)
+            return None
+        except Exception as e:
+            return str(e) or type(e).__name__
+
+    def dispatch_once(self, now: datetime = None) -> Dict[str, int]:
+        """Claim one batch, deliver it and record the outcome of every row."""
+        started = time.perf_counter()
+        claimed = self.claim(now)
+        if not claimed:
+            return {'claimed': 0, 'sent': 0, 'retried': 0, 'failed': 0}
+
+        errors = list(self._executor.map(self._deliver, claimed))
+        now = now or datetime.now()
+        now_text = now.strftime(DATE_FORMAT)
+        sent, retried, failed = [], [], []
+        for notification, error in zip(claimed, errors):
+            attempts = notification['attempts'] + 1
+            if error is None:
+                sent.append((now_text, attempts, notification['id']))
+            elif attempts >= self.max_attempts:
+                failed.append((attempts, error, notification['id']))
+            else:
+                delay = min(self.base_delay * 2 ** (attempts - 1), self.max_delay)
+                retry_at = (now + timedelta(seconds=delay)).strftime(DATE_FORMAT)
+                retried.append((attempts, retry_at, error, notification['id']))
+
+        with self.db.connection() as conn:
+            conn.executemany("""
+                UPDATE email_notifications
+                SET status = 'sent', sent_at = ?, attempts = ?, claimed_at = NULL, last_error = NULL
+                WHERE id = ?
+            """, sent)
+            conn.executemany("""
+                UPDATE email_notifications
+                SET status = 'pending', attempts = ?, next_attempt_at = ?, last_error = ?, claimed_at = NULL
+                WHERE id = ?
+            """, retried)
+            conn.executemany("""
+                UPDATE email_notifications
+                SET status = 'failed', attempts = ?, last_error = ?, claimed_at = NULL
+                WHERE id = ?
+            """, failed)
+
+        with self._lock:
+            self.stats['sent'] += len(sent)
+            self.stats['retried'] += len(retried)
+            self.stats['failed'] += len(failed)
+            self.stats['batches'] += 1
+            self.stats['busy_seconds'] += time.perf_counter() - started
+        return {'claimed': len(claimed), 'sent': len(sent), 'retried': len(retried), 'failed': len(failed)}
+
+    def drain(self, now: datetime = None) -> Dict[str, int]:
+        """Dispatch batches until nothing due is left."""
+        totals = {'claimed': 0, 'sent': 0, 'retried': 0, 'failed': 0}
+        while not self._stopping.is_set():
+            result = self.dispatch_once(now)
+            for key in totals:
+                totals[key] += result[key]
+            if result['claimed'] < self.batch_size:
+                break
+        return totals
+
+    def metrics(self) -> Dict[str, Any]:
+        """Delivery counters, throughput while busy and the current queue depth."""
+        with self.db.connection() as conn:
+            depth = dict(conn.execute("""
+                SELECT status, COUNT(*) FROM email_notifications
+                WHERE status IN ('pending', 'sending')
+                GROUP BY status
+            """).fetchall())
+            oldest = conn.execute("""
+                SELECT MIN(created_at) FROM email_notifications WHERE status = 'pending'
+            """).fetchone()[0]
+        with self._lock:
+            stats = dict(self.stats)
+        busy = stats.pop('busy_seconds')
+        return {
+            **stats,
+            'throughput': round(stats['sent'] / busy, 1) if busy else 0.0,
+            'pending': depth.get('pending', 0),
+            'in_flight': depth.get('sending', 0),
+            'oldest_pending': oldest,
+        }
+
+    def wake(self):
+        """Check the outbox now instead of at the next poll."""
+        self._wake.set()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name='notification-dispatcher', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _loop(self):
+        while not self._stopping.is_set():
+            try:
+                self.drain()
+            except Exception as e:
+                print(f"Error dispatching notifications: {str(e)}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Deliver pending donation notifications.')
+    parser.add_argument('--db', default='donations.db', help='database file (default: donations.db)')
+    parser.add_argument('--transport', choices=sorted(TRANSPORTS), help='default: NOTIFICATION_TRANSPORT or file')
+    parser.add_argument('--watch', type=float, metavar='SECONDS', help='keep running, checking every SECONDS')
+    args = parser.parse_args()
+
+    dispatcher = NotificationDispatcher(DonationDatabase(args.db), create_transport(args.transport))
+    try:
+        while True:
+            result = dispatcher.drain()
+            metrics = dispatcher.metrics()
+            print(f"sent {result['sent']}, retrying {result['retried']}, failed {result['failed']}; "
+                  f"{metrics['pending']} pending, {metrics['throughput']} sent/s")
+            if not args.watch:
+                break
+            time.sleep(args.watch)
+    finally:
+        dispatcher.stop()
+
+
+if __name__ == '__main__':
+    main()
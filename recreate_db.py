@@ -1,33 +1,23 @@
 import sqlite3
+from migrations import migrate
 
 def recreate_donations_table():
     try:
         with sqlite3.connect('donations.db') as conn:
             cursor = conn.cursor()
             
-            # Drop existing table
+            # Drop existing table (its indexes go with it)
             cursor.execute('DROP TABLE IF EXISTS donations')
-            
-            # Create table with all required columns
-            cursor.execute('''
-                CREATE TABLE donations (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    donor_name TEXT NOT NULL,
-                    amount REAL NOT NULL,
-                    category TEXT NOT NULL,
-                    date TEXT NOT NULL,
-                    notes TEXT,
-                    is_recurring BOOLEAN DEFAULT 0,
-                    recurring_interval TEXT,
-                    next_donation_date TEXT
-                )
-            ''')
-            
             conn.commit()
+            
+            # Replay the migrations so the table and indexes match the
+            # schema the rest of the app expects
+            cursor.execute('PRAGMA user_version = 0')
+            migrate(conn)
             print('Successfully recreated donations table')
             
     except Exception as e:
         print(f'Error recreating database: {str(e)}')
 
 if __name__ == '__main__':
-    recreate_donations_table()
\ No newline at end of file
+    recreate_donations_table()
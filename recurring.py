@@ -0,0 +1,165 @@
+import argparse
+import calendar
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Any
+
+from database import DonationDatabase
+
+# A recurring donation is a donations row with is_recurring = 1; its
+# next_donation_date is when the next copy is due. process_due() inserts a
+# plain donation for every occurrence that has come due (catching up on
+# missed ones) and moves next_donation_date forward, in batch transactions.
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+INTERVALS = ('Weekly', 'Monthly', 'Quarterly', 'Yearly')
+INTERVAL_MONTHS = {'Monthly': 1, 'Quarterly': 3, 'Yearly': 12}
+MAX_CATCH_UP = 400  # occurrences per schedule per batch
+
+# Matches the partial index idx_donations_next_due (see migrations.py)
+DUE_QUERY = """
+    SELECT id, donor_name, amount, category, date, notes, recurring_interval, next_donation_date
+    FROM donations
+    WHERE is_recurring = 1 AND next_donation_date IS NOT NULL AND next_donation_date <= ?
+    ORDER BY next_donation_date
+    LIMIT ?
+"""
+
+
+def add_months(date: datetime, months: int, day: int = None) -> datetime:
+    """Move ``date`` by whole months, clamping the day to the month's length.
+
+    ``day`` is the day of month the schedule started on, so a donation made
+    on the 31st goes Jan 31 -> Feb 28 -> Mar 31 instead of drifting to the 28th.
+    """
+    month_index = date.month - 1 + months
+    year, month = date.year + month_index // 12, month_index % 12 + 1
+    day = min(day or date.day, calendar.monthrange(year, month)[1])
+    return date.replace(year=year, month=month, day=day)
+
+
+def next_occurrence(date: datetime, interval: str, anchor_day: int = None) -> datetime:
+    """The occurrence after ``date`` for a Weekly/Monthly/Quarterly/Yearly schedule."""
+    interval = (interval or '').strip().capitalize()
+    if interval == 'Weekly':
+        return date + timedelta(weeks=1)
+    if interval in INTERVAL_MONTHS:
+        return add_months(date, INTERVAL_MONTHS[interval], anchor_day)
+    raise ValueError(f"Unknown recurring interval '{interval}'")
+
+
+def process_due(db: DonationDatabase, now: datetime = None, batch_size: int = 1000) -> Dict[str, Any]:
+    """Materialize every occurrence due by ``now`` and advance the schedules.
+
+    Each batch of schedules is one BEGIN IMMEDIATE transaction, so two
+    runners (the app and the CLI, say) never create the same occurrence.
+    A schedule whose dates or interval can't be read is stopped (its
+    next_donation_date cleared) and reported in ``errors``.
+    """
+    now = now or datetime.now()
+    now_text = now.strftime(DATE_FORMAT)
+    result = {'schedules': 0, 'created': 0, 'errors': [], 'seconds': 0.0}
+    started = time.perf_counter()
+
+    while True:
+        with db.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            due = conn.execute(DUE_QUERY, (now_text, batch_size)).fetchall()
+            if not due:
+                break
+            donations, advanced, stopped = [], [], []
+            for schedule_id, donor, amount, category, date, notes, interval, next_date in due:
+                try:
+                    anchor_day = datetime.fromisoformat(date).day
+                    occurrence = datetime.fromisoformat(next_date)
+                    created = []
+                    for _ in range(MAX_CATCH_UP):
+                        if occurrence > now:
+                            break
+                        created.append((donor, amount, category, occurrence.strftime(DATE_FORMAT), notes))
+                        occurrence = next_occurrence(occurrence, interval, anchor_day)
+                    donations.extend(created)
+                    advanced.append((occurrence.strftime(DATE_FORMAT), schedule_id))
+                except ValueError as e:
+                    result['errors'].append((schedule_id, str(e)))
+                    stopped.append((schedule_id,))
+            conn.executemany("""
+                INSERT INTO donations (donor_name, amount, category, date, notes)
+                VALUES (?, ?, ?, ?, ?)
+            """, donations)
+            conn.executemany("UPDATE donations SET next_donation_date = ? WHERE id = ?", advanced)
+            conn.executemany("UPDATE donations SET next_donation_date = NULL WHERE id = ?", stopped)
+        result['schedules'] += len(advanced)
+        result['created'] += len(donations)
+
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+
+class RecurringScheduler:
+    """Calls process_due() on a background thread every ``interval`` seconds.
+
+    ``on_run(result)`` is called on that thread after every run that created
+    donations; Tk code should hand the result to the main loop itself.
+    """
+
+    def __init__(self, db: DonationDatabase, interval: float = 60.0,
+                 on_run: Callable[[Dict[str, Any]], None] = None):
+        self.db = db
+        self.interval = interval
+        self.on_run = on_run
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name='recurring-donations', daemon=True)
+            self._thread.start()
+
+    def run_now(self):
+        self._wake.set()
+
+    def stop(self, timeout: float = None):
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self):
+        while not self._stopping.is_set():
+            try:
+                result = process_due(self.db)
+                if result['created'] and self.on_run:
+                    self.on_run(result)
+            except Exception as e:
+                print(f"Error processing recurring donations: {str(e)}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Create the donations that recurring schedules have made due.')
+    parser.add_argument('--db', default='donations.db', help='database file (default: donations.db)')
+    parser.add_argument('--now', type=datetime.fromisoformat,
+                        help="process as if it were this time, e.g. '2025-01-31 09:00:00'")
+    parser.add_argument('--batch-size', type=int, default=1000, help='schedules per transaction')
+    parser.add_argument('--watch', type=float, metavar='SECONDS', help='keep running, checking every SECONDS')
+    args = parser.parse_args()
+
+    db = DonationDatabase(args.db)
+    while True:
+        result = process_due(db, now=args.now, batch_size=args.batch_size)
+        print(f"{datetime.now().strftime(DATE_FORMAT)}: {result['created']} donation(s) from "
+              f"{result['schedules']} schedule(s) in {result['seconds']:.2f}s")
+        for schedule_id, message in result['errors']:
+            print(f"  stopped schedule {schedule_id}: {message}")
+        if not args.watch:
+            break
+        time.sleep(args.watch)
+
+
+if __name__ == '__main__':
+    main()
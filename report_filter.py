@@ -0,0 +1,110 @@
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple, Union
+
+# The donations a report or export covers. Dates are stored as TEXT in
+# 'YYYY-MM-DD HH:MM:SS' form, which sorts the same way as the dates it
+# spells, so a whole-day range becomes date >= 'start' AND date < 'day after
+# end' on the bare column: a range search on idx_donations_date, or on
+# idx_donations_category_date when a category is chosen too. Wrapping the
+# column in date() or substr() would turn that into a full table scan.
+
+DATE_RANGES = ('Last 7 Days', 'Last 30 Days', 'Last 90 Days', 'This Quarter', 'This Year', 'All Time')
+ALL_CATEGORIES = 'All Categories'
+
+DateLike = Union[str, date, datetime, None]
+
+
+def _as_date(value: DateLike) -> Optional[date]:
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value).strip()[:10])
+
+
+class ReportFilter:
+    """Date range (whole days, inclusive), category and donor a report is limited to.
+
+    Any part left as None is not filtered on; an empty filter covers every
+    donation.
+    """
+
+    def __init__(self, start: DateLike = None, end: DateLike = None, category: str = None, donor: str = None):
+        self.start = _as_date(start)
+        self.end = _as_date(end)
+        if self.start and self.end and self.start > self.end:
+            raise ValueError(f"Start date {self.start} is after end date {self.end}")
+        self.category = category or None
+        self.donor = donor or None
+
+    @classmethod
+    def from_selection(cls, date_range: str = None, category: str = None, donor: str = None,
+                       today: date = None) -> 'ReportFilter':
+        """Build a filter from the Reports tab's date range, category and donor fields."""
+        today = _as_date(today) or date.today()
+        start = None
+        if date_range in ('Last 7 Days', 'Last 30 Days', 'Last 90 Days'):
+            start = today - timedelta(days=int(date_range.split()[1]) - 1)
+        elif date_range == 'This Quarter':
+            start = today.replace(month=(today.month - 1) // 3 * 3 + 1, day=1)
+        elif date_range == 'This Year':
+            start = today.replace(month=1, day=1)
+        elif date_range not in (None, '', 'All Time'):
+            raise ValueError(f"Unknown date range '{date_range}'")
+        category = None if category in (None, '', ALL_CATEGORIES) else category
+        return cls(start, today if start else None, category, (donor or '').strip() or None)
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.start or self.end or self.category or self.donor)
+
+    def date_bounds(self) -> Tuple[Optional[str], Optional[str]]:
+        """``(lower, upper)`` text bounds: lower inclusive, upper exclusive."""
+        lower = self.start.isoformat() if self.start else None
+        upper = (self.end + timedelta(days=1)).isoformat() if self.end else None
+        return lower, upper
+
+    def where(self, alias: str = None) -> Tuple[str, List]:
+        """SQL condition and parameters; ``'1'`` when nothing is filtered."""
+        column = f"{alias}." if alias else ''
+        lower, upper = self.date_bounds()
+        conditions, params = [], []
+        if self.category:
+            conditions.append(f"{column}category = ?")
+            params.append(self.category)
+        if self.donor:
+            # Resolved once through the unique name index, then an integer
+            # range scan over idx_donations_donor_id_date
+            conditions.append(f"{column}donor_id = (SELECT id FROM donor_profiles WHERE name = ?)")
+            params.append(self.donor)
+        if lower:
+            conditions.append(f"{column}date >= ?")
+            params.append(lower)
+        if upper:
+            conditions.append(f"{column}date < ?")
+            params.append(upper)
+        return ' AND '.join(conditions) or '1', params
+
+    def describe(self) -> str:
+        """Short human-readable summary for report headers."""
+        if self.start and self.end:
+            parts = [f"{self.start.isoformat()} to {self.end.isoformat()}"]
+        elif self.start:
+            parts = [f"from {self.start.isoformat()}"]
+        elif self.end:
+            parts = [f"until {self.end.isoformat()}"]
+        else:
+            parts = ['all dates']
+        parts.append(self.category or 'all categories')
+        if self.donor:
+            parts.append(f"donor {self.donor}")
+        return ', '.join(parts)
+
+    def __eq__(self, other):
+        return isinstance(other, ReportFilter) and vars(self) == vars(other)
+
+    def __repr__(self):
+        return (f"ReportFilter(start={self.start}, end={self.end}, "
+                f"category={self.category!r}, donor={self.donor!r})")
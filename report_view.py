@@ -0,0 +1,68 @@
+from typing import List, Sequence, Tuple
+
+# Each Reports sub-tab owns one tk.Text for its whole life. ReportView.show()
+# compares the new report with what is on screen and rewrites only the lines
+# in between the unchanged head and tail, so refreshing an identical report
+# touches nothing and "load more" only appends. Big edits are inserted a
+# chunk at a time from the Tk event loop so the window keeps responding.
+
+
+def diff_lines(old: Sequence[str], new: Sequence[str]) -> Tuple[int, int, List[str]]:
+    """``(start, old_end, replacement)``: old[start:old_end] becomes replacement."""
+    limit = min(len(old), len(new))
+    start = 0
+    while start < limit and old[start] == new[start]:
+        start += 1
+    tail = 0
+    while tail < limit - start and old[-1 - tail] == new[-1 - tail]:
+        tail += 1
+    return start, len(old) - tail, list(new[start:len(new) - tail])
+
+
+class ReportView:
+    """Shows line-oriented reports in one read-only Text widget."""
+
+    def __init__(self, text, chunk_lines: int = 200):
+        self.text = text
+        self.chunk_lines = chunk_lines
+        self._lines: List[str] = []  # what the widget holds right now
+        self._job = None
+
+    @property
+    def busy(self) -> bool:
+        """True while a large update is still being inserted."""
+        return self._job is not None
+
+    def show(self, lines: Sequence[str]):
+        """Make the widget read ``lines``, replacing any update still in progress."""
+        if self._job is not None:
+            self.text.after_cancel(self._job)
+            self._job = None
+        start, old_end, replacement = diff_lines(self._lines, lines)
+        if start == old_end and not replacement:
+            return
+        self._edit(lambda: self.text.delete(f'{start + 1}.0', f'{old_end + 1}.0'))
+        del self._lines[start:old_end]
+        self._insert(start, replacement)
+
+    def _insert(self, at: int, lines: List[str]):
+        chunk, rest = lines[:self.chunk_lines], lines[self.chunk_lines:]
+        if chunk:
+            self._edit(lambda: self.text.insert(f'{at + 1}.0', ''.join(line + '\n' for line in chunk)))
+            self._lines[at:at] = chunk
+        if rest:
+            self._job = self.text.after(1, self._continue, at + len(chunk), rest)
+
+    def _continue(self, at: int, lines: List[str]):
+        self._job = None
+        self._insert(at, lines)
+
+    def _edit(self, change):
+        self.text.configure(state='normal')
+        try:
+            change()
+        finally:
+            self.text.configure(state='disabled')
+
+    def clear(self):
+        self.show([])
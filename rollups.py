@@ -0,0 +1,119 @@
+import sqlite3
+import sys
+from typing import List
+
+# Aggregate tables kept current by the triggers created in migrations.py, so
+# report and chatbot reads cost O(groups) instead of scanning every donation.
+# rebuild() and check() recompute them from the donations table directly.
+
+ROLLUP_QUERIES = {
+    'category_totals': (
+        ['category'],
+        '''
+        SELECT category, COUNT(*), SUM(amount)
+        FROM donations
+        GROUP BY category
+        ''',
+        'SELECT category, donation_count, total_amount FROM category_totals'
+    ),
+    'donor_totals': (
+        ['donor_name'],
+        '''
+        SELECT donor_name, COUNT(*), SUM(amount), MAX(date)
+        FROM donations
+        GROUP BY donor_name
+        ''',
+        'SELECT donor_name, donation_count, total_amount, last_donation_date FROM donor_totals'
+    ),
+    'monthly_category_totals': (
+        ['month', 'category'],
+        '''
+        SELECT substr(date, 1, 7), category, COUNT(*), SUM(amount)
+        FROM donations
+        GROUP BY substr(date, 1, 7), category
+        ''',
+        'SELECT month, category, donation_count, total_amount FROM monthly_category_totals'
+    ),
+}
+
+# donor_profiles.total_donations and last_donation_date are kept by the
+# triggers too, but the profiles also hold contact details, so they are
+# updated in place rather than deleted and re-inserted
+DONOR_PROFILE_QUERIES = (
+    '''
+    SELECT p.id, COALESCE(SUM(d.amount), 0), MAX(d.date)
+    FROM donor_profiles p
+    LEFT JOIN donations d ON d.donor_id = p.id
+    GROUP BY p.id
+    ''',
+    'SELECT id, COALESCE(total_donations, 0), last_donation_date FROM donor_profiles'
+)
+
+# Totals drift by float rounding as rows are added and removed
+AMOUNT_TOLERANCE = 0.005
+
+
+def rebuild(conn: sqlite3.Connection):
+    """Replace the contents of every rollup table with a full recompute."""
+    cursor = conn.cursor()
+    for table, (_keys, recompute, _read) in ROLLUP_QUERIES.items():
+        cursor.execute(f"DELETE FROM {table}")
+        cursor.execute(f"INSERT INTO {table} {recompute}")
+
+
+def rebuild_donor_profiles(conn: sqlite3.Connection):
+    """Recompute every profile's donation total and most recent donation date."""
+    conn.execute('''
+        UPDATE donor_profiles
+        SET total_donations = COALESCE((SELECT SUM(amount) FROM donations WHERE donor_id = donor_profiles.id), 0),
+            last_donation_date = (SELECT MAX(date) FROM donations WHERE donor_id = donor_profiles.id)
+    ''')
+
+
+def check(conn: sqlite3.Connection) -> List[str]:
+    """Compare each rollup against a full recompute and describe any drift."""
+    problems = []
+    tables = [(table, keys, recompute, read) for table, (keys, recompute, read) in ROLLUP_QUERIES.items()]
+    tables.append(('donor_profiles', ['id'], *DONOR_PROFILE_QUERIES))
+    for table, keys, recompute, read in tables:
+        width = len(keys)
+        expected = {row[:width]: row[width:] for row in conn.execute(recompute)}
+        actual = {row[:width]: row[width:] for row in conn.execute(read)}
+        for key in expected.keys() | actual.keys():
+            want, have = expected.get(key), actual.get(key)
+            if want is None:
+                problems.append(f"{table} {key}: unexpected row {have}")
+            elif have is None:
+                problems.append(f"{table} {key}: missing, expected {want}")
+            elif not _same(want, have):
+                problems.append(f"{table} {key}: expected {want}, found {have}")
+    return problems
+
+
+def _same(want, have) -> bool:
+    for expected, actual in zip(want, have):
+        if isinstance(expected, float) or isinstance(actual, float):
+            if abs((expected or 0.0) - (actual or 0.0)) > AMOUNT_TOLERANCE:
+                return False
+        elif expected != actual:
+            return False
+    return True
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'check'
+    db_path = sys.argv[2] if len(sys.argv) > 2 else 'donations.db'
+    with sqlite3.connect(db_path) as conn:
+        if command == 'rebuild':
+            rebuild(conn)
+            rebuild_donor_profiles(conn)
+            print('Rollup tables rebuilt')
+        elif command == 'check':
+            problems = check(conn)
+            for problem in problems:
+                print(problem)
+            print('Rollups are consistent' if not problems else f'{len(problems)} inconsistencies found')
+            sys.exit(1 if problems else 0)
+        else:
+            print('Usage: python rollups.py [check|rebuild] [db_path]')
+            sys.exit(2)
@@ -0,0 +1,108 @@
+import os
+import random
+import sqlite3
+import sys
+sys.path.append(os.getcwd())
+
+import pytest
+
+from analytics import DonationAnalytics
+
+
+@pytest.fixture
+def db(db):
+    rng = random.Random(3)
+    db.add_donations_bulk(
+        {'donor_name': f'Donor {rng.randrange(40)}', 'amount': round(rng.uniform(1, 500), 2),
+         'category': rng.choice(['General', 'Project', 'Emergency']),
+         'date': f'2024-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d} 10:00:00'}
+        for _ in range(600)
+    )
+    return db
+
+
+def assert_matches_rollups(db, analytics):
+    with db.connection() as conn:
+        categories = conn.execute("SELECT category, donation_count, total_amount FROM category_totals ORDER BY category").fetchall()
+        donors = conn.execute("""
+            SELECT donor_name, donation_count, total_amount, last_donation_date
+            FROM donor_totals ORDER BY total_amount DESC, donor_name
+        """).fetchall()
+        monthly = conn.execute("""
+            SELECT month, category, donation_count, total_amount
+            FROM monthly_category_totals ORDER BY month DESC, category
+        """).fetchall()
+    assert [(r['category'], r['count']) for r in analytics.by_category()] == [c[:2] for c in categories]
+    assert [r['total'] for r in analytics.by_category()] == pytest.approx([c[2] for c in categories])
+    assert [(r['donor_name'], r['count'], r['last_date']) for r in analytics.by_donor()] == \
+        [(d[0], d[1], d[3]) for d in donors]
+    assert [(r['month'], r['category'], r['count']) for r in analytics.monthly()] == [m[:3] for m in monthly]
+    assert analytics.totals()['total'] == pytest.approx(db.get_total_donations())
+
+
+def test_rollups_match_the_sql_rollup_tables(db):
+    analytics = DonationAnalytics(db)
+    analytics.refresh()
+    assert analytics.size == 600
+    assert_matches_rollups(db, analytics)
+    top = analytics.by_donor(limit=5)
+    assert top == analytics.by_donor()[:5]
+
+
+def test_refresh_appends_new_rows_without_reloading(db):
+    analytics = DonationAnalytics(db)
+    analytics.refresh()
+    loads = []
+    analytics.load = lambda: loads.append(1)
+    db.add_donation('Zed', 1000.0, 'Scholarships', date='2025-01-02 08:00:00')
+    analytics.refresh()
+    assert loads == [] and analytics.size == 601
+    assert {'donor_name': 'Zed', 'count': 1, 'total': 1000.0, 'average': 1000.0,
+            'last_date': '2025-01-02 08:00:00'} in analytics.by_donor()
+    assert analytics.monthly()[0] == {'month': '2025-01', 'category': 'Scholarships', 'count': 1, 'total': 1000.0}
+
+
+def test_refresh_reloads_after_deletes_and_edits(db):
+    analytics = DonationAnalytics(db)
+    analytics.refresh()
+    deleted = db.delete_donations([row[0] for row in db.get_donations_page(limit=10)])
+    analytics.refresh()
+    assert analytics.size == 590
+    assert_matches_rollups(db, analytics)
+
+    db.restore_donations(deleted)
+    with db.connection() as conn:
+        conn.execute("UPDATE donations SET amount = amount + 1 WHERE id = 1")
+    analytics.refresh()
+    assert analytics.size == 600
+    assert_matches_rollups(db, analytics)
+
+
+def test_refresh_reloads_after_donor_and_date_only_edits(db):
+    analytics = DonationAnalytics(db)
+    analytics.refresh()
+    # Same amount and category, so category_totals alone can't tell
+    with db.connection() as conn:
+        conn.execute("UPDATE donations SET donor_name = 'Renamed' WHERE id = 1")
+    analytics.refresh()
+    assert 'Renamed' in [row['donor_name'] for row in analytics.by_donor()]
+    assert_matches_rollups(db, analytics)
+
+    with db.connection() as conn:
+        conn.execute("UPDATE donations SET date = '2023-06-01 10:00:00' WHERE id = 2")
+    analytics.refresh()
+    assert analytics.monthly()[-1]['month'] == '2023-06'
+    assert_matches_rollups(db, analytics)
+
+
+def test_refresh_sees_writes_from_another_process(db):
+    analytics = DonationAnalytics(db)
+    analytics.refresh()
+    other = sqlite3.connect(db.db_path)
+    with other:
+        other.execute("INSERT INTO donations (donor_name, amount, category, date) VALUES ('Ext', 9, 'General', '2025-03-01 10:00:00')")
+        other.execute("UPDATE donations SET donor_name = 'Renamed' WHERE id = 1")
+    other.close()
+    analytics.refresh()
+    assert analytics.size == 601
+    assert_matches_rollups(db, analytics)
@@ -0,0 +1,62 @@
+import os
+import sqlite3
+import sys
+from collections import deque
+sys.path.append(os.getcwd())
+
+import pytest
+
+import app
+from app import DonationTracker
+
+
+class FakeButton:
+    def __init__(self):
+        self.state = None
+
+    def configure(self, state):
+        self.state = state
+
+
+class FakeList:
+    def __init__(self):
+        self.inserted = []
+
+    def insert_rows(self, rows):
+        self.inserted.extend(rows)
+
+
+@pytest.fixture
+def tracker(db, monkeypatch):
+    # Only the state undo_delete touches; no Tk window is created
+    tracker = DonationTracker.__new__(DonationTracker)
+    tracker.db = db
+    tracker._undo_deletes = deque(maxlen=DonationTracker.UNDO_DEPTH)
+    tracker.undo_btn = FakeButton()
+    tracker.donation_list = FakeList()
+    tracker.errors = []
+    monkeypatch.setattr(app.messagebox, 'showerror', lambda title, message: tracker.errors.append(message))
+    return tracker
+
+
+def test_failed_undo_keeps_the_rows_for_another_try(tracker, db, monkeypatch):
+    db.add_donation('Ann', 25.0, 'General', date='2024-03-01 09:00:00')
+    db.add_donation('Bob', 40.0, 'Project', date='2024-03-02 09:00:00')
+    with db.connection() as conn:
+        ids = [row[0] for row in conn.execute("SELECT id FROM donations")]
+    tracker._undo_deletes.append(db.delete_donations(ids))
+
+    def locked(rows):
+        raise sqlite3.OperationalError('database is locked')
+
+    monkeypatch.setattr(db, 'restore_donations', locked)
+    tracker.undo_delete()
+    assert tracker.errors == ['Failed to restore donation(s): database is locked']
+    assert len(tracker._undo_deletes) == 1 and tracker.undo_btn.state == 'normal'
+    assert db.get_total_donations() == 0
+
+    monkeypatch.undo()
+    tracker.undo_delete()
+    assert db.get_total_donations() == 65.0
+    assert sorted(row[0] for row in tracker.donation_list.inserted) == sorted(ids)
+    assert len(tracker._undo_deletes) == 0 and tracker.undo_btn.state == 'disabled'
@@ -3,8 +3,10 @@ import sys
 sys.path.append(os.getcwd())
 
 from chatbot import ChatBot
+import pytest
 import time
 
+@pytest.mark.network
 def test_chatbot():
     bot = ChatBot()
     
@@ -1,7 +1,9 @@
 import sys
 import time
+import pytest
 from chatbot import ChatBot
 
+@pytest.mark.network
 def test_chatbot():
     print('Initializing chatbot...')
     bot = ChatBot()
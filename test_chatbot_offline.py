@@ -0,0 +1,270 @@
+import os
+import sqlite3
+import sys
+import time
+sys.path.append(os.getcwd())
+
+import pytest
+
+from chat_worker import ChatWorker
+from chatbot import ChatBot
+from llm_backends import LLMBackend, ResponseCache, ScriptedBackend, create_backend
+
+
+def echo(prompt):
+    return f"echo {prompt.rsplit('User: ', 1)[-1]}"
+
+
+def wait_for(worker, count, timeout=5.0):
+    results = []
+    deadline = time.monotonic() + timeout
+    while len(results) < count and time.monotonic() < deadline:
+        results.extend(worker.poll())
+        time.sleep(0.01)
+    return results
+
+
+@pytest.fixture
+def bot(db):
+    return ChatBot(db=db, backend=ScriptedBackend())
+
+
+def test_database_context_is_cached_until_a_write(bot, db):
+    db.add_donation('Ann', 40.0, 'General')
+    first = bot._get_database_context()
+    for _ in range(10):
+        assert bot._get_database_context() is first
+    assert bot.context_cache_stats == {'hits': 10, 'misses': 1}
+
+    bot._execute_db_command({'action': 'add_donation', 'donor_name': 'Bob', 'amount': 60.0, 'category': 'Project'})
+    refreshed = bot._get_database_context()
+    assert 'Current total donations: $100.00' in refreshed
+    assert bot.context_cache_stats == {'hits': 10, 'misses': 2}
+
+
+def test_read_commands_do_not_invalidate_the_cache(bot):
+    bot._get_database_context()
+    bot._execute_db_command({'action': 'get_donor_statistics'})
+    bot._get_database_context()
+    assert bot.context_cache_stats == {'hits': 1, 'misses': 1}
+
+
+def test_direct_writes_invalidate_the_cache(bot, db):
+    bot._get_database_context()
+    with db.connection() as conn:
+        conn.execute("INSERT INTO donations (donor_name, amount, category, date) VALUES ('Cy', 5, 'Other', '2025-01-01')")
+    assert 'Cy' in bot._get_database_context()
+
+
+def test_writes_from_another_process_invalidate_the_cache(bot, db):
+    bot._get_database_context()
+    other = sqlite3.connect(db.db_path)
+    with other:
+        other.execute("INSERT INTO donations (donor_name, amount, category, date) VALUES ('Di', 7, 'Other', '2025-01-01')")
+    other.close()
+    assert 'Di' in bot._get_database_context()
+    assert bot.context_cache_stats == {'hits': 0, 'misses': 2}
+
+
+def test_worker_answers_in_order_without_blocking_the_caller(bot):
+    bot.backend = ScriptedBackend(echo, delay=0.05)
+    recorded = []
+    worker = ChatWorker(bot.get_response, on_response=lambda m, r: recorded.append(m))
+    try:
+        started = time.monotonic()
+        ids = [worker.submit(f"question {i}") for i in range(3)]
+        assert time.monotonic() - started < 0.05
+        assert worker.pending == 3
+
+        results = wait_for(worker, 3)
+        assert [r['id'] for r in results] == ids
+        assert [r['response'] for r in results] == [f"echo question {i}" for i in range(3)]
+        assert recorded == ["question 0", "question 1", "question 2"]
+        assert worker.pending == 0
+    finally:
+        worker.shutdown()
+
+
+def test_worker_cancels_queued_and_running_requests(bot):
+    bot.backend = ScriptedBackend(echo, delay=0.2)
+    recorded = []
+    worker = ChatWorker(bot.get_response, on_response=lambda m, r: recorded.append(m))
+    try:
+        running = worker.submit("slow one")
+        queued = worker.submit("never sent")
+        time.sleep(0.05)
+        assert worker.cancel(queued)
+        assert worker.cancel(running)
+        assert not worker.cancel(running)
+
+        results = {r['id']: r['status'] for r in wait_for(worker, 2)}
+        assert results == {running: 'cancelled', queued: 'cancelled'}
+        assert recorded == []
+    finally:
+        worker.shutdown()
+
+
+@pytest.mark.parametrize('size', [1, 3, 7, 1000])
+def test_stream_runs_db_commands_split_across_chunks(bot, db, size):
+    command = '{"action": "add_donation", "donor_name": "Dee", "amount": 12.5, "category": "Other"}'
+    bot.backend = ScriptedBackend([f"Sure! [DB_COMMAND]{command}[/DB_COMMAND] Anything else? [DB"], chunk_size=size)
+    chunks = list(bot.stream_response("add a donation"))
+
+    assert len(chunks) > 1 or size == 1000
+    assert "".join(chunks) == "Sure! \nDonation added successfully\n Anything else? [DB"
+    assert not any("DB_COMMAND" in chunk for chunk in chunks)
+    assert db.get_total_donations() == 12.5
+    assert bot.conversation_context[-1]['content'].startswith("Sure!")
+
+
+def test_stream_passes_unterminated_command_through(bot, db):
+    bot.backend = ScriptedBackend(['Oops [DB_COMMAND]{"action": "add_donation"'], chunk_size=4)
+    assert "".join(bot.stream_response("hi")) == 'Oops [DB_COMMAND]{"action": "add_donation"'
+    assert db.get_total_donations() == 0.0
+
+
+def test_worker_reports_stream_chunks_as_partials(bot):
+    bot.backend = ScriptedBackend(["Hello there, donor!"], chunk_size=5)
+    worker = ChatWorker(bot.stream_response, stream=True)
+    try:
+        request_id = worker.submit("hi")
+        results = []
+        deadline = time.monotonic() + 5
+        while not any(r['status'] == 'done' for r in results) and time.monotonic() < deadline:
+            results.extend(worker.poll())
+            time.sleep(0.01)
+        partials = [r['response'] for r in results if r['status'] == 'partial']
+        assert "".join(partials) == "Hello there, donor!"
+        assert results[-1] == {'id': request_id, 'message': 'hi', 'response': 'Hello there, donor!', 'status': 'done'}
+    finally:
+        worker.shutdown()
+
+
+def test_backend_is_chosen_from_environment(monkeypatch):
+    monkeypatch.setenv('CHATBOT_BACKEND', 'scripted')
+    assert isinstance(create_backend(), ScriptedBackend)
+    with pytest.raises(ValueError):
+        create_backend('nonsense')
+
+
+def test_backend_without_generate_fails_at_construction():
+    class Incomplete(LLMBackend):
+        name = 'incomplete'
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_repeated_question_is_answered_from_cache(bot, db):
+    bot.backend = ScriptedBackend(["First answer", "Second answer"])
+    fresh = ChatBot(db=db, backend=bot.backend, response_cache=bot.response_cache)
+
+    assert bot.get_response("Which  causes NEED funding?") == "First answer"
+    assert fresh.get_response("which causes need funding?") == "First answer"
+    assert len(bot.backend.prompts) == 1
+    assert bot.response_cache.stats == {'hits': 1, 'misses': 1}
+
+    # A write changes the data version, so the cached answer is stale
+    db.add_donation('Ann', 10.0, 'General')
+    other = ChatBot(db=db, backend=bot.backend, response_cache=bot.response_cache)
+    assert other.get_response("which causes need funding?") == "Second answer"
+
+
+def test_write_from_another_process_misses_the_persisted_cache(bot, db):
+    bot.backend = ScriptedBackend(["First answer", "Second answer"])
+    assert bot.get_response("Which causes need funding?") == "First answer"
+
+    other = sqlite3.connect(db.db_path)
+    with other:
+        other.execute("INSERT INTO donations (donor_name, amount, category, date) VALUES ('Di', 7, 'Other', '2025-01-01')")
+    other.close()
+    # A restarted app only has the persisted entries to go on
+    restarted = ChatBot(db=db, backend=bot.backend, response_cache=ResponseCache(db=db))
+    assert restarted.get_response("Which causes need funding?") == "Second answer"
+    assert restarted.response_cache.stats == {'hits': 0, 'misses': 1}
+
+
+def test_response_cache_persists_and_evicts(db):
+    cache = ResponseCache(max_size=2, db=db)
+    for i in range(3):
+        cache.put(f"k{i}", f"v{i}")
+    assert list(cache._entries) == ['k1', 'k2']
+
+    restarted = ResponseCache(max_size=2, db=db)
+    assert restarted.get('k0') == 'v0'
+    expired = ResponseCache(ttl=-1, db=db)
+    assert expired.get('k2') is None
+
+
+def test_db_command_responses_are_not_cached(bot, db):
+    reply = 'Done [DB_COMMAND]{"action": "add_donation", "donor_name": "Eve", "amount": 5, "category": "Other"}[/DB_COMMAND]'
+    bot.backend = ScriptedBackend([reply])
+    bot.get_response("add five for Eve")
+    assert bot.response_cache.stats['hits'] == 0
+    assert len(bot.response_cache._entries) == 0
+
+
+def test_donor_commands_upsert_and_keep_donors_with_donations(bot, db):
+    assert bot._execute_db_command({'action': 'add_donor', 'donor_name': 'Ann', 'email': 'ann@example.org'}) \
+        == "Donor added successfully"
+    assert bot._execute_db_command({'action': 'add_donor', 'donor_name': 'Ann', 'phone': '555'}) \
+        == "Donor added successfully"
+    ann = db.get_donor('Ann')
+    assert (ann['email'], ann['phone']) == ('ann@example.org', '555')
+    db.add_donation('Ann', 10.0, 'General')
+    assert bot._execute_db_command({'action': 'remove_donor', 'donor_name': 'Ann'}) \
+        == "Donor has donations and cannot be removed"
+    bot._execute_db_command({'action': 'add_donor', 'donor_name': 'Bob'})
+    assert bot._execute_db_command({'action': 'remove_donor', 'donor_name': 'Bob'}) == "Donor removed successfully"
+    assert bot._execute_db_command({'action': 'remove_donor', 'donor_name': 'Bob'}) == "Donor not found"
+
+
+@pytest.mark.parametrize('question, answer', [
+    ("What's the total?", "Total donations: $175.00"),
+    ("How much has been donated to emergency so far?", "Total donations for Emergency: $75.00"),
+    ("top 1 donors", "Top donors:\n- Ann: $100.00 (1 donations)"),
+    ("show me the last 2 donations", "There are 2 recent donations. Here are the details:\n"
+                                     "- Bob donated $75.00 for Emergency\n- Ann donated $100.00 for General"),
+    ("How much has ann donated?", "Donor found: Ann, Total donations: $100.00 (1 donations, most recent on 2025-01-01 09:00:00)"),
+])
+def test_router_answers_lookups_without_the_model(bot, db, question, answer):
+    db.add_donation('Ann', 100.0, 'General', date='2025-01-01 09:00:00')
+    db.add_donation('Bob', 75.0, 'Emergency', date='2025-01-02 09:00:00')
+    assert bot.get_response(question) == answer
+    assert "".join(bot.stream_response(question)) == answer
+    assert bot.backend.prompts == []
+    assert bot.router.report()['routed'] == 2
+
+
+@pytest.mark.parametrize('question', [
+    "How do I make a donation?",
+    "Add a donation of $5 from Bob",
+    "What is the total for Bitcoin?",
+    "How much has Zed donated?",
+    "Can you help me?",
+])
+def test_router_sends_everything_else_to_the_model(bot, question):
+    bot.get_response(question)
+    assert len(bot.backend.prompts) == 1
+    report = bot.router.report()
+    assert report['routed'] == 0 and report['passed_to_model'] == 1
+    assert report['avg_model_ms'] is not None
+
+
+def test_router_looks_donors_up_one_at_a_time(bot, db, monkeypatch):
+    monkeypatch.setattr(db, 'get_donor_names', lambda: pytest.fail("loaded every donor name"))
+    db.add_donation('Ann', 100.0, 'General', date='2025-01-01 09:00:00')
+    assert bot.router.route("look up ann") == ('donor_lookup', {'action': 'get_donor_info', 'donor_name': 'Ann'})
+    db.add_donation('Bob', 5.0, 'General', date='2025-01-02 09:00:00')
+    assert bot.router.route("look up bob") == ('donor_lookup', {'action': 'get_donor_info', 'donor_name': 'Bob'})
+    assert bot.router.route("look up zed") is None
+
+
+def test_router_reports_latency_saved(bot):
+    bot.backend = ScriptedBackend(delay=0.02)
+    bot.get_response("tell me a story")
+    bot.get_response("what's the total")
+    report = bot.router.report()
+    assert report['hit_rate'] == 0.5
+    assert report['intents']['total']['hits'] == 1
+    assert report['intents']['total']['saved_ms'] > 10
@@ -0,0 +1,472 @@
+import os
+import sys
+import threading
+import time
+sys.path.append(os.getcwd())
+
+import sqlite3
+
+import pytest
+
+from database import DonationDatabase
+from migrations import SCHEMA_VERSION, get_schema_version, migrate
+
+
+def test_one_pool_per_database(db):
+    assert DonationDatabase(db.db_path) is db
+
+
+def test_connections_use_wal_and_pragmas(db):
+    with db.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+
+
+def test_connection_commits_and_rolls_back(db):
+    insert = "INSERT INTO donations (donor_name, amount, category, date) VALUES (?, ?, 'General', '2025-01-01')"
+    with db.connection() as conn:
+        conn.execute(insert, ('A', 10))
+    with pytest.raises(RuntimeError):
+        with db.connection() as conn:
+            conn.execute(insert, ('B', 20))
+            raise RuntimeError("boom")
+    assert db.get_total_donations() == 10.0
+
+
+def test_checkout_times_out_when_pool_is_exhausted(db):
+    held = [db.get_connection(), db.get_connection()]
+    with pytest.raises(TimeoutError):
+        db.get_connection()
+    for conn in held:
+        db.release_connection(conn)
+
+
+def test_broken_connection_is_replaced(db):
+    conn = db.get_connection()
+    conn.close()
+    db.release_connection(conn)
+    db.release_connection(db.get_connection())
+    assert db.get_total_donations() == 0.0
+
+
+def test_pool_is_shared_across_threads(db):
+    errors = []
+
+    def worker():
+        for _ in range(50):
+            if not db.add_donation('Thread', 1.0, 'General'):
+                errors.append('insert failed')
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert db.get_total_donations() == 200.0
+
+
+def _query_plan(conn, sql, params=()):
+    return ' '.join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+
+
+def test_new_database_is_at_current_schema_version(db):
+    with db.connection() as conn:
+        assert get_schema_version(conn) == SCHEMA_VERSION
+        assert db.get_categories() == ['Emergency', 'General', 'Other', 'Project']
+
+
+def test_schema_bootstrap_runs_once_per_process(tmp_path, monkeypatch):
+    import database
+
+    calls = []
+    started = threading.Event()
+
+    def slow_migrate(conn):
+        calls.append(threading.current_thread().name)
+        started.set()
+        time.sleep(0.1)
+        return migrate(conn)
+
+    monkeypatch.setattr(database, 'migrate', slow_migrate)
+    path = str(tmp_path / 'donations.db')
+    versions = []
+
+    def construct():
+        started.wait()
+        db = DonationDatabase(path, pool_size=2)
+        # Later constructors wait for the first one's migration instead of racing it
+        with db.connection() as conn:
+            versions.append(get_schema_version(conn))
+
+    threads = [threading.Thread(target=construct) for _ in range(4)]
+    for t in threads:
+        t.start()
+    first = DonationDatabase(path, pool_size=2)
+    for t in threads:
+        t.join()
+    try:
+        assert DonationDatabase(path) is first and first.ready
+        assert len(calls) == 1
+        assert versions == [SCHEMA_VERSION] * 4
+    finally:
+        first.close()
+
+
+def test_failed_bootstrap_is_retried(tmp_path, monkeypatch):
+    import database
+
+    def broken_migrate(conn):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    path = str(tmp_path / 'donations.db')
+    monkeypatch.setattr(database, 'migrate', broken_migrate)
+    with pytest.raises(RuntimeError, match='disk I/O error'):
+        DonationDatabase(path, pool_size=2)
+    monkeypatch.setattr(database, 'migrate', migrate)
+    db = DonationDatabase(path, pool_size=2)
+    try:
+        assert db.ready and db.get_categories() == ['Emergency', 'General', 'Other', 'Project']
+    finally:
+        db.close()
+
+
+def test_hot_queries_use_indexes(db):
+    with db.connection() as conn:
+        assert 'idx_donations_date' in _query_plan(conn, "SELECT * FROM donations ORDER BY date DESC LIMIT 5")
+        assert 'idx_donations_date' in _query_plan(conn, "DELETE FROM donations WHERE date = ?", ('x',))
+        assert 'COVERING INDEX idx_donations_category_amount' in _query_plan(
+            conn, "SELECT category, SUM(amount) FROM donations GROUP BY category")
+        assert 'COVERING INDEX idx_donations_donor_amount_date' in _query_plan(
+            conn, "SELECT donor_name, COUNT(*), SUM(amount), MAX(date) FROM donations GROUP BY donor_name")
+
+
+def test_legacy_database_is_upgraded_in_place(tmp_path):
+    path = str(tmp_path / 'legacy.db')
+    with sqlite3.connect(path) as conn:
+        # Tables as app.py used to create them, with the duplicate donor
+        # profiles that INSERT OR REPLACE produced
+        conn.execute("CREATE TABLE donations (id INTEGER PRIMARY KEY AUTOINCREMENT, donor_name TEXT NOT NULL, "
+                     "amount REAL NOT NULL, category TEXT NOT NULL, date TEXT NOT NULL, notes TEXT, "
+                     "is_recurring BOOLEAN DEFAULT 0, recurring_interval TEXT, next_donation_date TEXT)")
+        conn.execute("CREATE TABLE donor_profiles (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, "
+                     "email TEXT, phone TEXT, address TEXT, preferred_category TEXT, total_donations REAL DEFAULT 0, "
+                     "last_donation_date TEXT, notification_preferences TEXT)")
+        conn.execute("CREATE TABLE email_notifications (id INTEGER PRIMARY KEY AUTOINCREMENT, donor_id INTEGER, "
+                     "type TEXT NOT NULL, message TEXT NOT NULL, status TEXT DEFAULT 'pending', "
+                     "created_at TEXT NOT NULL, sent_at TEXT)")
+        conn.execute("INSERT INTO donations (donor_name, amount, category, date) VALUES ('Ann', 5, 'General', '2024-01-01')")
+        conn.executemany("INSERT INTO donor_profiles (name, email) VALUES (?, ?)",
+                         [('Ann', 'ann@example.org'), ('Ann', ''), ('Bob', None)])
+        conn.execute("INSERT INTO email_notifications (donor_id, type, message, created_at) "
+                     "VALUES (1, 'large_donation', 'x', '2024-01-01')")
+
+    with sqlite3.connect(path) as conn:
+        assert migrate(conn) == SCHEMA_VERSION
+        assert migrate(conn) == SCHEMA_VERSION  # no-op the second time
+        assert conn.execute("SELECT id, name FROM donor_profiles ORDER BY id").fetchall() == [(2, 'Ann'), (3, 'Bob')]
+        assert conn.execute("SELECT donor_id FROM email_notifications").fetchone()[0] == 2
+        assert conn.execute("SELECT COUNT(*) FROM donations").fetchone()[0] == 1
+        # The surviving profile keeps the older row's email and owns the donation
+        assert conn.execute("SELECT email, total_donations, last_donation_date FROM donor_profiles WHERE id = 2"
+                            ).fetchone() == ('ann@example.org', 5.0, '2024-01-01')
+        assert conn.execute("SELECT donor_id FROM donations").fetchone()[0] == 2
+        with pytest.raises(sqlite3.IntegrityError):
+            conn.execute("INSERT INTO donor_profiles (name) VALUES ('Bob')")
+
+
+def test_add_donation_accepts_recurring_fields(db):
+    assert db.add_donation('Ann', 25.0, 'Project', is_recurring=True, recurring_interval='Monthly',
+                           next_donation_date='2025-02-01 00:00:00')
+    donation = db.get_recent_donations(1)[0]
+    assert donation['recurring_interval'] == 'Monthly'
+    assert donation['date']
+
+
+def test_rollups_follow_inserts_updates_and_deletes(db):
+    db.add_donation('Ann', 100.0, 'General', date='2025-01-05 10:00:00')
+    db.add_donation('Ann', 50.0, 'Project', date='2025-02-01 09:00:00')
+    db.add_donation('Bob', 25.0, 'General', date='2025-02-03 12:00:00')
+    with db.connection() as conn:
+        conn.execute("UPDATE donations SET category = 'Emergency', amount = 75 WHERE donor_name = 'Bob'")
+        conn.execute("DELETE FROM donations WHERE date = '2025-02-01 09:00:00'")
+        assert conn.execute("SELECT last_donation_date FROM donor_totals WHERE donor_name = 'Ann'").fetchone()[0] \
+            == '2025-01-05 10:00:00'
+        assert conn.execute("SELECT month, category, total_amount FROM monthly_category_totals ORDER BY month").fetchall() \
+            == [('2025-01', 'General', 100.0), ('2025-02', 'Emergency', 75.0)]
+
+    assert db.check_rollups() == []
+    assert db.get_total_donations() == 175.0
+    assert db.get_category_breakdown() == {'Emergency': 75.0, 'General': 100.0}
+    stats = db.get_donor_statistics()
+    assert stats['total_donors'] == 2
+    assert stats['average_donation'] == 87.5
+    assert stats['top_donors'][0] == {'name': 'Ann', 'donation_count': 1, 'total_amount': 100.0}
+
+
+def test_donor_profiles_follow_inserts_updates_and_deletes(db):
+    ann = db.upsert_donor('Ann', email='ann@example.org')
+    db.add_donation('Ann', 100.0, 'General', date='2025-01-05 10:00:00')
+    db.add_donation('Ann', 50.0, 'Project', date='2025-02-01 09:00:00')
+    db.add_donation('Bob', 25.0, 'General', date='2025-02-03 12:00:00')
+    assert db.upsert_donor('Ann', phone='555') == ann
+    with db.connection() as conn:
+        assert conn.execute("SELECT DISTINCT donor_id FROM donations WHERE donor_name = 'Ann'").fetchall() == [(ann,)]
+        conn.execute("UPDATE donations SET donor_name = 'Bob' WHERE date = '2025-02-01 09:00:00'")
+        conn.execute("UPDATE donations SET amount = 30 WHERE donor_name = 'Bob' AND amount = 25")
+
+    assert db.get_donor('Ann') == {
+        'id': ann, 'name': 'Ann', 'email': 'ann@example.org', 'phone': '555', 'address': None,
+        'preferred_category': None, 'total_donations': 100.0, 'last_donation_date': '2025-01-05 10:00:00',
+        'notification_preferences': None, 'donation_count': 1,
+    }
+    bob = db.get_donor('Bob')
+    assert (bob['total_donations'], bob['last_donation_date'], bob['donation_count']) == (80.0, '2025-02-03 12:00:00', 2)
+    with db.connection() as conn:
+        conn.execute("DELETE FROM donations WHERE donor_name = 'Bob'")
+    bob = db.get_donor('Bob')
+    assert (bob['total_donations'], bob['last_donation_date'], bob['donation_count']) == (0.0, None, 0)
+    assert db.get_donor('Cy') is None
+    assert db.check_rollups() == []
+
+
+def test_check_reports_drift_and_rebuild_repairs_it(db):
+    db.add_donation('Ann', 10.0, 'General')
+    with db.connection() as conn:
+        conn.execute("UPDATE category_totals SET total_amount = 999")
+        conn.execute("DELETE FROM donor_totals")
+    problems = db.check_rollups()
+    assert len(problems) == 2
+    db.rebuild_rollups()
+    assert db.check_rollups() == []
+
+
+def test_bulk_insert_collects_row_errors(db):
+    rows = [
+        {'donor_name': 'Ann', 'amount': '100', 'category': 'Education', 'date': '2024-01-05'},
+        {'donor_name': '', 'amount': '5', 'category': 'General'},
+        {'donor_name': 'Bob', 'amount': 'lots', 'category': 'General'},
+        {'donor_name': 'Bob', 'amount': '$1,250.50', 'category': 'Scholarships', 'date': '03/02/2024'},
+        {'donor_name': 'Cy', 'amount': '20', 'category': 'General', 'date': 'yesterday'},
+    ]
+    result = db.add_donations_bulk(rows, chunk_size=2)
+    assert result['inserted'] == 2
+    assert [row_number for row_number, _ in result['errors']] == [2, 3, 5]
+    assert db.get_total_donations() == 1350.5
+    assert 'Scholarships' in db.get_categories()
+    assert db.check_rollups() == []
+
+
+def test_bulk_insert_upserts_donor_profiles(db):
+    db.add_donations_bulk([
+        {'donor_name': 'Ann', 'amount': 10, 'category': 'General', 'date': '2024-01-01', 'email': 'ann@example.org'},
+        {'donor_name': 'Ann', 'amount': 20, 'category': 'General', 'date': '2024-03-01'},
+        {'donor_name': 'Ann', 'amount': 30, 'category': 'General', 'date': '2024-02-01', 'phone': '555'},
+    ], chunk_size=2, upsert_donors=True)
+    with db.connection() as conn:
+        profiles = conn.execute("SELECT name, email, phone, last_donation_date FROM donor_profiles").fetchall()
+    assert profiles == [('Ann', 'ann@example.org', '555', '2024-03-01 00:00:00')]
+
+
+def test_bulk_insert_rejects_non_finite_amounts(db):
+    rows = [
+        {'donor_name': 'Ann', 'amount': 'nan', 'category': 'General'},
+        {'donor_name': 'Bob', 'amount': 'inf', 'category': 'General'},
+        {'donor_name': 'Cy', 'amount': '-Infinity', 'category': 'General'},
+        {'donor_name': 'Dee', 'amount': '10', 'category': 'General'},
+    ]
+    result = db.add_donations_bulk(rows)
+    assert result['inserted'] == 1
+    assert [row_number for row_number, _ in result['errors']] == [1, 2, 3]
+    assert db.get_total_donations() == 10.0
+    assert db.check_rollups() == []
+
+
+def test_bulk_insert_records_database_errors_per_row(db):
+    with db.connection() as conn:
+        conn.execute("CREATE TRIGGER reject_zed BEFORE INSERT ON donations WHEN NEW.donor_name = 'Zed' "
+                     "BEGIN SELECT RAISE(ABORT, 'Zed is not allowed'); END")
+    rows = [{'donor_name': name, 'amount': 5, 'category': 'General'} for name in ('Ann', 'Zed', 'Bob')]
+    result = db.add_donations_bulk(rows, chunk_size=3)
+    assert result['inserted'] == 2
+    assert result['errors'] == [(2, 'Zed is not allowed')]
+    assert db.get_donor_names() == ['Ann', 'Bob']
+
+
+@pytest.mark.parametrize('day_first, expected', [
+    (False, ['2024-03-02 00:00:00', '2024-03-02 10:00:00']),
+    (True, ['2024-02-03 00:00:00', '2024-02-03 10:00:00']),
+])
+def test_bulk_insert_reads_slash_dates_in_one_order(db, day_first, expected):
+    db.add_donations_bulk([
+        {'donor_name': 'Ann', 'amount': 5, 'category': 'General', 'date': '03/02/2024'},
+        {'donor_name': 'Ann', 'amount': 5, 'category': 'General', 'date': '03/02/2024 10:00:00'},
+    ], day_first=day_first)
+    with db.connection() as conn:
+        assert [row[0] for row in conn.execute("SELECT date FROM donations ORDER BY id")] == expected
+
+
+def test_importer_reports_worksheet_rows(db, tmp_path):
+    from openpyxl import Workbook
+    from importer import import_file
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(['Donor Name', 'Amount', 'Category'])
+    sheet.append(['Ann', 10, 'General'])
+    sheet.append([None, None, None])
+    sheet.append(['Bob', 'x', 'General'])
+    path = str(tmp_path / 'donations.xlsx')
+    workbook.save(path)
+    result = import_file(path, db)
+    assert result['inserted'] == 1
+    assert result['errors'] == [(4, "invalid amount 'x'")]
+
+
+def test_importer_streams_csv(db, tmp_path):
+    from importer import import_file
+
+    path = tmp_path / 'donations.csv'
+    path.write_text('Donor Name,Amount,Category,Notes\nAnn,10,General,"two\nlines"\n\nBob,x,General,\n')
+    reports = []
+    result = import_file(str(path), db, chunk_size=1, progress=lambda r: reports.append(r['inserted']))
+    assert result['inserted'] == 1
+    # Errors cite the file line, past the multi-line record and the blank line
+    assert result['errors'] == [(5, "invalid amount 'x'")]
+    assert reports == [1]
+    assert db.get_donor_names() == ['Ann']
+
+
+def test_donation_pages_walk_every_row_once_in_order(db):
+    # Several donations share a timestamp, so the id must break ties
+    db.add_donations_bulk(
+        {'donor_name': f'Donor {i}', 'amount': 1, 'category': 'General', 'date': f'2024-01-{i // 3 + 1:02d}'}
+        for i in range(25)
+    )
+    pages, page = [], db.get_donations_page(limit=4)
+    while page:
+        pages.append(page)
+        page = db.get_donations_page(after=(page[-1][4], page[-1][0]), limit=4)
+    rows = [row for page in pages for row in page]
+    assert len(rows) == 25 and len({row[0] for row in rows}) == 25
+    assert rows == sorted(rows, key=lambda row: (row[4], row[0]), reverse=True)
+
+    # Paging back up from the third page returns exactly the second one
+    assert db.get_donations_page(before=(pages[2][0][4], pages[2][0][0]), limit=4) == pages[1]
+
+
+def test_donation_pages_use_the_date_index(db):
+    with db.connection() as conn:
+        for sql in ("SELECT id FROM donations WHERE (date, id) < (?, ?) ORDER BY date DESC, id DESC LIMIT 200",
+                    "SELECT id FROM donations WHERE (date, id) > (?, ?) ORDER BY date, id LIMIT 200"):
+            plan = _query_plan(conn, sql, ('2024-01-01', 1))
+            assert 'idx_donations_date' in plan and 'TEMP B-TREE' not in plan
+
+
+def test_delete_donations_by_id_in_chunks_and_restore(db):
+    # Same timestamp everywhere: only the selected ids may go
+    db.add_donations_bulk(
+        {'donor_name': f'Donor {i % 3}', 'amount': 10 * (i + 1), 'category': 'General', 'date': '2024-05-01 12:00:00'}
+        for i in range(7)
+    )
+    with db.connection() as conn:
+        ids = [row[0] for row in conn.execute("SELECT id FROM donations ORDER BY id")]
+
+    version = db.data_version
+    deleted = db.delete_donations([str(ids[0]), ids[2], ids[3], ids[5], ids[5]], chunk_size=2)
+    assert sorted(row['id'] for row in deleted) == [ids[0], ids[2], ids[3], ids[5]]
+    assert db.data_version > version
+    assert db.get_total_donations() == 10 * (2 + 5 + 7)
+    assert db.check_rollups() == []
+
+    assert db.restore_donations(deleted) == 4
+    with db.connection() as conn:
+        assert [row[0] for row in conn.execute("SELECT id FROM donations ORDER BY id")] == ids
+    assert db.get_total_donations() == 10 * sum(range(1, 8))
+    assert db.check_rollups() == []
+
+
+def test_data_version_counts_writes_from_other_connections(db):
+    version = db.data_version
+    # A plain connection stands in for another process (importer, second app)
+    other = sqlite3.connect(db.db_path)
+    with other:
+        other.execute("INSERT INTO donations (donor_name, amount, category, date) VALUES ('Ext', 5, 'General', '2024-01-01')")
+    assert db.data_version > version
+    for statement in ("UPDATE donor_profiles SET email = 'ext@example.org' WHERE name = 'Ext'",
+                      "INSERT INTO categories (name) VALUES ('Outreach')"):
+        version = db.data_version
+        with other:
+            other.execute(statement)
+        assert db.data_version == version + 1
+    other.close()
+
+    # Totals and goal progress moved by the donations triggers aren't counted twice
+    db.add_goal('General', 100.0, '2024-01-01')
+    version = db.data_version
+    db.add_donation('Ext', 5.0, 'General', date='2024-02-01 00:00:00')
+    assert db.data_version == version + 1
+
+
+def test_find_donor_name_ignores_case_and_uses_an_index(db):
+    db.add_donation('Ann Lee', 10.0, 'General')
+    db.upsert_donor('Profile Only')
+    assert db.find_donor_name('ann lee') == 'Ann Lee'
+    assert db.find_donor_name('ANN LEE') == 'Ann Lee'
+    assert db.find_donor_name('profile only') is None  # no donations yet
+    with db.connection() as conn:
+        assert 'idx_donor_totals_name_lower' in _query_plan(
+            conn, "SELECT donor_name FROM donor_totals WHERE lower(donor_name) = lower(?) LIMIT 1", ('ann lee',))
+
+
+def test_delete_by_id_uses_the_primary_key(db):
+    with db.connection() as conn:
+        plan = _query_plan(conn, "DELETE FROM donations WHERE id IN (?, ?, ?)", (1, 2, 3))
+    assert 'INTEGER PRIMARY KEY' in plan
+
+
+def test_goal_progress_follows_writes_in_its_window(db):
+    db.add_donation('Ann', 40.0, 'Project', date='2024-02-28 09:00:00')
+    goal = db.add_goal('Project', 500.0, '2024-03-01', '2024-03-31')
+    open_goal = db.add_goal('Project', 100.0, '2024-01-01')
+    other = db.add_goal('Emergency', 100.0, '2024-03-01')
+    assert {g['id']: g['current_amount'] for g in db.get_goal_progress()} == {goal: 0, open_goal: 40.0, other: 0}
+
+    db.add_donation('Bob', 100.0, 'Project', date='2024-03-01 00:00:00')
+    db.add_donation('Bob', 150.0, 'Project', date='2024-03-31 23:59:59')  # end date is inclusive
+    db.add_donation('Bob', 70.0, 'Project', date='2024-04-01 00:00:00')
+    progress = {g['id']: g for g in db.get_goal_progress()}
+    assert progress[goal]['current_amount'] == 250.0
+    assert progress[goal]['progress'] == 0.5
+    assert progress[open_goal]['current_amount'] == 360.0
+    assert progress[open_goal]['progress'] == 1.0
+
+    with db.connection() as conn:
+        conn.execute("UPDATE donations SET category = 'Emergency' WHERE amount = 150")
+        conn.execute("DELETE FROM donations WHERE amount = 100")
+    progress = {g['id']: g['current_amount'] for g in db.get_goal_progress()}
+    assert progress == {goal: 0.0, open_goal: 110.0, other: 150.0}
+    assert db.check_goals() == []
+
+
+def test_closed_goals_stop_counting_until_reopened(db):
+    goal = db.add_goal('General', 100.0, '2024-01-01')
+    db.set_goal_status(goal, 'completed')
+    db.add_donation('Ann', 25.0, 'General', date='2024-05-01 09:00:00')
+    assert db.get_goal_progress() == []
+    assert db.get_goal_progress(include_closed=True)[0]['current_amount'] == 0
+
+    db.set_goal_status(goal, 'active')
+    assert db.get_goal_progress()[0]['current_amount'] == 25.0
+
+
+def test_reconcile_repairs_goal_drift(db):
+    goal = db.add_goal('General', 100.0, '2024-01-01')
+    db.add_donation('Ann', 30.0, 'General', date='2024-05-01 09:00:00')
+    with db.connection() as conn:
+        conn.execute("UPDATE donation_goals SET current_amount = 999 WHERE id = ?", (goal,))
+    assert db.check_goals() == [f"donation_goals[{goal}]: have 999.00, expected 30.00"]
+    assert db.reconcile_goals() == 1
+    assert db.check_goals() == []
+    assert db.reconcile_goals() == 0
@@ -0,0 +1,121 @@
+import os
+import sys
+import threading
+import time
+sys.path.append(os.getcwd())
+
+import pytest
+
+from database import DonationDatabase
+from donation_list import DonationListView, DonationPager
+
+
+@pytest.fixture
+def pager(tmp_path):
+    db = DonationDatabase(str(tmp_path / 'donations.db'), pool_size=2, checkout_timeout=0.2)
+    db.add_donations_bulk(
+        {'donor_name': f'Donor {i}', 'amount': i + 1, 'category': 'General', 'date': f'2024-01-01 00:00:{i:02d}'}
+        for i in range(30)
+    )
+    pager = DonationPager(db, page_size=10)
+    yield pager
+    pager.shutdown()
+    db.close()
+
+
+def test_prefetched_page_is_handed_out_once(pager):
+    first = pager.request().result(timeout=1)
+    pager.prefetch('after', first[-1])
+    future = pager.request('after', first[-1])
+    assert future.result(timeout=1) == pager.db.get_donations_page(after=(first[-1][4], first[-1][0]), limit=10)
+    # Consumed: a second request is a fresh fetch
+    assert pager.request('after', first[-1]) is not future
+
+
+def test_prefetch_keeps_one_page_per_direction(pager):
+    first = pager.request().result(timeout=1)
+    pager.prefetch('after', first[4])
+    pager.prefetch('after', first[-1])
+    pager.prefetch('before', first[-1])
+    assert sorted(direction for direction, _ in pager._pending) == ['after', 'before']
+
+
+def test_invalidate_drops_prefetched_pages(pager):
+    first = pager.request().result(timeout=1)
+    pager.prefetch('after', first[-1])
+    pager.invalidate()
+    assert pager._pending == {}
+    assert len(pager.request('after', first[-1]).result(timeout=1)) == 10
+
+
+class FakeTree:
+    """Just enough of ttk.Treeview for DonationListView; ``after`` callbacks are queued."""
+
+    def __init__(self):
+        self.items = []
+        self.callbacks = []
+
+    def configure(self, **options):
+        pass
+
+    def get_children(self):
+        return tuple(self.items)
+
+    def insert(self, parent, index, iid, values):
+        self.items.insert(len(self.items) if index == 'end' else index, iid)
+
+    def delete(self, *iids):
+        self.items = [iid for iid in self.items if iid not in iids]
+
+    def exists(self, iid):
+        return iid in self.items
+
+    def index(self, iid):
+        return self.items.index(iid)
+
+    def identify_row(self, y):
+        return ''
+
+    def yview_moveto(self, fraction):
+        pass
+
+    def after(self, ms, callback, *args):
+        self.callbacks.append((callback, args))
+
+    def run_callbacks(self, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while self.callbacks and time.monotonic() < deadline:
+            callback, args = self.callbacks.pop(0)
+            callback(*args)
+            time.sleep(0.005)
+
+
+class GatedDatabase:
+    """Holds page fetches until ``gate`` is set."""
+
+    def __init__(self, db):
+        self.db = db
+        self.gate = threading.Event()
+
+    def get_donations_page(self, **kwargs):
+        self.gate.wait(timeout=2)
+        return self.db.get_donations_page(**kwargs)
+
+
+def test_reload_drops_a_page_load_still_in_flight(pager):
+    gated = GatedDatabase(pager.db)
+    pager.db = gated
+    tree = FakeTree()
+    view = DonationListView(tree, scrollbar=None, pager=pager)
+
+    view.reload()
+    stale = view._loading
+    view.reload()
+    assert not stale.done()
+    gated.gate.set()
+    tree.run_callbacks()
+
+    newest = [str(row[0]) for row in gated.db.get_donations_page(limit=10)]
+    assert list(tree.get_children()) == newest
+    assert sorted(view._rows) == sorted(newest)
+    assert view._loading is None and not view._at_end
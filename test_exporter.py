@@ -0,0 +1,83 @@
+import csv
+import os
+import sys
+sys.path.append(os.getcwd())
+
+import pytest
+from openpyxl import load_workbook
+
+from exporter import ExportCancelled, export_donations
+from report_filter import ReportFilter
+
+
+@pytest.fixture
+def db(db):
+    db.add_donations_bulk(
+        {'donor_name': f'Donor {i % 7}', 'amount': i + 1, 'category': ('General', 'Emergency')[i % 2],
+         'date': f'2024-{i % 12 + 1:02d}-01 10:00:00'}
+        for i in range(250)
+    )
+    return db
+
+
+def test_xlsx_export_streams_rows_and_summarises_from_rollups(db, tmp_path):
+    path = str(tmp_path / 'report.xlsx')
+    progress = []
+    result = export_donations(path, db, batch_size=100, progress=lambda done, total: progress.append((done, total)))
+
+    assert progress == [(100, 250), (200, 250), (250, 250)]
+    assert result['rows'] == 250
+    workbook = load_workbook(path, read_only=True)
+    assert workbook.sheetnames == ['Donations', 'Summary', 'Category Breakdown', 'Monthly Totals', 'Top Donors', 'Graphs']
+    donations = list(workbook['Donations'].iter_rows(values_only=True))
+    assert donations[0] == ('Donor Name', 'Amount', 'Category', 'Date', 'Notes')
+    assert len(donations) == 251
+    assert donations[1][3].month == 12  # newest first, written as real dates
+    summary = dict(workbook['Summary'].iter_rows(min_row=2, values_only=True))
+    assert summary == {'Total Donations': 250, 'Total Amount': f'${sum(range(1, 251)):.2f}'}
+    breakdown = list(workbook['Category Breakdown'].iter_rows(min_row=2, values_only=True))
+    assert [(category, count) for category, count, _ in breakdown] == [('Emergency', 125), ('General', 125)]
+    workbook.close()
+
+
+def test_csv_export(db, tmp_path):
+    path = str(tmp_path / 'report.csv')
+    export_donations(path, db, batch_size=64)
+    with open(path, newline='') as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ['Donor Name', 'Amount', 'Category', 'Date', 'Notes']
+    assert len(rows) == 251
+
+
+def test_cancelled_export_removes_partial_file(db, tmp_path):
+    path = str(tmp_path / 'report.xlsx')
+    written = []
+    with pytest.raises(ExportCancelled):
+        export_donations(path, db, batch_size=50, progress=lambda done, total: written.append(done),
+                         cancelled=lambda: len(written) >= 2)
+    assert written == [50, 100]
+    assert not os.path.exists(path)
+
+
+def test_unknown_format_is_rejected(db, tmp_path):
+    with pytest.raises(ValueError):
+        export_donations(str(tmp_path / 'report.json'), db)
+
+
+def test_filtered_export_keeps_only_matching_rows(db, tmp_path):
+    path = str(tmp_path / 'report.xlsx')
+    result = export_donations(path, db, report_filter=ReportFilter('2024-03-01', '2024-05-31', 'Emergency'))
+
+    # Months 3-5 on odd i: i % 12 in {2, 3, 4} and i odd
+    expected = [i for i in range(250) if i % 12 in (2, 3, 4) and i % 2]
+    assert result['rows'] == len(expected)
+    workbook = load_workbook(path, read_only=True)
+    donations = list(workbook['Donations'].iter_rows(min_row=2, values_only=True))
+    assert sorted(row[1] for row in donations) == [i + 1 for i in expected]
+    assert {row[2] for row in donations} == {'Emergency'}
+    summary = dict(workbook['Summary'].iter_rows(min_row=2, values_only=True))
+    assert summary['Total Amount'] == f'${sum(i + 1 for i in expected):.2f}'
+    assert summary['Showing'] == '2024-03-01 to 2024-05-31, Emergency'
+    months = [row[0] for row in workbook['Monthly Totals'].iter_rows(min_row=2, values_only=True)]
+    assert months == ['2024-04']  # March and May only hold even i here
+    workbook.close()
@@ -0,0 +1,87 @@
+import os
+import sys
+import threading
+sys.path.append(os.getcwd())
+
+import pytest
+
+from llm_backends import LocalModelBackend
+from local_inference import BatchingEngine
+
+
+class FakeModel:
+    """generate_batch stand-in that records batch sizes and can be held back."""
+
+    def __init__(self):
+        self.batches = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def generate_batch(self, prompts):
+        self.release.wait(5)
+        self.batches.append(list(prompts))
+        return [f"reply to {prompt}" for prompt in prompts]
+
+
+@pytest.fixture
+def model():
+    return FakeModel()
+
+
+@pytest.fixture
+def engine(model):
+    engine = BatchingEngine(model.generate_batch, max_batch_size=4, max_wait=0.05)
+    yield engine
+    model.release.set()
+    engine.stop(timeout=5)
+
+
+def test_concurrent_requests_are_batched(engine, model):
+    model.release.clear()
+    first = engine.submit('warm up')
+    # Queued while the worker is busy, so they go out together
+    futures = [engine.submit(f'q{i}') for i in range(6)]
+    model.release.set()
+    assert first.result(5) == 'reply to warm up'
+    assert [future.result(5) for future in futures] == [f'reply to q{i}' for i in range(6)]
+    assert max(len(batch) for batch in model.batches) == 4
+    assert engine.stats['requests'] == 7
+    assert engine.stats['batches'] < 7
+
+
+def test_errors_reach_every_request_in_the_batch():
+    def fail(prompts):
+        raise ValueError('out of memory')
+
+    engine = BatchingEngine(fail, max_wait=0.05)
+    futures = [engine.submit('a'), engine.submit('b')]
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result(5)
+    # The worker survives a failed batch
+    engine.generate_batch = lambda prompts: ['ok'] * len(prompts)
+    assert engine.generate('c', timeout=5) == 'ok'
+    engine.stop(timeout=5)
+
+
+def test_full_queue_and_stopped_engine_fail_fast(model):
+    engine = BatchingEngine(model.generate_batch, max_batch_size=1, max_pending=2)
+    model.release.clear()
+    engine.submit('running')
+    threading.Event().wait(0.2)  # let the worker take it
+    queued = [engine.submit('a'), engine.submit('b')]
+    with pytest.raises(RuntimeError):
+        engine.submit('c')
+    model.release.set()
+    engine.stop(timeout=5)
+    with pytest.raises(RuntimeError):
+        engine.submit('d')
+    assert all(future.done() for future in queued)
+
+
+def test_local_backend_formats_prompt_and_bounds_latency(engine, model):
+    backend = LocalModelBackend(engine=engine, timeout=0.2)
+    assert backend.generate('User: hi') == 'reply to User: hi\nAssistant:'
+    model.release.clear()
+    with pytest.raises(TimeoutError):
+        backend.generate('User: slow')
@@ -0,0 +1,152 @@
+import json
+import os
+import sys
+import threading
+import time
+sys.path.append(os.getcwd())
+from datetime import datetime, timedelta
+
+import pytest
+
+from notifications import FileTransport, NotificationDispatcher, Transport
+
+NOW = datetime(2024, 6, 1, 12, 0, 0)
+
+
+class FlakyTransport(Transport):
+    """Fails the first ``failures`` sends of every notification."""
+
+    def __init__(self, failures=0, delay=0.0):
+        self.failures = failures
+        self.delay = delay
+        self.calls = {}
+        self.threads = set()
+
+    def send(self, notification):
+        time.sleep(self.delay)
+        self.threads.add(threading.current_thread().name)
+        count = self.calls[notification['id']] = self.calls.get(notification['id'], 0) + 1
+        if count <= self.failures:
+            raise ConnectionError('SMTP server unavailable')
+
+
+def queue_notifications(db, count, created_at=NOW):
+    with db.connection() as conn:
+        conn.execute("INSERT INTO donor_profiles (name, email) VALUES ('Ann', 'ann@example.org')")
+        conn.executemany(
+            "INSERT INTO email_notifications (donor_id, type, message, created_at) VALUES (1, 'large_donation', ?, ?)",
+            [(f'Large donation {i}', (created_at + timedelta(seconds=i)).strftime('%Y-%m-%d %H:%M:%S'))
+             for i in range(count)]
+        )
+
+
+def statuses(db):
+    with db.connection() as conn:
+        return dict(conn.execute("SELECT status, COUNT(*) FROM email_notifications GROUP BY status").fetchall())
+
+
+def test_file_transport_delivers_and_marks_sent(db, tmp_path):
+    queue_notifications(db, 3)
+    outbox = tmp_path / 'outbox.jsonl'
+    dispatcher = NotificationDispatcher(db, FileTransport(str(outbox)), batch_size=2)
+    assert dispatcher.drain(now=NOW)['sent'] == 3
+    dispatcher.stop()
+
+    lines = [json.loads(line) for line in outbox.read_text().splitlines()]
+    assert [line['message'] for line in lines] == ['Large donation 0', 'Large donation 1', 'Large donation 2']
+    assert lines[0]['email'] == 'ann@example.org'
+    assert statuses(db) == {'sent': 3}
+    with db.connection() as conn:
+        assert conn.execute("SELECT DISTINCT sent_at FROM email_notifications").fetchall() == [('2024-06-01 12:00:00',)]
+
+
+def test_failures_back_off_then_give_up(db):
+    queue_notifications(db, 1)
+    transport = FlakyTransport(failures=10)
+    dispatcher = NotificationDispatcher(db, transport, max_attempts=3, base_delay=60)
+
+    assert dispatcher.dispatch_once(now=NOW)['retried'] == 1
+    # Not due again until the backoff has passed
+    assert dispatcher.dispatch_once(now=NOW + timedelta(seconds=59))['claimed'] == 0
+    assert dispatcher.dispatch_once(now=NOW + timedelta(seconds=60))['retried'] == 1
+    assert dispatcher.dispatch_once(now=NOW + timedelta(seconds=60 + 119))['claimed'] == 0
+    assert dispatcher.dispatch_once(now=NOW + timedelta(seconds=60 + 120))['failed'] == 1
+    dispatcher.stop()
+
+    assert statuses(db) == {'failed': 1}
+    with db.connection() as conn:
+        assert conn.execute("SELECT attempts, last_error FROM email_notifications").fetchone() == (
+            3, 'SMTP server unavailable')
+
+
+def test_retry_succeeds(db):
+    queue_notifications(db, 2)
+    dispatcher = NotificationDispatcher(db, FlakyTransport(failures=1), base_delay=1)
+    assert dispatcher.dispatch_once(now=NOW)['retried'] == 2
+    assert dispatcher.dispatch_once(now=NOW + timedelta(seconds=1))['sent'] == 2
+    metrics = dispatcher.metrics()
+    dispatcher.stop()
+    assert (metrics['sent'], metrics['retried'], metrics['pending']) == (2, 2, 0)
+
+
+def test_abandoned_claims_are_reclaimed(db):
+    queue_notifications(db, 2)
+    crashed = NotificationDispatcher(db, FlakyTransport(), lease_seconds=300)
+    assert len(crashed.claim(now=NOW)) == 2
+    crashed.stop()
+
+    dispatcher = NotificationDispatcher(db, FlakyTransport(), lease_seconds=300)
+    assert dispatcher.claim(now=NOW + timedelta(seconds=10)) == []
+    assert len(dispatcher.claim(now=NOW + timedelta(seconds=301))) == 2
+    dispatcher.stop()
+
+
+def test_batch_is_delivered_concurrently(db):
+    queue_notifications(db, 8)
+    transport = FlakyTransport(delay=0.05)
+    dispatcher = NotificationDispatcher(db, transport, max_workers=4)
+    assert dispatcher.dispatch_once(now=NOW)['sent'] == 8
+    dispatcher.stop()
+    assert len(transport.threads) > 1
+
+
+def test_metrics_report_queue_depth(db):
+    queue_notifications(db, 5)
+    dispatcher = NotificationDispatcher(db, FlakyTransport(), batch_size=2)
+    dispatcher.dispatch_once(now=NOW)
+    metrics = dispatcher.metrics()
+    dispatcher.stop()
+    assert (metrics['sent'], metrics['pending'], metrics['in_flight']) == (2, 3, 0)
+    assert metrics['oldest_pending'] == '2024-06-01 12:00:02'
+    assert metrics['throughput'] > 0
+
+
+def test_background_dispatcher_drains_on_wake(db):
+    dispatcher = NotificationDispatcher(db, FlakyTransport(), poll_interval=60)
+    dispatcher.start()
+    queue_notifications(db, 2, created_at=datetime.now() - timedelta(minutes=1))
+    dispatcher.wake()
+    deadline = time.time() + 5
+    while statuses(db) != {'sent': 2} and time.time() < deadline:
+        time.sleep(0.02)
+    dispatcher.stop(timeout=5)
+    assert statuses(db) == {'sent': 2}
+
+
+def test_claim_uses_the_status_index(db):
+    with db.connection() as conn:
+        plan = ' '.join(row[3] for row in conn.execute("""
+            EXPLAIN QUERY PLAN
+            SELECT n.id FROM email_notifications n LEFT JOIN donor_profiles p ON p.id = n.donor_id
+            WHERE n.status = 'pending' AND (n.next_attempt_at IS NULL OR n.next_attempt_at <= ?)
+            ORDER BY n.created_at LIMIT 50
+        """, ('2024-01-01',)))
+    assert 'idx_email_notifications_status_created' in plan and 'TEMP B-TREE' not in plan
+
+
+def test_transport_without_send_fails_at_construction():
+    class Incomplete(Transport):
+        name = 'incomplete'
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,82 @@
+import os
+import sys
+import threading
+sys.path.append(os.getcwd())
+from datetime import datetime
+
+import pytest
+
+from recurring import RecurringScheduler, add_months, next_occurrence, process_due
+
+
+@pytest.mark.parametrize('start, interval, expected', [
+    ('2024-01-28 10:00:00', 'Weekly', '2024-02-04 10:00:00'),
+    ('2024-12-31 10:00:00', 'Weekly', '2025-01-07 10:00:00'),
+    ('2024-01-31 10:00:00', 'Monthly', '2024-02-29 10:00:00'),
+    ('2024-12-15 10:00:00', 'Monthly', '2025-01-15 10:00:00'),
+    ('2024-11-30 10:00:00', 'Quarterly', '2025-02-28 10:00:00'),
+    ('2024-10-01 10:00:00', 'quarterly', '2025-01-01 10:00:00'),
+    ('2024-02-29 10:00:00', 'Yearly', '2025-02-28 10:00:00'),
+])
+def test_next_occurrence(start, interval, expected):
+    assert next_occurrence(datetime.fromisoformat(start), interval) == datetime.fromisoformat(expected)
+
+
+def test_month_end_schedules_keep_their_day():
+    date = datetime(2024, 1, 31)
+    dates = []
+    for _ in range(3):
+        date = add_months(date, 1, day=31)
+        dates.append(date.day)
+    assert dates == [29, 31, 30]
+    with pytest.raises(ValueError):
+        next_occurrence(date, 'Fortnightly')
+
+
+def test_process_due_catches_up_and_is_idempotent(db):
+    db.add_donation('Ann', 50.0, 'General', date='2024-01-31 09:00:00', is_recurring=True,
+                    recurring_interval='Monthly', next_donation_date='2024-02-29 09:00:00')
+    db.add_donation('Bob', 10.0, 'Project', date='2024-04-01 09:00:00', is_recurring=True,
+                    recurring_interval='Weekly', next_donation_date='2024-04-08 09:00:00')
+    db.add_donation('Cy', 5.0, 'Other', date='2024-04-01 09:00:00')
+
+    result = process_due(db, now=datetime(2024, 4, 30, 12), batch_size=1)
+    assert (result['schedules'], result['created'], result['errors']) == (2, 3 + 4, [])
+    with db.connection() as conn:
+        ann = [row[0] for row in conn.execute(
+            "SELECT date FROM donations WHERE donor_name = 'Ann' AND is_recurring = 0 ORDER BY date")]
+        next_dates = dict(conn.execute("SELECT donor_name, next_donation_date FROM donations WHERE is_recurring = 1"))
+    assert ann == ['2024-02-29 09:00:00', '2024-03-31 09:00:00', '2024-04-30 09:00:00']
+    assert next_dates == {'Ann': '2024-05-31 09:00:00', 'Bob': '2024-05-06 09:00:00'}
+    assert db.get_total_donations() == 50 * 4 + 10 * 5 + 5
+    assert db.check_rollups() == []
+
+    assert process_due(db, now=datetime(2024, 4, 30, 12))['created'] == 0
+
+
+def test_unreadable_schedule_is_stopped(db):
+    db.add_donation('Ann', 50.0, 'General', date='2024-01-01 09:00:00', is_recurring=True,
+                    recurring_interval='Hourly', next_donation_date='2024-01-02 09:00:00')
+    result = process_due(db, now=datetime(2024, 2, 1))
+    assert result['created'] == 0 and len(result['errors']) == 1
+    assert process_due(db, now=datetime(2024, 2, 1))['errors'] == []
+
+
+def test_due_schedules_come_from_the_partial_index(db):
+    with db.connection() as conn:
+        plan = ' '.join(row[3] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM donations WHERE is_recurring = 1 AND next_donation_date IS NOT NULL "
+            "AND next_donation_date <= ? ORDER BY next_donation_date LIMIT 10", ('2024-01-01',)))
+    assert 'idx_donations_next_due' in plan and 'TEMP B-TREE' not in plan
+
+
+def test_scheduler_runs_in_the_background(db):
+    db.add_donation('Ann', 50.0, 'General', date='2024-01-01 09:00:00', is_recurring=True,
+                    recurring_interval='Yearly', next_donation_date='2025-01-01 09:00:00')
+    runs = []
+    ran = threading.Event()
+    scheduler = RecurringScheduler(db, interval=60, on_run=lambda result: (runs.append(result), ran.set()))
+    scheduler.start()
+    assert ran.wait(5)
+    scheduler.stop(timeout=5)
+    assert runs[0]['created'] >= 1
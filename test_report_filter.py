@@ -0,0 +1,95 @@
+import os
+import random
+import sys
+from datetime import date
+sys.path.append(os.getcwd())
+
+import pytest
+
+from analytics import DonationAnalytics
+from exporter import DONATION_QUERY
+from report_filter import ReportFilter
+
+
+@pytest.fixture
+def db(db):
+    rng = random.Random(11)
+    db.add_donations_bulk(
+        {'donor_name': f'Donor {rng.randrange(20)}', 'amount': round(rng.uniform(1, 500), 2),
+         'category': rng.choice(['General', 'Project', 'Emergency']),
+         'date': f'2024-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d} {rng.randrange(24):02d}:30:00'}
+        for _ in range(500)
+    )
+    return db
+
+
+def query_plan(db, report_filter):
+    where, params = report_filter.where()
+    with db.connection() as conn:
+        return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + DONATION_QUERY.format(where=where), params)]
+
+
+def test_from_selection_presets():
+    today = date(2025, 5, 20)
+    assert ReportFilter.from_selection('Last 7 Days', today=today) == ReportFilter('2025-05-14', '2025-05-20')
+    assert ReportFilter.from_selection('This Quarter', today=today) == ReportFilter('2025-04-01', '2025-05-20')
+    assert ReportFilter.from_selection('This Year', 'Emergency', ' Ann ', today=today) == \
+        ReportFilter('2025-01-01', '2025-05-20', 'Emergency', 'Ann')
+    assert ReportFilter.from_selection('All Time', 'All Categories', '').is_empty
+    with pytest.raises(ValueError):
+        ReportFilter.from_selection('Last Century')
+    with pytest.raises(ValueError):
+        ReportFilter('2025-02-01', '2025-01-01')
+
+
+def test_where_covers_whole_days_inclusively():
+    where, params = ReportFilter('2024-03-01', '2024-03-31', 'Emergency').where('d')
+    assert where == 'd.category = ? AND d.date >= ? AND d.date < ?'
+    assert params == ['Emergency', '2024-03-01', '2024-04-01']
+    assert ReportFilter().where() == ('1', [])
+
+
+def test_date_range_searches_the_date_index(db):
+    plan = query_plan(db, ReportFilter('2024-04-01', '2024-06-30'))
+    assert plan == ['SEARCH donations USING INDEX idx_donations_date (date>? AND date<?)']
+
+
+def test_category_and_date_range_search_one_index(db):
+    plan = query_plan(db, ReportFilter('2024-04-01', '2024-06-30', 'Emergency'))
+    assert plan == ['SEARCH donations USING INDEX idx_donations_category_date (category=? AND date>? AND date<?)']
+    # Rows come out of the index in date order, so there is no sort step
+    assert not any('TEMP B-TREE' in step for step in plan)
+
+
+def test_category_and_donor_filters_use_indexes(db):
+    assert query_plan(db, ReportFilter(category='Emergency')) == \
+        ['SEARCH donations USING INDEX idx_donations_category_date (category=?)']
+    # The name resolves to an id once; the date range narrows the same index
+    assert query_plan(db, ReportFilter('2024-01-01', donor='Donor 3')) == [
+        'SEARCH donations USING INDEX idx_donations_donor_id_date (donor_id=? AND date>?)',
+        'SCALAR SUBQUERY 1',
+        'SEARCH donor_profiles USING COVERING INDEX idx_donor_profiles_name (name=?)',
+    ]
+
+
+def test_analytics_rollups_match_the_filtered_sql(db):
+    analytics = DonationAnalytics(db)
+    analytics.refresh()
+    for report_filter in (ReportFilter('2024-03-01', '2024-03-31'),
+                          ReportFilter('2024-06-15', None, 'Project'),
+                          ReportFilter(None, '2024-02-10', donor='Donor 4'),
+                          ReportFilter(category='No Such Category')):
+        where, params = report_filter.where()
+        with db.connection() as conn:
+            count, total = conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(amount), 0) FROM donations WHERE {where}", params
+            ).fetchone()
+            donors = conn.execute(
+                f"SELECT donor_name, COUNT(*) FROM donations WHERE {where} GROUP BY donor_name ORDER BY donor_name",
+                params
+            ).fetchall()
+        totals = analytics.totals(report_filter)
+        assert totals['count'] == count
+        assert totals['total'] == pytest.approx(total)
+        assert sorted((row['donor_name'], row['count']) for row in analytics.by_donor(report_filter=report_filter)) == donors
+        assert sum(row['count'] for row in analytics.monthly(report_filter)) == count
@@ -0,0 +1,91 @@
+import os
+import sys
+sys.path.append(os.getcwd())
+
+from report_view import ReportView, diff_lines
+
+
+class FakeText:
+    """Just enough of tk.Text for ReportView: whole-line indices and after()."""
+
+    def __init__(self):
+        self.lines = []
+        self.state = 'disabled'
+        self.edits = []
+        self.jobs = []
+
+    def _line(self, index):
+        return min(int(index.split('.')[0]) - 1, len(self.lines))
+
+    def configure(self, state):
+        self.state = state
+
+    def delete(self, first, last):
+        assert self.state == 'normal'
+        self.edits.append(('delete', self._line(first), self._line(last)))
+        del self.lines[self._line(first):self._line(last)]
+
+    def insert(self, index, text):
+        assert self.state == 'normal' and text.endswith('\n')
+        at = self._line(index)
+        new = text[:-1].split('\n')
+        self.edits.append(('insert', at, len(new)))
+        self.lines[at:at] = new
+
+    def after(self, ms, callback, *args):
+        self.jobs.append((callback, args))
+        return len(self.jobs)
+
+    def after_cancel(self, job):
+        self.jobs[job - 1] = None
+
+    def run_jobs(self):
+        while any(self.jobs):
+            index = next(i for i, job in enumerate(self.jobs) if job)
+            callback, args = self.jobs[index]
+            self.jobs[index] = None
+            callback(*args)
+
+
+def test_diff_lines_keeps_common_head_and_tail():
+    assert diff_lines(['a', 'b', 'c'], ['a', 'x', 'c']) == (1, 2, ['x'])
+    assert diff_lines(['a', 'b'], ['a', 'b', 'c', 'd']) == (2, 2, ['c', 'd'])
+    assert diff_lines(['a', 'b', 'c'], ['a', 'b', 'c']) == (3, 3, [])
+    assert diff_lines(['a', 'a'], ['a']) == (1, 2, [])
+    assert diff_lines([], ['a']) == (0, 0, ['a'])
+
+
+def test_refreshing_only_touches_changed_lines():
+    text = FakeText()
+    view = ReportView(text)
+    view.show(['Report', 'Total: 1', 'end'])
+    text.edits.clear()
+
+    view.show(['Report', 'Total: 1', 'end'])
+    assert text.edits == []
+    view.show(['Report', 'Total: 2', 'end'])
+    assert text.edits == [('delete', 1, 2), ('insert', 1, 1)]
+    assert text.lines == ['Report', 'Total: 2', 'end']
+    assert text.state == 'disabled'
+
+
+def test_large_reports_are_inserted_in_chunks():
+    text = FakeText()
+    view = ReportView(text, chunk_lines=100)
+    lines = [f'line {i}' for i in range(350)]
+    view.show(lines)
+    assert len(text.lines) == 100 and view.busy
+    text.run_jobs()
+    assert text.lines == lines and not view.busy
+    assert [edit for edit in text.edits if edit[0] == 'insert'] == \
+        [('insert', 0, 100), ('insert', 100, 100), ('insert', 200, 100), ('insert', 300, 50)]
+
+
+def test_new_report_replaces_an_unfinished_one():
+    text = FakeText()
+    view = ReportView(text, chunk_lines=10)
+    view.show([f'old {i}' for i in range(50)])
+    view.show(['old 0', 'new'])
+    text.run_jobs()
+    assert text.lines == ['old 0', 'new']
+    assert not view.busy
@@ -0,0 +1,83 @@
+import os
+import sys
+sys.path.append(os.getcwd())
+
+import numpy as np
+
+from token_cache import IGNORE_INDEX, TokenCache, pad_batch, prune
+
+
+class WordTokenizer:
+    """One id per whitespace-separated word; counts how often it is called."""
+
+    name_or_path = 'words'
+    eos_token_id = 0
+
+    def __init__(self):
+        self.vocab = {}
+        self.calls = 0
+
+    def __call__(self, texts, add_special_tokens=True):
+        self.calls += 1
+        return {'input_ids': [[self.vocab.setdefault(word, len(self.vocab) + 1) for word in text.split()]
+                              for text in texts]}
+
+
+EXAMPLES = [
+    {'input': 'User: hi Assistant:', 'output': 'hello there'},
+    {'input': 'User: total? Assistant:', 'output': 'the total is 5'},
+    {'input': 'User: a b c d e f g Assistant:', 'output': 'short'},
+]
+
+
+def test_build_tokenizes_once_and_reuses_the_cache(tmp_path):
+    tokenizer = WordTokenizer()
+    cache = TokenCache.build(EXAMPLES, tokenizer, max_length=64, cache_dir=str(tmp_path), batch_size=2)
+    assert tokenizer.calls == 4  # two batches each for prompts and responses
+    ids, prompt_length = cache[0]
+    assert prompt_length == 3
+    words = 'User: hi Assistant: hello there'.split()
+    assert list(ids) == [tokenizer.vocab[word] for word in words] + [0]  # prompt, response, end of sequence
+    assert list(cache.lengths) == [6, 8, 11]
+    assert isinstance(cache.tokens, np.memmap)
+
+    again = TokenCache.build(EXAMPLES, tokenizer, max_length=64, cache_dir=str(tmp_path))
+    assert tokenizer.calls == 4
+    assert again.path == cache.path and again.token_count == cache.token_count
+
+    changed = TokenCache.build(EXAMPLES[:2], tokenizer, max_length=64, cache_dir=str(tmp_path))
+    assert changed.path != cache.path and len(changed) == 2
+
+
+def test_prune_removes_superseded_caches(tmp_path):
+    tokenizer = WordTokenizer()
+    old = TokenCache.build(EXAMPLES[:2], tokenizer, max_length=64, cache_dir=str(tmp_path))
+    current = TokenCache.build(EXAMPLES, tokenizer, max_length=64, cache_dir=str(tmp_path))
+    (tmp_path / 'notes.txt').write_text('not a cache')
+
+    assert prune([current], str(tmp_path)) == 1
+    assert sorted(os.listdir(tmp_path)) == sorted([os.path.basename(current.path) + suffix
+                                                   for suffix in ('.tokens.npy', '.offsets.npy', '.prompts.npy')]
+                                                  + ['notes.txt'])
+    assert not os.path.exists(f'{old.path}.prompts.npy')
+    assert len(TokenCache(current.path)) == 3
+    assert prune([current], str(tmp_path / 'missing')) == 0
+
+
+def test_long_examples_keep_the_response(tmp_path):
+    cache = TokenCache.build(EXAMPLES[2:], WordTokenizer(), max_length=4, cache_dir=str(tmp_path))
+    ids, prompt_length = cache[0]
+    # The prompt is cut from the front: its last two words, then 'short' and EOS
+    assert len(ids) == 4 and prompt_length == 2 and list(ids[-2:]) == [10, 0]
+    assert list(ids[:2]) == [8, 9]  # 'g' and 'Assistant:'
+
+
+def test_pad_batch_pads_to_the_longest_example_and_masks_prompts():
+    features = [{'input_ids': np.array([5, 6, 7]), 'prompt_length': 1},
+                {'input_ids': np.array([8, 9, 10, 11, 12]), 'prompt_length': 3}]
+    batch = pad_batch(features, pad_token_id=0, pad_to_multiple_of=4)
+    assert batch['input_ids'].tolist() == [[5, 6, 7, 0, 0, 0, 0, 0], [8, 9, 10, 11, 12, 0, 0, 0]]
+    assert batch['attention_mask'].sum(axis=1).tolist() == [3, 5]
+    I = IGNORE_INDEX
+    assert batch['labels'].tolist() == [[I, 6, 7, I, I, I, I, I], [I, I, I, 11, 12, I, I, I]]
+    assert pad_batch(features, 0, pad_to_multiple_of=None)['input_ids'].shape == (2, 5)
@@ -0,0 +1,68 @@
+import json
+import os
+import sys
+sys.path.append(os.getcwd())
+
+import pytest
+
+from training_corpus import TrainingCorpus, donation_example
+
+
+@pytest.fixture
+def db(db):
+    db.add_donations_bulk(
+        {'donor_name': f'Donor {i}', 'amount': 10, 'category': ('General', 'Emergency')[i % 2],
+         'date': '2024-01-01 10:00:00'}
+        for i in range(100)
+    )
+    return db
+
+
+def add_chats(db, count, start=0):
+    with db.connection() as conn:
+        conn.executemany(
+            "INSERT INTO chat_history (user_message, bot_response, timestamp) VALUES (?, ?, '2024-01-01')",
+            [(f'question {i}', f'answer {i}') for i in range(start, start + count)]
+        )
+
+
+def test_donations_collapse_to_one_example_per_category(db, tmp_path):
+    corpus = TrainingCorpus(str(tmp_path / 'corpus'))
+    result = corpus.update(db, chunk_size=30)
+    assert result == {'rows': 100, 'added': 2, 'duplicates': 98}
+    assert list(corpus) == [donation_example('General'), donation_example('Emergency')]
+
+
+def test_update_only_reads_rows_added_since_the_last_run(db, tmp_path):
+    add_chats(db, 7)
+    corpus = TrainingCorpus(str(tmp_path / 'corpus'), shard_size=4)
+    assert corpus.update(db)['rows'] == 107
+    assert corpus.update(db)['rows'] == 0
+
+    add_chats(db, 3, start=7)
+    db.add_donation('New', 5, 'Project')
+    # Reopened from disk: high-water marks and seen hashes persist
+    corpus = TrainingCorpus(str(tmp_path / 'corpus'), shard_size=4)
+    assert corpus.update(db) == {'rows': 4, 'added': 4, 'duplicates': 0}
+    assert len(corpus) == 13
+    assert [len(corpus.read_shard(shard)) for shard in corpus.shards] == [4, 4, 4, 1]
+    assert {'input': 'User: question 9\nAssistant:', 'output': 'answer 9'} in list(corpus)
+
+
+def test_interrupted_update_is_rolled_back_on_open(db, tmp_path):
+    path = str(tmp_path / 'corpus')
+    add_chats(db, 3)
+    corpus = TrainingCorpus(path, shard_size=4)
+    corpus.update(db)
+    # An update that wrote examples and hashes but died before saving state
+    with open(os.path.join(path, 'shard-00002.jsonl'), 'a') as f:
+        f.write(json.dumps({'input': 'x', 'output': 'y'}) + '\n{"input": "cut sh')
+    with open(os.path.join(path, 'shard-00003.jsonl'), 'w') as f:
+        f.write('{}\n')
+    with open(os.path.join(path, 'hashes.txt'), 'a') as f:
+        f.write('deadbeef\n')
+
+    corpus = TrainingCorpus(path, shard_size=4)
+    assert len(list(corpus)) == len(corpus) == 5
+    assert not os.path.exists(os.path.join(path, 'shard-00003.jsonl'))
+    assert 'deadbeef' not in corpus._seen
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import re
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# Token ids for a whole training corpus, tokenized once in batches and kept
+# on disk as memory-mapped NumPy arrays: every example's ids laid end to end
+# in one int32 array plus an offsets array. Files are named after a hash of
+# the corpus and the tokenizer settings, so retraining on unchanged data
+# skips tokenization entirely and any change builds a fresh cache; prune()
+# deletes the ones no current corpus uses.
+#
+# An example is its prompt followed by the response and an end-of-sequence
+# token, as a causal LM sees it; ``prompt_lengths`` records where the
+# response starts so the prompt can be left out of the loss.
+
+CACHE_DIR = '.token_cache'
+IGNORE_INDEX = -100  # label value the loss skips
+# <hash>.<tokens|offsets|prompts>[.tmp].npy, the .tmp ones left by an interrupted build
+CACHE_FILE = re.compile(r'^([0-9a-f]{20})\.\w+(\.tmp)?\.npy$')
+
+
+def corpus_hash(examples: Sequence[Dict[str, str]], tokenizer_name: str, max_length: int) -> str:
+    """Content hash of the examples and the settings their token ids depend on."""
+    digest = hashlib.sha256(json.dumps([tokenizer_name, max_length]).encode('utf-8'))
+    for example in examples:
+        digest.update(example['input'].encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(example['output'].encode('utf-8'))
+        digest.update(b'\1')
+    return digest.hexdigest()[:20]
+
+
+def _tokenize(tokenizer, texts: List[str], batch_size: int) -> List[List[int]]:
+    ids = []
+    for start in range(0, len(texts), batch_size):
+        # One call per batch; fast tokenizers encode the batch in parallel in Rust
+        ids.extend(tokenizer(texts[start:start + batch_size], add_special_tokens=False)['input_ids'])
+    return ids
+
+
+class TokenCache:
+    """Read-only view of a cached corpus; ``cache[i]`` is ``(token_ids, prompt_length)``."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.tokens = np.load(f'{path}.tokens.npy', mmap_mode='r')
+        self.offsets = np.load(f'{path}.offsets.npy')
+        self.prompt_lengths = np.load(f'{path}.prompts.npy')
+
+    @classmethod
+    def build(cls, examples: Sequence[Dict[str, str]], tokenizer, max_length: int = 512,
+              cache_dir: str = CACHE_DIR, batch_size: int = 1024) -> 'TokenCache':
+        """Open the cache for ``examples``, tokenizing them first if it doesn't exist yet."""
+        key = corpus_hash(examples, getattr(tokenizer, 'name_or_path', type(tokenizer).__name__), max_length)
+        path = os.path.join(cache_dir, key)
+        if os.path.exists(f'{path}.prompts.npy'):
+            return cls(path)
+
+        prompts = _tokenize(tokenizer, [example['input'] for example in examples], batch_size)
+        responses = _tokenize(tokenizer, [example['output'] for example in examples], batch_size)
+        eos = [tokenizer.eos_token_id] if tokenizer.eos_token_id is not None else []
+        sequences, prompt_lengths = [], []
+        for prompt, response in zip(prompts, responses):
+            # Keep the whole response if possible; long prompts lose their start
+            response = (response + eos)[:max_length]
+            prompt = prompt[max(0, len(prompt) - (max_length - len(response))):]
+            sequences.append(prompt + response)
+            prompt_lengths.append(len(prompt))
+
+        lengths = np.fromiter((len(sequence) for sequence in sequences), dtype=np.int64, count=len(sequences))
+        offsets = np.zeros(len(sequences) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        tokens = np.fromiter((token for sequence in sequences for token in sequence),
+                             dtype=np.int32, count=int(offsets[-1]))
+
+        # The prompts file is written last and its presence marks a complete cache
+        os.makedirs(cache_dir, exist_ok=True)
+        for suffix, array in (('tokens', tokens), ('offsets', offsets),
+                              ('prompts', np.array(prompt_lengths, dtype=np.int32))):
+            temporary = f'{path}.{suffix}.tmp.npy'
+            np.save(temporary, array)
+            os.replace(temporary, f'{path}.{suffix}.npy')
+        return cls(path)
+
+    def __getstate__(self):
+        # DataLoader workers reopen the files instead of pickling the arrays
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    def __len__(self) -> int:
+        return len(self.prompt_lengths)
+
+    def __getitem__(self, index: int) -> Tuple[np.ndarray, int]:
+        return self.tokens[self.offsets[index]:self.offsets[index + 1]], int(self.prompt_lengths[index])
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    @property
+    def token_count(self) -> int:
+        return int(self.offsets[-1])
+
+
+def prune(keep: Sequence[TokenCache], cache_dir: str = CACHE_DIR) -> int:
+    """Delete every cached corpus in ``cache_dir`` except ``keep``; returns how many went.
+
+    A shard that grows is cached again under a new hash, so without this the
+    directory gains a copy of the newest shard on every training run.
+    """
+    if not os.path.isdir(cache_dir):
+        return 0
+    keep = {os.path.basename(cache.path) for cache in keep}
+    removed = set()
+    for name in os.listdir(cache_dir):
+        match = CACHE_FILE.match(name)
+        if match and match.group(1) not in keep:
+            os.remove(os.path.join(cache_dir, name))
+            removed.add(match.group(1))
+    return len(removed)
+
+
+def pad_batch(features: Sequence[Dict[str, Any]], pad_token_id: int,
+              pad_to_multiple_of: int = 8) -> Dict[str, np.ndarray]:
+    """Pad ``{'input_ids', 'prompt_length'}`` features to the batch's longest example.
+
+    The length is rounded up to ``pad_to_multiple_of``, which keeps matrix
+    shapes friendly without padding every batch to the model's maximum.
+    Labels copy the input ids, with the prompt and the padding set to
+    IGNORE_INDEX.
+    """
+    longest = max(len(feature['input_ids']) for feature in features)
+    if pad_to_multiple_of:
+        longest = -(-longest // pad_to_multiple_of) * pad_to_multiple_of
+    input_ids = np.full((len(features), longest), pad_token_id, dtype=np.int64)
+    attention_mask = np.zeros((len(features), longest), dtype=np.int64)
+    labels = np.full((len(features), longest), IGNORE_INDEX, dtype=np.int64)
+    for row, feature in enumerate(features):
+        ids = feature['input_ids']
+        input_ids[row, :len(ids)] = ids
+        attention_mask[row, :len(ids)] = 1
+        labels[row, feature['prompt_length']:len(ids)] = ids[feature['prompt_length']:]
+    return {'input_ids': input_ids, 'attention_mask': attention_mask, 'labels': labels}
@@ -0,0 +1,182 @@
+import argparse
+import hashlib
+import json
+import os
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from database import DonationDatabase
+
+# The fine-tuning corpus lives on disk as JSON-lines shards and grows
+# incrementally: update() reads only the chat_history and donations rows
+# with ids above the high-water marks saved in state.json, turns them into
+# examples, drops any whose content hash was seen before and appends the
+# rest to the newest shard. Full shards never change again, so their token
+# caches (see token_cache.py) stay valid and retraining only tokenizes what
+# is new. state.json is written last and is the commit record: lines
+# beyond the counts it lists were left by an interrupted update and are cut
+# off when the corpus is next opened.
+
+CORPUS_DIR = 'training_corpus'
+SHARD_SIZE = 5000  # examples per shard
+
+
+def chat_example(user_message: str, bot_response: str) -> Dict[str, str]:
+    return {'input': f"User: {user_message}\nAssistant:", 'output': bot_response}
+
+
+def donation_example(category: str) -> Dict[str, str]:
+    # Only the category varies, so donations collapse to one example per category
+    return {
+        'input': f"User: How do I make a {category} donation?\nAssistant:",
+        'output': f"You can make a {category} donation by following these steps:\n1. Go to the Donations tab\n"
+                  f"2. Fill out the form with your details\n3. Select the {category} category\n"
+                  f"4. Enter your desired amount\n5. Add any notes\n6. Click 'Submit Donation'"
+    }
+
+
+# source table -> (query for rows after a given id, row -> example)
+SOURCES: Dict[str, Tuple[str, Callable[[tuple], Dict[str, str]]]] = {
+    'chat_history': ("""
+        SELECT id, user_message, bot_response
+        FROM chat_history
+        WHERE id > ?
+        ORDER BY id
+    """, lambda row: chat_example(row[1], row[2])),
+    'donations': ("""
+        SELECT id, category
+        FROM donations
+        WHERE id > ?
+        ORDER BY id
+    """, lambda row: donation_example(row[1])),
+}
+
+
+def example_hash(example: Dict[str, str]) -> str:
+    return hashlib.sha256(f"{example['input']}\0{example['output']}".encode('utf-8')).hexdigest()
+
+
+def _keep_lines(path: str, count: int):
+    # Truncate a file to its first ``count`` lines
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb+') as f:
+        for _ in range(count):
+            if not f.readline():
+                return
+        f.truncate()
+
+
+class TrainingCorpus:
+    """Deduplicated training examples in ``shard-NNNNN.jsonl`` files under ``path``."""
+
+    def __init__(self, path: str = CORPUS_DIR, shard_size: int = SHARD_SIZE):
+        self.path = path
+        self.shard_size = shard_size
+        os.makedirs(path, exist_ok=True)
+        self.state = {'high_water': {source: 0 for source in SOURCES}, 'shards': [], 'hashes': 0}
+        state_path = os.path.join(path, 'state.json')
+        if os.path.exists(state_path):
+            with open(state_path, encoding='utf-8') as f:
+                saved = json.load(f)
+            self.state['high_water'].update(saved.get('high_water', {}))
+            self.state['shards'] = saved.get('shards', [])
+            self.state['hashes'] = saved.get('hashes', 0)
+        self._recover()
+        self._seen = set()
+        hashes_path = os.path.join(path, 'hashes.txt')
+        if os.path.exists(hashes_path):
+            with open(hashes_path, encoding='utf-8') as f:
+                self._seen.update(f.read().split())
+
+    def _recover(self):
+        # Drop whatever an interrupted update wrote after the last saved state
+        names = {shard['name'] for shard in self.state['shards']}
+        for name in os.listdir(self.path):
+            if name.startswith('shard-') and name not in names:
+                os.remove(os.path.join(self.path, name))
+        if self.state['shards']:
+            last = self.state['shards'][-1]
+            _keep_lines(os.path.join(self.path, last['name']), last['examples'])
+        _keep_lines(os.path.join(self.path, 'hashes.txt'), self.state['hashes'])
+
+    @property
+    def shards(self) -> List[str]:
+        """Shard file paths, oldest first."""
+        return [os.path.join(self.path, shard['name']) for shard in self.state['shards']]
+
+    def __len__(self) -> int:
+        return sum(shard['examples'] for shard in self.state['shards'])
+
+    def _append(self, examples: List[Dict[str, str]]):
+        shards = self.state['shards']
+        while examples:
+            if not shards or shards[-1]['examples'] >= self.shard_size:
+                shards.append({'name': f"shard-{len(shards) + 1:05d}.jsonl", 'examples': 0})
+            shard = shards[-1]
+            batch, examples = examples[:self.shard_size - shard['examples']], examples[self.shard_size - shard['examples']:]
+            with open(os.path.join(self.path, shard['name']), 'a', encoding='utf-8') as f:
+                f.writelines(json.dumps(example) + '\n' for example in batch)
+            shard['examples'] += len(batch)
+
+    def _save_state(self, new_hashes: List[str]):
+        with open(os.path.join(self.path, 'hashes.txt'), 'a', encoding='utf-8') as f:
+            f.writelines(digest + '\n' for digest in new_hashes)
+        self.state['hashes'] += len(new_hashes)
+        temporary = os.path.join(self.path, 'state.json.tmp')
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(temporary, os.path.join(self.path, 'state.json'))
+
+    def update(self, db: DonationDatabase = None, chunk_size: int = 5000) -> Dict[str, int]:
+        """Append examples for every row added since the last update."""
+        db = db or DonationDatabase()
+        result = {'rows': 0, 'added': 0, 'duplicates': 0}
+        for source, (query, to_example) in SOURCES.items():
+            with db.connection() as conn:
+                cursor = conn.execute(query, (self.state['high_water'][source],))
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    examples, hashes = [], []
+                    for row in rows:
+                        example = to_example(row)
+                        digest = example_hash(example)
+                        if digest in self._seen:
+                            result['duplicates'] += 1
+                            continue
+                        self._seen.add(digest)
+                        examples.append(example)
+                        hashes.append(digest)
+                    self._append(examples)
+                    self.state['high_water'][source] = rows[-1][0]
+                    self._save_state(hashes)
+                    result['rows'] += len(rows)
+                    result['added'] += len(examples)
+        return result
+
+    def read_shard(self, shard_path: str) -> List[Dict[str, str]]:
+        with open(shard_path, encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        for shard_path in self.shards:
+            yield from self.read_shard(shard_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Add new chat history and donations to the training corpus.')
+    parser.add_argument('--db', default='donations.db', help='database file (default: donations.db)')
+    parser.add_argument('--corpus', default=CORPUS_DIR, help=f'corpus directory (default: {CORPUS_DIR})')
+    parser.add_argument('--shard-size', type=int, default=SHARD_SIZE, help='examples per shard')
+    args = parser.parse_args()
+
+    corpus = TrainingCorpus(args.corpus, args.shard_size)
+    result = corpus.update(DonationDatabase(args.db))
+    print(f"Read {result['rows']:,} new rows: {result['added']:,} examples added, "
+          f"{result['duplicates']:,} duplicates skipped; {len(corpus):,} examples in "
+          f"{len(corpus.shards)} shard(s)")
+
+
+if __name__ == '__main__':
+    main()